@@ -0,0 +1,67 @@
+"""
+Bridge from the web API to the bot's event loop
+The web UI runs either on its own loop in a thread (default) or as a task
+on the bot's loop (WEB_UI_ON_BOT_LOOP). Discord state belongs to the bot
+loop: its caches (guild.members, roles) are mutated there by the gateway and
+its HTTP client is bound to it. Handlers reach it through these helpers,
+which run directly when already on the bot loop and otherwise schedule the
+work there and await the result without blocking the API loop
+"""
+
+import asyncio
+
+# Seconds to wait for work scheduled on the bot loop
+BRIDGE_TIMEOUT = 10
+
+
+class BotUnavailable(RuntimeError):
+    """The bot is not running (or its loop is not started yet)"""
+
+
+def _bot_loop():
+    from api.main import get_bot_instance
+
+    bot = get_bot_instance()
+    loop = getattr(bot, "loop", None) if bot else None
+    if not isinstance(loop, asyncio.AbstractEventLoop) or loop.is_closed():
+        return None
+    return loop
+
+
+def on_bot_loop():
+    """True if the caller runs on the bot's loop (web UI embedded in the bot)"""
+    try:
+        return asyncio.get_running_loop() is _bot_loop()
+    except RuntimeError:
+        return False
+
+
+async def run_on_bot(coro, timeout=BRIDGE_TIMEOUT):
+    """Await a coroutine on the bot's loop
+
+    Raises BotUnavailable without a running bot and asyncio.TimeoutError if
+    the coroutine does not finish in time (it is cancelled then).
+    """
+    loop = _bot_loop()
+    if loop is None:
+        coro.close()
+        raise BotUnavailable("Bot is not running")
+    if loop is asyncio.get_running_loop():
+        return await asyncio.wait_for(coro, timeout)
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+
+async def call_on_bot(fn, *args, timeout=BRIDGE_TIMEOUT):
+    """Run a plain function on the bot's loop, e.g. to read discord.py caches
+
+    The function runs between gateway events, so it sees consistent caches.
+    Without a bot loop it is called directly (nothing can mutate the caches).
+    """
+    if _bot_loop() is None:
+        return fn(*args)
+
+    async def call():
+        return fn(*args)
+
+    return await run_on_bot(call(), timeout)
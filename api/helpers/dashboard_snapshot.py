@@ -0,0 +1,163 @@
+"""
+Dashboard snapshot
+The dashboard numbers are computed by one background loop and served from
+memory, so the database and CPU cost does not grow with the number of open
+dashboards. Every section is refreshed when it gets older than its maximum
+age, and sections backed by a database are also refreshed shortly after a
+write to that database. Sections that read the bot's caches are computed on
+the bot loop, the others in worker threads
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from cogs.helpers.db import add_write_listener, remove_write_listener
+from api.helpers.bot_bridge import call_on_bot
+
+# How often the loop checks for sections to refresh
+SNAPSHOT_TICK_SECONDS = 5
+
+# Pause after a write before refreshing, so a burst of writes costs one refresh
+SNAPSHOT_DEBOUNCE_SECONDS = 2
+
+
+class SnapshotSection:
+    """How to compute one part of the snapshot"""
+
+    def __init__(
+        self,
+        compute: Callable[[], Any],
+        max_age: float,
+        database: Optional[str] = None,
+        on_bot: bool = False,
+        default: Any = None,
+    ):
+        self.compute = compute
+        self.max_age = max_age
+        self.database = database
+        # Reads discord.py caches: run on the bot loop instead of a thread
+        self.on_bot = on_bot
+        # Served until the first compute succeeds
+        self.default = default
+
+
+class DashboardSnapshot:
+    """Background-refreshed dashboard sections, read from memory"""
+
+    def __init__(
+        self,
+        sections: Dict[str, SnapshotSection],
+        tick=SNAPSHOT_TICK_SECONDS,
+        debounce=SNAPSHOT_DEBOUNCE_SECONDS,
+    ):
+        self.sections = sections
+        self.tick = tick
+        self.debounce = debounce
+        self.refreshes = 0
+        self._values: Dict[str, Any] = {}
+        self._updated: Dict[str, float] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wake = None
+        self._task = None
+
+    def start(self):
+        """Start the refresh loop on the running loop (the uvicorn loop)"""
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        add_write_listener(self._on_write)
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        remove_write_listener(self._on_write)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_write(self, database):
+        """Mark the sections of a database stale (called from writer threads)"""
+        names = {
+            name
+            for name, section in self.sections.items()
+            if section.database == database
+        }
+        if not names or self._loop is None or self._loop.is_closed():
+            return
+        with self._lock:
+            self._dirty.update(names)
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _due(self):
+        """Sections written to or older than their maximum age"""
+        now = time.monotonic()
+        with self._lock:
+            due = set(self._dirty)
+            self._dirty.clear()
+        due.update(
+            name
+            for name, section in self.sections.items()
+            if now - self._updated.get(name, float("-inf")) >= section.max_age
+        )
+        return due
+
+    async def _run(self):
+        while True:
+            due = self._due()
+            if due:
+                await self.refresh(due)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.tick)
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def refresh(self, names=None):
+        """Recompute sections in worker threads (all of them by default)"""
+        names = list(self.sections if names is None else names)
+        results = await asyncio.gather(
+            *(self._compute(self.sections[name]) for name in names),
+            return_exceptions=True,
+        )
+        now = time.monotonic()
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                print(f"[DASHBOARD] Could not refresh {name}: {result}")
+                continue
+            self._values[name] = result
+            self._updated[name] = now
+        self.refreshes += 1
+
+    async def _compute(self, section):
+        if section.on_bot:
+            return await call_on_bot(section.compute)
+        return await asyncio.to_thread(section.compute)
+
+    async def get(self, name=None):
+        """Current value of one section, or of every section as a dict
+
+        Sections never computed yet (loop not running) are computed on demand;
+        a section whose compute has never succeeded is served as its default.
+        """
+        wanted = [name] if name else list(self.sections)
+        missing = [section for section in wanted if section not in self._values]
+        if missing:
+            await self.refresh(missing)
+        values = {
+            section: self._values.get(section, self.sections[section].default)
+            for section in wanted
+        }
+        return values[name] if name else values
+
+    def age(self, name):
+        """Seconds since a section was refreshed (None if never)"""
+        updated = self._updated.get(name)
+        return None if updated is None else time.monotonic() - updated
@@ -0,0 +1,31 @@
+"""
+Helpers for SQL-side pagination and search in the API routers
+"""
+
+from fastapi import HTTPException
+from cogs.helpers.db import escape_like
+
+
+def encode_cursor(*values):
+    """Build a keyset cursor from the sort key of the last row of a page"""
+    return ":".join(str(value) for value in values)
+
+
+def decode_cursor(cursor, *types):
+    """Parse a keyset cursor back into its typed sort key values
+
+    Only the last separators are split on, so the first value may itself
+    contain ':' (e.g. ISO timestamps).
+    """
+    try:
+        parts = cursor.rsplit(":", len(types) - 1)
+        if len(parts) != len(types):
+            raise ValueError(cursor)
+        return tuple(cast(part) for cast, part in zip(types, parts))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def fts_phrase(value):
+    """Quote a search term as a single FTS5 phrase"""
+    return '"' + value.replace('"', '""') + '"'
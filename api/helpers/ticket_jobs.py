@@ -0,0 +1,132 @@
+"""
+Background ticket-close jobs
+Closing a ticket from the web UI queues a job that runs on the bot loop, so
+the HTTP request returns at once. Progress is published over /ws/updates
+and a ticket only ever has one active close job
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+# Close jobs running at the same time (each one exports and uploads a transcript)
+MAX_CONCURRENT_CLOSES = 2
+
+# Finished jobs are kept this long for status polling
+FINISHED_JOB_TTL = 3600
+
+# Progress (percent) reported for each close step
+CLOSE_STEPS = {
+    "queued": 0,
+    "lookup": 5,
+    "transcript": 15,
+    "delivering": 50,
+    "deleting": 95,
+    "done": 100,
+}
+
+
+class TicketCloseJobs:
+    """Registry and runner of ticket-close jobs"""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_CLOSES):
+        self.max_concurrent = max_concurrent
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._active: Dict[int, str] = {}  # ticket_id -> job id
+        self._lock = threading.Lock()
+        self._semaphore = None
+
+    def submit(self, ticket_id: int, bot_instance, closed_by_username: str):
+        """Queue a close job on the bot loop
+
+        Returns (job, created). While a job for the ticket is queued or
+        running, that job is returned instead of starting a second one.
+        """
+        with self._lock:
+            self._prune()
+            job_id = self._active.get(ticket_id)
+            if job_id:
+                return dict(self._jobs[job_id]), False
+
+            job = {
+                "id": uuid.uuid4().hex,
+                "ticket_id": ticket_id,
+                "status": "queued",
+                "step": "queued",
+                "progress": 0,
+                "message": "Waiting for the bot",
+                "requested_by": closed_by_username,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+            self._jobs[job["id"]] = job
+            self._active[ticket_id] = job["id"]
+
+        asyncio.run_coroutine_threadsafe(
+            self._run(job["id"], bot_instance, closed_by_username), bot_instance.loop
+        )
+        self._publish(job)
+        return dict(job), True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current state of a job (None if unknown or expired)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(changes)
+            if "step" in changes:
+                job["progress"] = CLOSE_STEPS.get(changes["step"], job["progress"])
+            if job["status"] in ("done", "failed"):
+                job["finished_at"] = time.time()
+                self._active.pop(job["ticket_id"], None)
+            snapshot = dict(job)
+        self._publish(snapshot)
+
+    def _publish(self, job):
+        from api.routers.websocket import manager
+
+        manager.publish("tickets", "ticket_close", job)
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL (call with the lock held)"""
+        cutoff = time.time() - FINISHED_JOB_TTL
+        for job_id in [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    async def _run(self, job_id, bot_instance, closed_by_username):
+        """Run a close job on the bot loop"""
+        from cogs.helpers.ticket_closer import close_ticket_with_transcript
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        ticket_id = self._jobs[job_id]["ticket_id"]
+
+        def progress(step, message):
+            self._update(job_id, status="running", step=step, message=message)
+
+        async with self._semaphore:
+            try:
+                result = await close_ticket_with_transcript(
+                    ticket_id, bot_instance, closed_by_username, progress=progress
+                )
+            except Exception as e:
+                result = {"success": False, "message": f"Error: {e}"}
+
+        if result.get("success"):
+            self._update(job_id, status="done", step="done", message=result["message"])
+        else:
+            self._update(job_id, status="failed", message=result["message"])
+
+
+ticket_close_jobs = TicketCloseJobs()
@@ -59,8 +59,15 @@ def get_bot_instance():
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     logger.info("FastAPI starting up...")
+    from api.routers.dashboard import dashboard_snapshot
+    from api.routers.websocket import manager
+
+    dashboard_snapshot.start()
+    manager.start()
     yield
     logger.info("FastAPI shutting down...")
+    await manager.stop()
+    await dashboard_snapshot.stop()
 
 
 # Initialize FastAPI
@@ -116,6 +123,7 @@ from api.routers import (
     guild_stats,
     about,
     websocket,
+    transcripts,
 )
 
 # Register API routers FIRST (before catch-all routes)
@@ -123,6 +131,7 @@ app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 app.include_router(settings.router, prefix="/api/settings", tags=["Settings"])
 app.include_router(tickets.router, prefix="/api/tickets", tags=["Tickets"])
+app.include_router(transcripts.router, prefix="/api/transcripts", tags=["Transcripts"])
 app.include_router(invites.router, prefix="/api/invites", tags=["Invites"])
 app.include_router(databases.router, prefix="/api/databases", tags=["Databases"])
 app.include_router(services.router, prefix="/api/services", tags=["Services"])
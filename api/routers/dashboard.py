@@ -14,9 +14,19 @@ import sqlite3
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from api.main import get_bot_instance
+from api.helpers.dashboard_snapshot import DashboardSnapshot, SnapshotSection
+from cogs.helpers.db import (
+    configure_connection,
+    TICKET_SYSTEM_DB,
+    INVITES_DB,
+    PLEX_CLIENTS_DB,
+)
 
 router = APIRouter()
 
+# Prime the CPU counter; later calls report usage since the previous one
+psutil.cpu_percent(interval=None)
+
 
 class BotStatus(BaseModel):
     online: bool
@@ -45,6 +55,14 @@ class InviteStats(BaseModel):
     total: int
 
 
+class PlexJobStats(BaseModel):
+    pending: int
+    running: int
+    done: int
+    failed: int
+    total: int
+
+
 class DatabaseStats(BaseModel):
     databases: int
     tables: int
@@ -73,6 +91,7 @@ class DashboardData(BaseModel):
     bot_stats: BotStats
     ticket_stats: TicketStats
     invite_stats: InviteStats
+    plex_job_stats: PlexJobStats
     db_stats: DatabaseStats
     resources: SystemResources
     services: List[ServiceItem]
@@ -86,7 +105,9 @@ def get_db_connection(db_name: str):
         "databases",
         f"{db_name}.db",
     )
-    return sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path)
+    configure_connection(conn)
+    return conn
 
 
 def get_bot_status() -> BotStatus:
@@ -185,21 +206,9 @@ def get_ticket_stats() -> TicketStats:
         conn = get_db_connection("ticket_system")
         cursor = conn.cursor()
 
-        # Count plex tickets
-        cursor.execute("SELECT COUNT(*) FROM plex_ticket_data")
-        plex_total = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM plex_ticket_data WHERE closed = 0")
-        plex_open = cursor.fetchone()[0]
-
-        # Count TV tickets
-        cursor.execute("SELECT COUNT(*) FROM tv_ticket_data")
-        tv_total = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM tv_ticket_data WHERE closed = 0")
-        tv_open = cursor.fetchone()[0]
-
-        # Combine totals
-        stats["total"] = plex_total + tv_total
-        stats["open"] = plex_open + tv_open
+        # Plex and TV tickets share one table
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(closed = 0), 0) FROM tickets")
+        stats["total"], stats["open"] = cursor.fetchone()
         stats["closed"] = stats["total"] - stats["open"]
 
         conn.close()
@@ -229,9 +238,29 @@ def get_invite_stats() -> InviteStats:
     return InviteStats(**stats)
 
 
+def get_plex_job_stats() -> PlexJobStats:
+    """Get Plex bulk job queue progress"""
+    stats = {"pending": 0, "running": 0, "done": 0, "failed": 0, "total": 0}
+
+    try:
+        conn = get_db_connection("plex_clients")
+        cursor = conn.cursor()
+        cursor.execute("SELECT status, COUNT(*) FROM plex_jobs GROUP BY status")
+        for status, count in cursor.fetchall():
+            if status in stats:
+                stats[status] = count
+        stats["total"] = sum(stats.values())
+        conn.close()
+    except Exception:
+        pass
+
+    return PlexJobStats(**stats)
+
+
 def get_system_resources() -> SystemResources:
     """Get system resource usage"""
-    cpu_percent = psutil.cpu_percent(interval=0.1)
+    # CPU use since the previous call (the snapshot calls this on a schedule)
+    cpu_percent = psutil.cpu_percent(interval=None)
     memory = psutil.virtual_memory()
     disk = psutil.disk_usage("/")
 
@@ -279,29 +308,70 @@ def get_service_status() -> List[ServiceItem]:
     return services
 
 
+# Sections of the dashboard, refreshed in the background (max age in seconds);
+# database-backed sections are also refreshed after writes to their database.
+# Defaults are served for sections that could not be computed yet
+dashboard_snapshot = DashboardSnapshot(
+    {
+        "bot_status": SnapshotSection(
+            get_bot_status,
+            5,
+            on_bot=True,
+            default=BotStatus(
+                online=False, name="Bot", latency="0ms", uptime="0s", guilds=0, users=0
+            ),
+        ),
+        "bot_stats": SnapshotSection(
+            get_bot_stats,
+            60,
+            on_bot=True,
+            default=BotStats(channels=0, roles=0, commands=0),
+        ),
+        "ticket_stats": SnapshotSection(
+            get_ticket_stats,
+            300,
+            TICKET_SYSTEM_DB,
+            default=TicketStats(open=0, closed=0, total=0),
+        ),
+        "invite_stats": SnapshotSection(
+            get_invite_stats,
+            300,
+            INVITES_DB,
+            default=InviteStats(active=0, expired=0, total=0),
+        ),
+        "plex_job_stats": SnapshotSection(
+            get_plex_job_stats,
+            300,
+            PLEX_CLIENTS_DB,
+            default=PlexJobStats(pending=0, running=0, done=0, failed=0, total=0),
+        ),
+        "db_stats": SnapshotSection(
+            get_database_stats,
+            600,
+            default=DatabaseStats(databases=0, tables=0, records=0),
+        ),
+        "resources": SnapshotSection(
+            get_system_resources,
+            10,
+            default=SystemResources(
+                cpu=ResourceItem(percent=0, label="CPU"),
+                memory=ResourceItem(percent=0, label="Memory"),
+                disk=ResourceItem(percent=0, label="Disk"),
+            ),
+        ),
+        "services": SnapshotSection(get_service_status, 60, default=[]),
+    }
+)
+
+
 @router.get("/", response_model=DashboardData)
 async def get_dashboard():
-    """Get dashboard overview data"""
+    """Get dashboard overview data (served from the snapshot)"""
     try:
-        bot_status = get_bot_status()
-        bot_stats = get_bot_stats()
-        ticket_stats = get_ticket_stats()
-        invite_stats = get_invite_stats()
-        db_stats = get_database_stats()
-        resources = get_system_resources()
-        services = get_service_status()
-        services_running = sum(1 for s in services if s.status == "running")
-
-        return DashboardData(
-            bot_status=bot_status,
-            bot_stats=bot_stats,
-            ticket_stats=ticket_stats,
-            invite_stats=invite_stats,
-            db_stats=db_stats,
-            resources=resources,
-            services=services,
-            services_running=services_running,
-        )
+        data = await dashboard_snapshot.get()
+        services_running = sum(1 for s in data["services"] if s.status == "running")
+
+        return DashboardData(**data, services_running=services_running)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -309,4 +379,4 @@ async def get_dashboard():
 @router.get("/bot-status", response_model=BotStatus)
 async def get_bot_status_endpoint():
     """Get bot status only"""
-    return get_bot_status()
+    return await dashboard_snapshot.get("bot_status")
@@ -5,6 +5,7 @@ Guild Stats API Router
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
+from api.helpers.bot_bridge import call_on_bot
 
 router = APIRouter()
 
@@ -43,17 +44,11 @@ class GuildStatsResponse(BaseModel):
     totals: dict
 
 
-@router.get("/", response_model=GuildStatsResponse)
-async def get_guild_stats():
-    """Get detailed statistics for all guilds"""
-    from api.main import bot_instance
-
-    if not bot_instance:
-        raise HTTPException(status_code=503, detail="Bot is not running")
-
+def collect_guild_stats(bot):
+    """Statistics of every guild from the bot's caches (run on the bot loop)"""
     guild_stats = []
 
-    for guild in bot_instance.guilds:
+    for guild in bot.guilds:
         # Count channels by type
         text_channels = len([c for c in guild.text_channels])
         voice_channels = len([c for c in guild.voice_channels])
@@ -102,6 +97,19 @@ async def get_guild_stats():
             )
         )
 
+    return guild_stats
+
+
+@router.get("/", response_model=GuildStatsResponse)
+async def get_guild_stats():
+    """Get detailed statistics for all guilds"""
+    from api.main import bot_instance
+
+    if not bot_instance:
+        raise HTTPException(status_code=503, detail="Bot is not running")
+
+    guild_stats = await call_on_bot(collect_guild_stats, bot_instance)
+
     # Sort by member count
     guild_stats.sort(key=lambda x: x.member_count, reverse=True)
 
@@ -4,9 +4,17 @@ from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from api.routers.auth import get_current_user, User
-import os
-import sqlite3
+from api.routers.websocket import manager
+from api.helpers.bot_bridge import call_on_bot, run_on_bot
 from datetime import datetime, timedelta
+from api.helpers.pagination import (
+    encode_cursor,
+    decode_cursor,
+    escape_like,
+    fts_phrase,
+)
+from cogs.helpers.db import get_db, INVITES_DB, PLEX_CLIENTS_DB
+from cogs.helpers.plex_client import get_plex_server, plex_service, plex_stats
 
 router = APIRouter()
 
@@ -35,6 +43,7 @@ class PlexStats(BaseModel):
     movies: int
     shows: int
     users: int
+    cache_age: Optional[float] = None  # seconds since the library stats were fetched
 
 
 class InvitesResponse(BaseModel):
@@ -42,6 +51,7 @@ class InvitesResponse(BaseModel):
     stats: InviteStats
     plex_stats: PlexStats
     total_pages: int
+    next_cursor: Optional[str] = None
 
 
 class AddInviteRequest(BaseModel):
@@ -49,41 +59,96 @@ class AddInviteRequest(BaseModel):
     discord_user: str
 
 
-def get_invites_db_path():
-    """Get the path to the invites database"""
-    db_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-        "databases",
-        "invites.db",
+class BulkPlexRequest(BaseModel):
+    action: str  # "invite" or "remove"
+    csv: Optional[str] = None  # email[,discord_user_id] lines
+    role_id: Optional[str] = None  # use the stored Plex emails of this role's members
+
+
+def get_invites_db():
+    """Get the shared invites database, or None if it has not been created yet"""
+    db = get_db(INVITES_DB)
+    return db if db.exists() else None
+
+
+def _search_condition(conn, search):
+    """Build the WHERE clause for an email/discord_user search"""
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'invites_fts'"
+    ).fetchone()
+
+    # Trigrams need at least three characters
+    if has_fts and len(search) >= 3:
+        return (
+            "id IN (SELECT rowid FROM invites_fts WHERE invites_fts MATCH ?)",
+            [fts_phrase(search)],
+        )
+
+    pattern = f"%{escape_like(search)}%"
+    return (
+        "(email LIKE ? ESCAPE '\\' OR discord_user LIKE ? ESCAPE '\\')",
+        [pattern, pattern],
     )
-    return db_path if os.path.exists(db_path) else None
 
 
-def get_plex_connection():
-    """Get Plex connection"""
-    try:
-        from plexapi.server import PlexServer
-        from config.settings import PLEX_BASE_URL, PLEX_TOKEN
+def _query_invites(conn, search, after, page, per_page):
+    """Get status counts, the filtered count and one page of invites"""
+    counts = dict(
+        conn.execute("SELECT status, COUNT(*) FROM invites GROUP BY status").fetchall()
+    )
 
-        if not PLEX_BASE_URL or not PLEX_TOKEN:
-            return None
-        return PlexServer(PLEX_BASE_URL, PLEX_TOKEN)
-    except Exception as e:
-        print(f"Error connecting to Plex: {e}")
-        return None
+    conditions = []
+    params = []
+    if search:
+        condition, search_params = _search_condition(conn, search)
+        conditions.append(condition)
+        params.extend(search_params)
+        filtered_count = conn.execute(
+            f"SELECT COUNT(*) FROM invites WHERE {condition}", search_params
+        ).fetchone()[0]
+    else:
+        filtered_count = sum(counts.values())
+
+    if after:
+        # Keyset: continue strictly after the last (created_at, id) returned
+        created_at, row_id = after
+        conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+        params.extend([created_at, created_at, row_id])
+        offset = 0
+    else:
+        offset = (page - 1) * per_page
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    rows = conn.execute(
+        f"""
+        SELECT id, email, discord_user, status, created_at, expires_at
+        FROM invites
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ? OFFSET ?
+    """,
+        (*params, per_page, offset),
+    ).fetchall()
+
+    return counts, filtered_count, rows
 
 
 @router.get("/", response_model=InvitesResponse)
 async def get_invites(
-    page: int = Query(1),
-    per_page: int = Query(10),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=100),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
 ):
-    """Get all invites with filtering and pagination"""
-    db_path = get_invites_db_path()
+    """Get all invites with filtering and pagination
+
+    Pass the returned next_cursor as cursor to fetch the following page
+    without an OFFSET scan (page is ignored when a cursor is given).
+    """
+    db = get_invites_db()
 
-    if not db_path:
+    if not db:
         return InvitesResponse(
             invites=[],
             stats=InviteStats(total=0, active=0, expired=0, revoked=0, removed=0),
@@ -98,98 +163,50 @@ async def get_invites(
             total_pages=0,
         )
 
-    try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    after = decode_cursor(cursor, str, int) if cursor else None
 
-        # Get all invites
-        cursor.execute(
-            """
-            SELECT id, email, discord_user, status, created_at, expires_at
-            FROM invites
-            ORDER BY created_at DESC
-        """
+    try:
+        counts, filtered_count, rows = await db.run(
+            _query_invites, search, after, page, per_page
         )
 
-        all_invites = []
-        for row in cursor.fetchall():
-            all_invites.append(dict(row))
-
-        # Apply search filter
-        if search:
-            search_lower = search.lower()
-            all_invites = [
-                inv
-                for inv in all_invites
-                if search_lower in inv.get("email", "").lower()
-                or search_lower in inv.get("discord_user", "").lower()
-            ]
-
-        # Get stats
-        cursor.execute("SELECT COUNT(*) FROM invites")
-        total = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM invites WHERE status = 'active'")
-        active = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM invites WHERE status = 'expired'")
-        expired = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM invites WHERE status = 'revoked'")
-        revoked = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM invites WHERE status = 'removed'")
-        removed = cursor.fetchone()[0]
-
-        conn.close()
-
-        # Pagination
-        total_count = len(all_invites)
-        offset = (page - 1) * per_page
-        paginated_invites = all_invites[offset : offset + per_page]
-
-        # Get Plex stats
-        plex = get_plex_connection()
-        if plex:
-            try:
-                movies = 0
-                shows = 0
-                for section in plex.library.sections():
-                    if section.type == "movie":
-                        movies += section.totalSize
-                    elif section.type == "show":
-                        shows += section.totalSize
-
-                plex_stats = PlexStats(
-                    connected=True,
-                    server_name=plex.friendlyName,
-                    version=plex.version,
-                    movies=movies,
-                    shows=shows,
-                    users=active,
-                )
-            except Exception as e:
-                print(f"Error getting Plex stats: {e}")
-                plex_stats = PlexStats(
-                    connected=False,
-                    server_name="N/A",
-                    version="N/A",
-                    movies=0,
-                    shows=0,
-                    users=0,
-                )
+        total = sum(counts.values())
+        active = counts.get("active", 0)
+        expired = counts.get("expired", 0)
+        revoked = counts.get("revoked", 0)
+        removed = counts.get("removed", 0)
+
+        # Plex stats come from memory and are revalidated in the background
+        cached, cache_age = plex_stats.get()
+        if cached and cached["connected"]:
+            plex_stats_item = PlexStats(
+                connected=True,
+                server_name=cached["server_name"],
+                version=cached["version"],
+                movies=cached["movies"],
+                shows=cached["shows"],
+                users=active,
+                cache_age=cache_age,
+            )
         else:
-            plex_stats = PlexStats(
+            plex_stats_item = PlexStats(
                 connected=False,
                 server_name="N/A",
                 version="N/A",
                 movies=0,
                 shows=0,
                 users=0,
+                cache_age=cache_age,
             )
 
-        total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 0
+        total_pages = (
+            (filtered_count + per_page - 1) // per_page if filtered_count > 0 else 0
+        )
+
+        next_cursor = None
+        if len(rows) == per_page:
+            last = rows[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
 
         return InvitesResponse(
             invites=[
@@ -199,9 +216,9 @@ async def get_invites(
                     discord_user=inv["discord_user"],
                     status=inv["status"],
                     created_at=inv["created_at"],
-                    expires_at=inv.get("expires_at"),
+                    expires_at=inv["expires_at"],
                 )
-                for inv in paginated_invites
+                for inv in rows
             ],
             stats=InviteStats(
                 total=total,
@@ -210,8 +227,9 @@ async def get_invites(
                 revoked=revoked,
                 removed=removed,
             ),
-            plex_stats=plex_stats,
+            plex_stats=plex_stats_item,
             total_pages=total_pages,
+            next_cursor=next_cursor,
         )
 
     except Exception as e:
@@ -234,34 +252,153 @@ async def get_invites(
         )
 
 
+@router.get("/plex/metrics")
+async def get_plex_metrics(current_user: User = Depends(get_current_user)):
+    """Get Plex call latency metrics and circuit breaker state"""
+    return plex_service.metrics()
+
+
+def get_role_members(role_id):
+    """Members of a role in the bot's guild, None if the role does not exist (run on the bot loop)"""
+    from api.main import bot_instance
+    from config.settings import GUILD_ID
+
+    guild = bot_instance.get_guild(int(GUILD_ID))
+    role = guild.get_role(role_id) if guild else None
+    return list(role.members) if role else None
+
+
+@router.post("/bulk")
+async def enqueue_bulk_plex_jobs(
+    request: BulkPlexRequest, current_user: User = Depends(get_current_user)
+):
+    """Queue bulk Plex invites or removals from a CSV and/or a Discord role"""
+    from cogs.helpers.plex_helper import verifyemail
+    from cogs.helpers.plex_jobs import (
+        PLEX_JOB_ACTIONS,
+        enqueue_plex_jobs,
+        parse_jobs_csv,
+        role_member_entries,
+    )
+
+    if request.action not in PLEX_JOB_ACTIONS:
+        return {"success": False, "message": f"Unknown action: {request.action}"}
+    if not request.csv and not request.role_id:
+        return {"success": False, "message": "Provide a CSV or a role"}
+
+    try:
+        db = get_db(PLEX_CLIENTS_DB)
+        entries = []
+        skipped = []
+
+        if request.csv:
+            entries.extend(parse_jobs_csv(request.csv))
+
+        if request.role_id:
+            from api.main import bot_instance
+
+            if not bot_instance or not bot_instance.is_ready():
+                return {"success": False, "message": "Bot is not ready"}
+            members = await call_on_bot(get_role_members, int(request.role_id))
+            if members is None:
+                return {"success": False, "message": "Role not found"}
+            role_entries, skipped = await db.run(role_member_entries, members)
+            entries.extend(role_entries)
+
+        valid = [(email, user) for email, user in entries if verifyemail(email)]
+        if not valid:
+            return {"success": False, "message": "No valid email addresses found"}
+
+        batch_id = await db.run(enqueue_plex_jobs, request.action, valid)
+        print(
+            f"[INFO] {current_user.username} queued {len(valid)} {request.action} jobs (batch {batch_id})"
+        )
+        return {
+            "success": True,
+            "batch_id": batch_id,
+            "queued": len(valid),
+            "invalid": len(entries) - len(valid),
+            "skipped_members": skipped,
+        }
+
+    except Exception as e:
+        print(f"Error queueing bulk Plex jobs: {e}")
+        return {"success": False, "message": str(e)}
+
+
+@router.get("/bulk")
+async def get_bulk_plex_batches(current_user: User = Depends(get_current_user)):
+    """Get the progress of the queue and of the most recent bulk batches"""
+    from cogs.helpers.plex_jobs import plex_job_progress, list_plex_batches
+
+    db = get_db(PLEX_CLIENTS_DB)
+    if not db.exists():
+        return {"queue": None, "batches": []}
+
+    def _progress(conn):
+        return plex_job_progress(conn), list_plex_batches(conn)
+
+    queue, batches = await db.run(_progress)
+    return {"queue": queue, "batches": batches}
+
+
+@router.get("/bulk/{batch_id}")
+async def get_bulk_plex_batch(
+    batch_id: str, current_user: User = Depends(get_current_user)
+):
+    """Get the progress of one bulk batch"""
+    from cogs.helpers.plex_jobs import plex_job_progress
+
+    db = get_db(PLEX_CLIENTS_DB)
+    if not db.exists():
+        return {"success": False, "message": "Plex clients database not found"}
+
+    progress = await db.run(plex_job_progress, batch_id)
+    if not progress["total"]:
+        return {"success": False, "message": "Batch not found"}
+
+    failed = await db.fetchall(
+        "SELECT email, action, attempts, last_error FROM plex_jobs WHERE batch_id = ? AND status = 'failed'",
+        (batch_id,),
+    )
+    return {
+        "success": True,
+        "batch_id": batch_id,
+        "progress": progress,
+        "failed": [dict(row) for row in failed],
+    }
+
+
 @router.post("/add")
 async def add_invite(
     invite: AddInviteRequest, current_user: User = Depends(get_current_user)
 ):
     """Add a new invite"""
-    db_path = get_invites_db_path()
+    db = get_invites_db()
 
-    if not db_path:
+    if not db:
         return {"success": False, "message": "Invites database not found"}
 
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
         now = datetime.now().isoformat()
         expires = (datetime.now() + timedelta(days=30)).isoformat()
 
-        cursor.execute(
+        invite_id, _ = await db.execute(
             """
             INSERT INTO invites (email, discord_user, status, created_at, expires_at)
             VALUES (?, ?, 'active', ?, ?)
         """,
             (invite.email, invite.discord_user, now, expires),
         )
-
-        conn.commit()
-        invite_id = cursor.lastrowid
-        conn.close()
+        manager.publish(
+            "invites",
+            "invite_added",
+            {
+                "id": invite_id,
+                "email": invite.email,
+                "discord_user": invite.discord_user,
+            },
+        )
 
         return {
             "success": True,
@@ -279,24 +416,19 @@ async def add_invite(
 @router.post("/{invite_id}/remove")
 async def remove_invite(invite_id: int, current_user: User = Depends(get_current_user)):
     """Remove an invite and revoke Plex access"""
-    db_path = get_invites_db_path()
+    db = get_invites_db()
 
-    if not db_path:
+    if not db:
         return {"success": False, "message": "Invites database not found"}
 
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
         # Get invite data before deletion
-        cursor.execute(
+        invite_data = await db.fetchone(
             "SELECT id, email, discord_user, status FROM invites WHERE id = ?",
             (invite_id,),
         )
-        invite_data = cursor.fetchone()
 
         if not invite_data:
-            conn.close()
             return {"success": False, "message": "Invite not found"}
 
         invite_id_db, email, discord_user, status = invite_data
@@ -308,17 +440,31 @@ async def remove_invite(invite_id: int, current_user: User = Depends(get_current
 
         if status in ["active", "accepted"]:
             try:
-                from cogs.helpers.plex_helper import plexremove
+                from cogs.helpers.plex_helper import (
+                    plexremove,
+                    find_plex_friend,
+                    forget_plex_friend,
+                )
                 from api.main import bot_instance
                 from config.settings import PLEX_SERVER_NAME
                 import discord
-                import asyncio
 
-                # Get Plex connection for removal
-                plex = get_plex_connection()
+                # Use the shared Plex connection for removal (off the event loop)
+                plex = await plex_service.call("connect", get_plex_server)
                 if plex:
-                    # Try to remove using email (primary method)
-                    result = plexremove(plex, email)
+                    # Try to remove using email (primary method), with the cached
+                    # friend id when known so Plex does not list every friend
+                    clients_db = get_db(PLEX_CLIENTS_DB)
+                    friend = await clients_db.run(find_plex_friend, email)
+                    result = await plex_service.call(
+                        "remove",
+                        plexremove,
+                        plex,
+                        email,
+                        friend["id"] if friend else None,
+                    )
+                    if result:
+                        await clients_db.run(forget_plex_friend, email)
 
                     if result:
                         plex_removed = True
@@ -382,10 +528,9 @@ async def remove_invite(invite_id: int, current_user: User = Depends(get_current
                                             return False
                                     return False
 
-                                future = asyncio.run_coroutine_threadsafe(
-                                    send_removal_notification(), bot_instance.loop
+                                notification_sent = await run_on_bot(
+                                    send_removal_notification(), timeout=5
                                 )
-                                notification_sent = future.result(timeout=5)
 
                             except Exception as e:
                                 print(
@@ -404,11 +549,14 @@ async def remove_invite(invite_id: int, current_user: User = Depends(get_current
                 plex_message = f"Failed to remove from Plex: {str(e)}"
 
         # Update invite status to 'revoked' (same as Discord role removal)
-        cursor.execute(
+        await db.execute(
             "UPDATE invites SET status = 'revoked' WHERE id = ?", (invite_id,)
         )
-        conn.commit()
-        conn.close()
+        manager.publish(
+            "invites",
+            "invite_revoked",
+            {"id": invite_id, "email": email, "plex_removed": plex_removed},
+        )
 
         # Prepare response message
         if plex_removed:
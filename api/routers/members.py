@@ -11,6 +11,8 @@ from api.routers.auth import (
     verify_token_header,
     User,
 )
+from api.helpers.bot_bridge import call_on_bot, run_on_bot
+from cogs.helpers.member_index import member_index
 
 router = APIRouter(tags=["members"])
 
@@ -181,110 +183,12 @@ async def test_full_combo(request: Request, body: AddRoleRequest):
     }
 
 
-def get_guild_members_from_bot():
-    """Get guild members from bot instance"""
-    try:
-        from api.main import bot_instance
-        from config.settings import GUILD_ID
-
-        bot = bot_instance
-        if not bot or not bot.is_ready():
-            return []
-
-        guild = bot.get_guild(int(GUILD_ID))
-        if not guild:
-            return []
-
-        members = []
-        for member in guild.members:
-            # Skip bots
-            if member.bot:
-                continue
-
-            # Get member status
-            status = str(member.status)
-
-            # Get member roles (excluding @everyone)
-            roles = []
-            for role in member.roles:
-                if role.name != "@everyone":
-                    roles.append(
-                        {
-                            "id": str(role.id),
-                            "name": role.name,
-                            "color": (
-                                f"#{role.color.value:06x}"
-                                if role.color.value
-                                else "#99aab5"
-                            ),
-                        }
-                    )
-
-            members.append(
-                {
-                    "id": str(member.id),
-                    "name": str(member),
-                    "display_name": member.display_name,
-                    "avatar": (
-                        str(member.display_avatar.url)
-                        if member.display_avatar
-                        else None
-                    ),
-                    "status": status,
-                    "roles": roles,
-                }
-            )
-
-        return members
-    except Exception as e:
-        print(f"Error getting guild members: {e}")
-        return []
-
-
-def get_guild_roles_from_bot():
-    """Get guild roles from bot instance"""
-    try:
-        from api.main import bot_instance
-        from config.settings import GUILD_ID
-
-        bot = bot_instance
-        if not bot or not bot.is_ready():
-            return []
-
-        guild = bot.get_guild(int(GUILD_ID))
-        if not guild:
-            return []
-
-        roles = []
-        for role in guild.roles:
-            # Skip @everyone role
-            if role.name == "@everyone":
-                continue
-
-            # Count members with this role
-            member_count = sum(1 for member in guild.members if role in member.roles)
-
-            roles.append(
-                {
-                    "id": str(role.id),
-                    "name": role.name,
-                    "color": (
-                        f"#{role.color.value:06x}" if role.color.value else "#99aab5"
-                    ),
-                    "position": role.position,
-                    "mentionable": role.mentionable,
-                    "hoist": role.hoist,
-                    "member_count": member_count,
-                }
-            )
-
-        # Sort by position (highest first)
-        roles.sort(key=lambda x: x["position"], reverse=True)
-
-        return roles
-    except Exception as e:
-        print(f"Error getting guild roles: {e}")
-        return []
+def read_members_page(search, page, per_page):
+    """One page of members plus all roles from the member index (run on the bot loop)"""
+    if not member_index.ready:
+        return [], 0, []
+    members, total = member_index.page(search, page, per_page)
+    return members, total, member_index.roles()
 
 
 @router.get("/", response_model=MembersResponse)
@@ -296,27 +200,13 @@ async def get_members(
 ):
     """Get all members and roles with filtering and pagination"""
     try:
-        members = get_guild_members_from_bot()
-        roles = get_guild_roles_from_bot()
-
-        # Filter by search if provided
-        if search:
-            search_lower = search.lower()
-            members = [
-                m
-                for m in members
-                if search_lower in m.get("name", "").lower()
-                or search_lower in str(m.get("id", "")).lower()
-            ]
-
-        # Calculate pagination for members
-        total_members = len(members)
+        # Read on the bot loop, where the gateway events update the index
+        paginated_members, total_members, roles = await call_on_bot(
+            read_members_page, search, page, per_page
+        )
         total_pages = (
             (total_members + per_page - 1) // per_page if total_members > 0 else 0
         )
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_members = members[start_idx:end_idx]
 
         return MembersResponse(
             members=[MemberItem(**m) for m in paginated_members],
@@ -344,15 +234,9 @@ async def add_role(body: AddRoleRequest, authorization: str = Header(None)):
         f"[DEBUG] add_role endpoint called: user_id={body.user_id}, role_id={body.role_id}"
     )
 
-    from api.main import bot_instance
-    import asyncio
-
     # Run the helper function in the bot's event loop
     try:
-        future = asyncio.run_coroutine_threadsafe(
-            bot_add_role_to_member(body.user_id, body.role_id), bot_instance.loop
-        )
-        result = future.result(timeout=10)
+        result = await run_on_bot(bot_add_role_to_member(body.user_id, body.role_id))
         print(f"[DEBUG] add_role result: {result}")
 
         if result["success"]:
@@ -373,15 +257,11 @@ async def remove_role(body: RemoveRoleRequest, authorization: str = Header(None)
         f"[DEBUG] remove_role endpoint called: user_id={body.user_id}, role_id={body.role_id}"
     )
 
-    from api.main import bot_instance
-    import asyncio
-
     # Run the helper function in the bot's event loop
     try:
-        future = asyncio.run_coroutine_threadsafe(
-            bot_remove_role_from_member(body.user_id, body.role_id), bot_instance.loop
+        result = await run_on_bot(
+            bot_remove_role_from_member(body.user_id, body.role_id)
         )
-        result = future.result(timeout=10)
         print(f"[DEBUG] remove_role result: {result}")
 
         if result["success"]:
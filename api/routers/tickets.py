@@ -1,12 +1,16 @@
 """Tickets endpoints"""
 
+import sqlite3
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from typing import List, Optional
 from api.routers.auth import get_current_user, User
-import os
-import sqlite3
-from datetime import datetime
+from api.helpers.bot_bridge import call_on_bot
+from api.helpers.pagination import encode_cursor, decode_cursor, escape_like
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB, TRANSCRIPTS_DB
+from cogs.helpers.ticket_search import search_ticket_messages
+from cogs.helpers.ticket_analytics import read_ticket_sla
 
 router = APIRouter()
 
@@ -19,7 +23,7 @@ def get_bot_instance():
 
 
 def get_discord_usernames_bulk(user_ids):
-    """Get Discord usernames for multiple user IDs"""
+    """Get Discord usernames for multiple user IDs (run on the bot loop)"""
     bot = get_bot_instance()
 
     if not bot or not bot.is_ready():
@@ -55,165 +59,167 @@ class TicketStats(BaseModel):
     closed: int
 
 
+class TicketSearchResult(BaseModel):
+    ticket_id: int
+    service: str
+    ticket_type: Optional[str] = None
+    message_id: str
+    author_name: Optional[str] = None
+    created_at: int
+    snippet: str
+    score: float
+
+
+class TicketSearchResponse(BaseModel):
+    results: List[TicketSearchResult]
+    page: int
+    per_page: int
+
+
+class SlaFigure(BaseModel):
+    key: str
+    name: Optional[str] = None
+    metric: str
+    count: int
+    p50: int
+    p90: int
+    average: float
+
+
+class SlaDay(BaseModel):
+    day: str
+    metric: str
+    count: int
+    p50: int
+    p90: int
+
+
+class TicketAnalyticsResponse(BaseModel):
+    since: str
+    by_type: List[SlaFigure]
+    by_helper: List[SlaFigure]
+    daily: List[SlaDay]
+
+
 class TicketsResponse(BaseModel):
     tickets: List[TicketItem]
     stats: TicketStats
     total_pages: int
+    next_cursor: Optional[str] = None
 
 
-def get_tickets_db_path():
-    """Get the path to the tickets database"""
-    db_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-        "databases",
-        "ticket_system.db",
-    )
-    return db_path if os.path.exists(db_path) else None
+def get_tickets_db():
+    """Get the shared tickets database, or None if it has not been created yet"""
+    db = get_db(TICKET_SYSTEM_DB)
+    return db if db.exists() else None
 
 
 @router.get("/", response_model=TicketsResponse)
 async def get_tickets(
     status: str = Query("all"),
     type: str = Query("all"),
-    page: int = Query(1),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=100),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
 ):
-    """Get all tickets with filtering and pagination"""
-    db_path = get_tickets_db_path()
+    """Get all tickets with filtering and pagination
 
-    if not db_path:
+    Pass the returned next_cursor as cursor to fetch the following page
+    without an OFFSET scan (page is ignored when a cursor is given).
+    """
+    db = get_tickets_db()
+
+    if not db:
         return TicketsResponse(
             tickets=[], stats=TicketStats(total=0, open=0, closed=0), total_pages=0
         )
 
+    after = decode_cursor(cursor, int, int) if cursor else None
+
+    # Filters shared by the stats and the page query
+    conditions = []
+    params = []
+    if type in ["plex", "tv"]:
+        conditions.append("service = ?")
+        params.append(type)
+    if status in ["open", "closed"]:
+        conditions.append("closed = ?")
+        params.append(1 if status == "closed" else 0)
+    if search:
+        pattern = f"%{escape_like(search)}%"
+        conditions.append(
+            "(CAST(ticket_id AS TEXT) LIKE ? ESCAPE '\\'"
+            " OR CAST(member_id AS TEXT) LIKE ? ESCAPE '\\'"
+            " OR type LIKE ? ESCAPE '\\')"
+        )
+        params.extend([pattern, pattern, pattern])
+
+    def _query(conn):
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        counts = dict(
+            conn.execute(
+                f"SELECT closed, COUNT(*) FROM tickets {where} GROUP BY closed",
+                params,
+            ).fetchall()
+        )
+
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if after:
+            # Keyset: continue strictly after the last (opened, id) returned
+            page_conditions.append("(opened < ? OR (opened = ? AND id < ?))")
+            page_params.extend([after[0], after[0], after[1]])
+            offset = 0
+        else:
+            offset = (page - 1) * per_page
+        page_where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+
+        rows = conn.execute(
+            f"""
+            SELECT id, ticket_id, member_id, type, opened,
+                   CASE WHEN closed = 1 THEN 'closed' ELSE 'open' END as status,
+                   datetime(opened, 'unixepoch') as created_at
+            FROM tickets
+            {page_where}
+            ORDER BY opened DESC, id DESC
+            LIMIT ? OFFSET ?
+        """,
+            (*page_params, per_page, offset),
+        ).fetchall()
+        return counts, rows
+
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        all_tickets = []
-
-        # Query plex tickets if type is 'all' or 'plex'
-        if type in ["all", "plex"]:
-            if status == "all":
-                cursor.execute(
-                    """
-                    SELECT ticket_id, member_id, channel_id, type,
-                           CASE WHEN closed = 1 THEN 'closed' ELSE 'open' END as status,
-                           datetime(opened, 'unixepoch') as created_at
-                    FROM plex_ticket_data
-                    ORDER BY opened DESC
-                """
-                )
-            else:
-                closed_value = 1 if status == "closed" else 0
-                cursor.execute(
-                    """
-                    SELECT ticket_id, member_id, channel_id, type,
-                           CASE WHEN closed = 1 THEN 'closed' ELSE 'open' END as status,
-                           datetime(opened, 'unixepoch') as created_at
-                    FROM plex_ticket_data
-                    WHERE closed = ?
-                    ORDER BY opened DESC
-                """,
-                    (closed_value,),
-                )
-
-            for row in cursor.fetchall():
-                all_tickets.append(
-                    {
-                        "id": row["ticket_id"],
-                        "user_id": str(row["member_id"]),
-                        "channel_id": str(row["channel_id"]),
-                        "type": row["type"] or "unknown",
-                        "ticket_type": "plex",
-                        "status": row["status"],
-                        "created_at": row["created_at"],
-                    }
-                )
-
-        # Query TV tickets if type is 'all' or 'tv'
-        if type in ["all", "tv"]:
-            if status == "all":
-                cursor.execute(
-                    """
-                    SELECT ticket_id, member_id, channel_id, type,
-                           CASE WHEN closed = 1 THEN 'closed' ELSE 'open' END as status,
-                           datetime(opened, 'unixepoch') as created_at
-                    FROM tv_ticket_data
-                    ORDER BY opened DESC
-                """
-                )
-            else:
-                closed_value = 1 if status == "closed" else 0
-                cursor.execute(
-                    """
-                    SELECT ticket_id, member_id, channel_id, type,
-                           CASE WHEN closed = 1 THEN 'closed' ELSE 'open' END as status,
-                           datetime(opened, 'unixepoch') as created_at
-                    FROM tv_ticket_data
-                    WHERE closed = ?
-                    ORDER BY opened DESC
-                """,
-                    (closed_value,),
-                )
-
-            for row in cursor.fetchall():
-                all_tickets.append(
-                    {
-                        "id": row["ticket_id"],
-                        "user_id": str(row["member_id"]),
-                        "channel_id": str(row["channel_id"]),
-                        "type": row["type"] or "unknown",
-                        "ticket_type": "tv",
-                        "status": row["status"],
-                        "created_at": row["created_at"],
-                    }
-                )
-
-        # Sort all tickets by created_at DESC
-        all_tickets.sort(key=lambda x: x["created_at"], reverse=True)
-
-        # Apply search filter
-        if search:
-            search_lower = search.lower()
-            all_tickets = [
-                t
-                for t in all_tickets
-                if search_lower in str(t["id"]).lower()
-                or search_lower in t["user_id"].lower()
-                or search_lower in t["type"].lower()
-            ]
-
-        # Calculate stats (from all tickets before pagination)
-        open_count = sum(1 for t in all_tickets if t["status"] == "open")
-        closed_count = sum(1 for t in all_tickets if t["status"] == "closed")
-        total = len(all_tickets)
-
-        # Pagination
-        per_page = 10
-        offset = (page - 1) * per_page
-        paginated_tickets = all_tickets[offset : offset + per_page]
-
-        # Get Discord usernames for paginated tickets
-        user_ids = [t["user_id"] for t in paginated_tickets]
-        usernames = get_discord_usernames_bulk(user_ids)
+        counts, rows = await db.run(_query)
+
+        open_count = counts.get(0, 0)
+        closed_count = counts.get(1, 0)
+        total = open_count + closed_count
+
+        # Get Discord usernames for the page
+        user_ids = [str(row["member_id"]) for row in rows]
+        usernames = await call_on_bot(get_discord_usernames_bulk, user_ids)
 
         # Convert to TicketItem models with real usernames
         tickets = [
             TicketItem(
-                id=t["id"],
-                user_id=t["user_id"],
-                username=usernames.get(t["user_id"], f"User#{t['user_id']}"),
-                type=t["type"],
-                status=t["status"],
-                created_at=t["created_at"],
+                id=row["ticket_id"],
+                user_id=str(row["member_id"]),
+                username=usernames.get(
+                    str(row["member_id"]), f"User#{row['member_id']}"
+                ),
+                type=row["type"] or "unknown",
+                status=row["status"],
+                created_at=row["created_at"],
             )
-            for t in paginated_tickets
+            for row in rows
         ]
 
-        conn.close()
+        next_cursor = None
+        if len(rows) == per_page:
+            last = rows[-1]
+            next_cursor = encode_cursor(last["opened"], last["id"])
 
         total_pages = (total + per_page - 1) // per_page if total > 0 else 0
 
@@ -221,6 +227,7 @@ async def get_tickets(
             tickets=tickets,
             stats=TicketStats(total=total, open=open_count, closed=closed_count),
             total_pages=total_pages,
+            next_cursor=next_cursor,
         )
 
     except Exception as e:
@@ -233,70 +240,127 @@ async def get_tickets(
         )
 
 
+@router.get("/search", response_model=TicketSearchResponse)
+async def search_tickets(
+    q: str = Query(..., min_length=1),
+    type: str = Query("all"),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+):
+    """Search the messages of closed tickets, best matches first
+
+    Snippets are HTML-escaped with the matched terms wrapped in <mark>.
+    """
+    db = get_tickets_db()
+    if not db:
+        return TicketSearchResponse(results=[], page=page, per_page=per_page)
+
+    try:
+        rows = await db.run(
+            search_ticket_messages,
+            q,
+            type if type in ["plex", "tv"] else None,
+            per_page,
+            (page - 1) * per_page,
+        )
+    except sqlite3.OperationalError as e:
+        # e.g. a query made only of FTS5 operators
+        print(f"Error searching tickets: {e}")
+        rows = []
+
+    results = [
+        TicketSearchResult(**{**row, "message_id": str(row["message_id"])})
+        for row in rows
+    ]
+    return TicketSearchResponse(results=results, page=page, per_page=per_page)
+
+
+@router.get("/analytics", response_model=TicketAnalyticsResponse)
+async def get_ticket_analytics(
+    days: int = Query(30, ge=1, le=365),
+    type: str = Query("all"),
+    current_user: User = Depends(get_current_user),
+):
+    """Staff response, claim and close times (seconds since a ticket was opened)
+
+    Served from the daily rollups; figures can lag new events by up to
+    SLA_ROLLUP_MINUTES. The '*' type key covers every ticket type.
+    """
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    db = get_tickets_db()
+    if not db:
+        return TicketAnalyticsResponse(since=since, by_type=[], by_helper=[], daily=[])
+
+    try:
+        by_type, by_helper, daily = await db.run(
+            read_ticket_sla, since, type if type in ["plex", "tv"] else None
+        )
+    except sqlite3.OperationalError as e:
+        # Schema older than the SLA migration
+        print(f"Error reading ticket analytics: {e}")
+        return TicketAnalyticsResponse(since=since, by_type=[], by_helper=[], daily=[])
+
+    usernames = await call_on_bot(
+        get_discord_usernames_bulk, {row["key"] for row in by_helper}
+    )
+    return TicketAnalyticsResponse(
+        since=since,
+        by_type=[SlaFigure(**row) for row in by_type],
+        by_helper=[
+            SlaFigure(**row, name=usernames.get(row["key"], f"User#{row['key']}"))
+            for row in by_helper
+        ],
+        daily=[SlaDay(**row) for row in daily],
+    )
+
+
 @router.get("/{ticket_id}")
 async def get_ticket_detail(
     ticket_id: int, current_user: User = Depends(get_current_user)
 ):
     """Get details for a specific ticket"""
-    db_path = get_tickets_db_path()
+    db = get_tickets_db()
 
-    if not db_path:
+    if not db:
         return {"success": False, "message": "Tickets database not found"}
 
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        # Try plex tickets first
-        cursor.execute(
+        # Ticket ids are not unique across services, prefer the open one
+        row = await db.fetchone(
             """
-            SELECT ticket_id, member_id, channel_id, type,
+            SELECT ticket_id, member_id, channel_id, type, service as ticket_type,
                    CASE WHEN closed = 1 THEN 'closed' ELSE 'open' END as status,
                    datetime(opened, 'unixepoch') as created_at,
                    NULL as closed_at,
                    claimed, claimed_by, locked
-            FROM plex_ticket_data
+            FROM tickets
             WHERE ticket_id = ?
+            ORDER BY closed, opened DESC
+            LIMIT 1
         """,
             (ticket_id,),
         )
 
-        row = cursor.fetchone()
-        ticket_type = None
-
-        if row:
-            ticket_type = "plex"
-        else:
-            # Try TV tickets
-            cursor.execute(
-                """
-                SELECT ticket_id, member_id, channel_id, type,
-                       CASE WHEN closed = 1 THEN 'closed' ELSE 'open' END as status,
-                       datetime(opened, 'unixepoch') as created_at,
-                       NULL as closed_at,
-                       claimed, claimed_by, locked
-                FROM tv_ticket_data
-                WHERE ticket_id = ?
-            """,
-                (ticket_id,),
-            )
-            row = cursor.fetchone()
-            if row:
-                ticket_type = "tv"
-
-        conn.close()
-
         if not row:
             return {"success": False, "message": "Ticket not found"}
 
         # Convert row to dict
         ticket = dict(row)
-        ticket["ticket_type"] = ticket_type
         ticket["id"] = ticket.pop("ticket_id")
         ticket["user_id"] = str(ticket.pop("member_id"))
         ticket["channel_id"] = str(ticket["channel_id"])
 
+        # Archived transcript of a closed ticket, if one was stored
+        transcripts_db = get_db(TRANSCRIPTS_DB)
+        if ticket["status"] == "closed" and transcripts_db.exists():
+            archived = await transcripts_db.fetchone(
+                "SELECT id FROM transcripts WHERE service = ? AND channel_id = ?",
+                (ticket["ticket_type"], int(ticket["channel_id"])),
+            )
+            if archived:
+                ticket["transcript_id"] = archived["id"]
+
         # Remove falsy/null values for optional fields
         if not ticket.get("claimed"):
             ticket.pop("claimed", None)
@@ -307,7 +371,7 @@ async def get_ticket_detail(
             ticket.pop("closed_at", None)
 
         # Get Discord username
-        usernames = get_discord_usernames_bulk([ticket["user_id"]])
+        usernames = await call_on_bot(get_discord_usernames_bulk, [ticket["user_id"]])
         ticket["username"] = usernames.get(
             ticket["user_id"], f"User#{ticket['user_id']}"
         )
@@ -323,28 +387,34 @@ async def get_ticket_detail(
 
 @router.post("/{ticket_id}/close")
 async def close_ticket(ticket_id: int, current_user: User = Depends(get_current_user)):
-    """Close a ticket with full transcript creation like Discord"""
-    db_path = get_tickets_db_path()
+    """Queue closing a ticket (transcript, DM, channel delete) on the bot
 
-    if not db_path:
+    Returns a job id at once; progress is published as "ticket_close"
+    messages on /ws/updates and via GET /api/tickets/jobs/{job_id}.
+    Closing a ticket that already has a queued or running job returns
+    that job instead of starting another export.
+    """
+    db = get_tickets_db()
+
+    if not db:
         return {"success": False, "message": "Tickets database not found"}
 
     from api.main import bot_instance
-    from api.helpers.ticket_closer import close_ticket_with_transcript
-    import asyncio
+    from api.helpers.ticket_jobs import ticket_close_jobs
 
     if not bot_instance or not bot_instance.is_ready():
         return {"success": False, "message": "Bot is not ready"}
 
     try:
-        future = asyncio.run_coroutine_threadsafe(
-            close_ticket_with_transcript(
-                ticket_id, db_path, bot_instance, current_user.username
-            ),
-            bot_instance.loop,
+        job, created = ticket_close_jobs.submit(
+            ticket_id, bot_instance, current_user.username
         )
-        result = future.result(timeout=30)
-        return result
+        return {
+            "success": True,
+            "message": "Close queued" if created else "Close already in progress",
+            "job_id": job["id"],
+            "job": job,
+        }
 
     except Exception as e:
         print(f"Error in close_ticket endpoint: {e}")
@@ -354,57 +424,12 @@ async def close_ticket(ticket_id: int, current_user: User = Depends(get_current_
         return {"success": False, "message": str(e)}
 
 
-@router.get("/{ticket_id}", response_model=TicketItem)
-async def get_ticket(ticket_id: int, current_user: User = Depends(get_current_user)):
-    """Get specific ticket"""
-    db_path = get_tickets_db_path()
-
-    if not db_path:
-        return TicketItem(
-            id=ticket_id,
-            user_id="0",
-            username="Unknown",
-            type="general",
-            status="open",
-            created_at=datetime.now().isoformat(),
-        )
-
-    try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM tickets WHERE id = ?", (ticket_id,))
-        row = cursor.fetchone()
-
-        conn.close()
+@router.get("/jobs/{job_id}")
+async def get_close_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Get the state of a ticket close job"""
+    from api.helpers.ticket_jobs import ticket_close_jobs
 
-        if row:
-            return TicketItem(
-                id=row["id"],
-                user_id=str(row["user_id"]),
-                username=row["username"] or "Unknown",
-                type=row["type"] or "general",
-                status=row["status"],
-                created_at=row["created_at"],
-            )
-        else:
-            return TicketItem(
-                id=ticket_id,
-                user_id="0",
-                username="Not Found",
-                type="general",
-                status="open",
-                created_at=datetime.now().isoformat(),
-            )
-
-    except Exception as e:
-        print(f"Error fetching ticket: {e}")
-        return TicketItem(
-            id=ticket_id,
-            user_id="0",
-            username="Error",
-            type="general",
-            status="open",
-            created_at=datetime.now().isoformat(),
-        )
+    job = ticket_close_jobs.get(job_id)
+    if not job:
+        return {"success": False, "message": "Job not found"}
+    return {"success": True, "job": job}
@@ -0,0 +1,188 @@
+"""Archived ticket transcript endpoints"""
+
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel
+from typing import List, Optional
+from api.routers.auth import get_current_user, User
+from api.helpers.pagination import encode_cursor, decode_cursor
+from cogs.helpers.db import get_db, TRANSCRIPTS_DB
+from cogs.helpers.transcript_store import load_transcript_html
+
+router = APIRouter()
+
+
+class TranscriptItem(BaseModel):
+    id: int
+    service: str
+    ticket_id: int
+    member_id: Optional[str] = None
+    closed_by: Optional[str] = None
+    type: Optional[str] = None
+    opened: Optional[int] = None
+    closed_at: int
+    message_count: int
+    participant_count: int
+    size: int
+    stored_size: int
+
+
+class TranscriptsResponse(BaseModel):
+    transcripts: List[TranscriptItem]
+    next_cursor: Optional[str] = None
+
+
+def _to_item(row):
+    item = dict(row)
+    for key in ("member_id", "closed_by"):
+        if item[key] is not None:
+            item[key] = str(item[key])
+    return TranscriptItem(**item)
+
+
+def _parse_range(header, size):
+    """Parse a single "bytes=start-end" range; returns (start, end) inclusive"""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    try:
+        if not start:
+            # Suffix range: the last N bytes
+            length = int(end)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+@router.get("/", response_model=TranscriptsResponse)
+async def get_transcripts(
+    ticket_id: Optional[int] = None,
+    member_id: Optional[int] = None,
+    type: Optional[str] = None,
+    service: Optional[str] = None,
+    since: Optional[str] = Query(None, description="ISO date, closed on or after"),
+    until: Optional[str] = Query(None, description="ISO date, closed before"),
+    per_page: int = Query(25, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """List archived transcripts, newest first"""
+    db = get_db(TRANSCRIPTS_DB)
+    if not db.exists():
+        return TranscriptsResponse(transcripts=[])
+
+    conditions = []
+    params = []
+    if ticket_id is not None:
+        conditions.append("ticket_id = ?")
+        params.append(ticket_id)
+    if member_id is not None:
+        conditions.append("member_id = ?")
+        params.append(member_id)
+    if type:
+        conditions.append("type = ?")
+        params.append(type)
+    if service:
+        conditions.append("service = ?")
+        params.append(service)
+    try:
+        if since:
+            conditions.append("closed_at >= ?")
+            params.append(int(datetime.fromisoformat(since).timestamp()))
+        if until:
+            conditions.append("closed_at < ?")
+            params.append(int(datetime.fromisoformat(until).timestamp()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    if cursor:
+        closed_at, last_id = decode_cursor(cursor, int, int)
+        conditions.append("(closed_at < ? OR (closed_at = ? AND id < ?))")
+        params.extend([closed_at, closed_at, last_id])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = await db.fetchall(
+        f"""
+        SELECT id, service, ticket_id, member_id, closed_by, type, opened, closed_at,
+               message_count, participant_count, size, stored_size
+        FROM transcripts
+        {where}
+        ORDER BY closed_at DESC, id DESC
+        LIMIT ?
+    """,
+        (*params, per_page + 1),
+    )
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1]["closed_at"], rows[-1]["id"])
+
+    return TranscriptsResponse(
+        transcripts=[_to_item(row) for row in rows], next_cursor=next_cursor
+    )
+
+
+@router.get("/{transcript_id}")
+async def get_transcript(
+    transcript_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    """Serve an archived transcript as HTML (supports ETag and byte ranges)"""
+    db = get_db(TRANSCRIPTS_DB)
+    row = None
+    if db.exists():
+        row = await db.fetchone(
+            "SELECT etag, ticket_id, service FROM transcripts WHERE id = ?",
+            (transcript_id,),
+        )
+    if not row:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+
+    etag = f'"{row["etag"]}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Stored transcripts never change for a given ETag
+        "Cache-Control": "private, max-age=86400",
+        "Content-Disposition": f'inline; filename="transcript-{row["service"]}-{row["ticket_id"]}.html"',
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        html = await asyncio.to_thread(load_transcript_html, row["etag"])
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Transcript file missing")
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, len(html))
+        if byte_range is None:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{len(html)}"},
+            )
+        start, end = byte_range
+        return Response(
+            content=html[start : end + 1],
+            status_code=206,
+            media_type="text/html; charset=utf-8",
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{len(html)}"},
+        )
+
+    return Response(
+        content=html, media_type="text/html; charset=utf-8", headers=headers
+    )
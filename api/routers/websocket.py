@@ -1,55 +1,268 @@
-"""WebSocket endpoints for real-time updates"""
+"""WebSocket endpoints for real-time updates
+
+One producer task diffs the dashboard snapshot every tick and fans the
+changes out to the subscribers of each topic as JSON-Patch style operations.
+Every connection has its own bounded send queue, so a stalled client only
+ever delays itself.
+
+Messages sent to clients:
+    {"topic": "bot_status", "type": "snapshot", "data": {...}}  full state
+    {"topic": "bot_status", "type": "patch", "ops": [{"op": "replace", "path": "/latency", "value": "41.2"}]}
+    {"topic": "tickets", "type": "ticket_closed", "data": {...}, "at": 1700000000.0}  event
+
+Events published by the cogs on the bot's event bus are forwarded as they
+happen, with their type and topic from EVENT_TOPICS:
+    tickets: ticket_opened, ticket_closed
+    invites: plex_access_granted, plex_access_revoked
+    kofi: kofi_support
+
+The API publishes its own events without "at":
+    tickets: ticket_close  progress of a web UI close job (id, status, step, progress)
+    invites: invite_added, invite_revoked
+
+Clients choose topics with ?topics=bot_status,tickets (default: all) and can
+send {"subscribe": [...]} / {"unsubscribe": [...]} later.
+"""
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
+from typing import Dict, List, Optional, Set
 import asyncio
 import json
+from cogs.helpers.event_bus import event_bus
 
 router = APIRouter()
 
-# Active WebSocket connections
-active_connections: List[WebSocket] = []
+# Topics clients can subscribe to
+TOPICS = ("bot_status", "tickets", "invites", "kofi")
+
+# Topics with state: dashboard snapshot section diffed for the topic
+STATE_TOPICS = {
+    "bot_status": "bot_status",
+    "tickets": "ticket_stats",
+    "invites": "invite_stats",
+}
+
+# Seconds between state diffs
+PRODUCER_TICK_SECONDS = 2
+
+# Messages queued per connection before its backlog is replaced by a resync
+SEND_QUEUE_SIZE = 256
+
+# Seconds a single send may take before the connection is dropped
+SEND_TIMEOUT_SECONDS = 10
+
+
+def diff_state(old, new, path=""):
+    """JSON-Patch style operations turning old into new (dicts are diffed per key)"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": f"{path}/{key}"})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{key}", "value": value})
+            else:
+                ops.extend(diff_state(old[key], value, f"{path}/{key}"))
+        return ops
+    if old != new:
+        return [{"op": "replace", "path": path or "/", "value": new}]
+    return []
+
+
+class Subscriber:
+    """One websocket connection with its topics and send queue"""
+
+    def __init__(self, websocket: WebSocket, topics: Set[str]):
+        self.websocket = websocket
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.resyncs = 0
+        self.writer: Optional[asyncio.Task] = None
+
+    def offer(self, message: str):
+        """Queue a message without waiting; False if the queue is full"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drain(self):
+        """Drop the queued backlog and return how many messages were dropped"""
+        dropped = 0
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            dropped += 1
+        self.dropped += dropped
+        return dropped
 
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.subscribers: List[Subscriber] = []
+        # Loop the websockets live on (the uvicorn loop), for publish() from other threads
+        self.loop = None
+        # Last state sent per state topic
+        self.state: Dict[str, dict] = {}
+        self._producer: Optional[asyncio.Task] = None
+
+    @property
+    def active_connections(self):
+        return [subscriber.websocket for subscriber in self.subscribers]
 
-    async def connect(self, websocket: WebSocket):
+    def start(self):
+        """Start the producer task on the running loop"""
+        self.loop = asyncio.get_running_loop()
+        if self._producer is None or self._producer.done():
+            self._producer = self.loop.create_task(self._produce())
+            event_bus.subscribe(self._on_event, self.loop)
+
+    async def stop(self):
+        event_bus.unsubscribe(self._on_event)
+        if self._producer:
+            self._producer.cancel()
+            try:
+                await self._producer
+            except asyncio.CancelledError:
+                pass
+            self._producer = None
+
+    async def connect(self, websocket: WebSocket, topics: Set[str]) -> Subscriber:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.loop = asyncio.get_running_loop()
+        subscriber = Subscriber(websocket, set())
+        subscriber.writer = asyncio.create_task(self._write(subscriber))
+        self.subscribers.append(subscriber)
+        self.subscribe(subscriber, topics)
+        return subscriber
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    def disconnect(self, subscriber: Subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        if subscriber.writer:
+            subscriber.writer.cancel()
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    def subscribe(self, subscriber: Subscriber, topics):
+        """Add topics and send their current state"""
+        for topic in set(topics) & set(TOPICS) - subscriber.topics:
+            subscriber.topics.add(topic)
+            if topic in self.state:
+                self._send(subscriber, self._snapshot_message(topic))
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
+    def unsubscribe(self, subscriber: Subscriber, topics):
+        subscriber.topics -= set(topics)
+
+    def _snapshot_message(self, topic):
+        return json.dumps(
+            {"topic": topic, "type": "snapshot", "data": self.state[topic]},
+            default=str,
+        )
+
+    def _send(self, subscriber: Subscriber, message: str):
+        """Queue a message; a full queue is replaced by fresh snapshots"""
+        if subscriber.offer(message):
+            return
+        # Too far behind: the backlog is stale anyway, resync from full state
+        dropped = subscriber.drain()
+        subscriber.resyncs += 1
+        if subscriber.resyncs == 1:
+            print(f"[WS] Client too slow, dropped {dropped} queued updates")
+        for topic in subscriber.topics:
+            if topic in self.state:
+                subscriber.offer(self._snapshot_message(topic))
+
+    def _on_event(self, event):
+        """Forward a bot event to its topic (runs on this loop)"""
+        if self.subscribers:
+            self._fanout(event.topic, json.dumps(event.as_message(), default=str))
+
+    def _fanout(self, topic: str, message: str):
+        for subscriber in list(self.subscribers):
+            if topic in subscriber.topics:
+                self._send(subscriber, message)
+
+    async def _write(self, subscriber: Subscriber):
+        """Send a connection's queue in order (one writer per connection)"""
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                await asyncio.wait_for(
+                    subscriber.websocket.send_text(message), SEND_TIMEOUT_SECONDS
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Stalled or closed connection
+            self.disconnect(subscriber)
             try:
-                await connection.send_text(message)
-            except:
+                await subscriber.websocket.close(code=1011)
+            except Exception:
                 pass
 
+    async def _produce(self):
+        """Diff the snapshot state of every state topic once per tick"""
+        from api.routers.dashboard import dashboard_snapshot
+
+        while True:
+            for topic, section in STATE_TOPICS.items():
+                try:
+                    value = await dashboard_snapshot.get(section)
+                except Exception as e:
+                    print(f"[WS] Could not read {section}: {e}")
+                    continue
+                if value is None or dashboard_snapshot.age(section) is None:
+                    # Not computed yet: only a placeholder default
+                    continue
+                new = value.dict()
+                old = self.state.get(topic)
+                self.state[topic] = new
+                if old is None:
+                    message = self._snapshot_message(topic)
+                else:
+                    ops = diff_state(old, new)
+                    if not ops:
+                        continue
+                    message = json.dumps(
+                        {"topic": topic, "type": "patch", "ops": ops}, default=str
+                    )
+                self._fanout(topic, message)
+            await asyncio.sleep(PRODUCER_TICK_SECONDS)
+
+    async def broadcast(self, message: str):
+        """Send a raw message to every connection"""
+        for subscriber in list(self.subscribers):
+            self._send(subscriber, message)
+
+    def publish(self, topic: str, message_type: str, data):
+        """Send an event to a topic's subscribers from any thread or loop (e.g. the bot loop)"""
+        if not self.loop or not self.subscribers or self.loop.is_closed():
+            return
+        message = json.dumps(
+            {"topic": topic, "type": message_type, "data": data}, default=str
+        )
+        self.loop.call_soon_threadsafe(self._fanout, topic, message)
+
 
 manager = ConnectionManager()
 
 
 @router.websocket("/updates")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, topics: Optional[str] = None):
     """WebSocket endpoint for real-time bot updates"""
-    await manager.connect(websocket)
+    wanted = set(topics.split(",")) if topics else set(TOPICS)
+    subscriber = await manager.connect(websocket, wanted)
     try:
         while True:
-            # Keep connection alive and send periodic updates
-            await asyncio.sleep(5)
-
-            # Send bot status update
-            from api.routers.dashboard import get_bot_status
-
-            status = get_bot_status()
-            await websocket.send_json({"type": "bot_status", "data": status.dict()})
-
+            try:
+                request = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            if not isinstance(request, dict):
+                continue
+            manager.subscribe(subscriber, request.get("subscribe") or [])
+            manager.unsubscribe(subscriber, request.get("unsubscribe") or [])
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        manager.disconnect(subscriber)
@@ -0,0 +1,173 @@
+"""
+Members page benchmark: full serialization per request vs the member index
+
+Builds a fake guild with MEMBERS members and ROLES roles, times what the
+members endpoint used to do per request (serialize every member, count
+every role's members) against member_index page reads, searches and
+incremental updates, and checks that both give the same counts and matches.
+
+Usage: python benchmarks/member_index.py [--members 20000] [--roles 150]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import string
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cogs.helpers.member_index import MemberIndex, role_color
+
+
+class FakeRole(SimpleNamespace):
+    def is_default(self):
+        return self.position == 0
+
+    def __hash__(self):
+        return self.id
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+
+class FakeMember(SimpleNamespace):
+    def __str__(self):
+        return self.name
+
+
+def fake_guild(members, roles):
+    rng = random.Random(42)
+    guild = SimpleNamespace(id=1, roles=[], members=[])
+    for position in range(roles + 1):
+        guild.roles.append(
+            FakeRole(
+                id=1000 + position,
+                guild=guild,
+                name="@everyone" if position == 0 else f"role-{position}",
+                color=SimpleNamespace(value=rng.randrange(0xFFFFFF)),
+                position=position,
+                mentionable=False,
+                hoist=False,
+            )
+        )
+    for number in range(members):
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+        guild.members.append(
+            FakeMember(
+                id=10**17 + number,
+                guild=guild,
+                name=name,
+                display_name=name.title() if number % 3 else f"{name}_nick",
+                display_avatar=SimpleNamespace(url=f"https://cdn/{number}.png"),
+                status=rng.choice(["online", "idle", "dnd", "offline"]),
+                roles=[guild.roles[0]] + rng.sample(guild.roles[1:], rng.randint(1, 8)),
+                bot=number % 500 == 0,
+            )
+        )
+    return guild
+
+
+def per_request(guild, search, page, per_page):
+    """What the endpoint did before the index"""
+    members = []
+    for member in guild.members:
+        if member.bot:
+            continue
+        members.append(
+            {
+                "id": str(member.id),
+                "name": str(member),
+                "display_name": member.display_name,
+                "avatar": str(member.display_avatar.url),
+                "status": str(member.status),
+                "roles": [
+                    {"id": str(r.id), "name": r.name, "color": role_color(r)}
+                    for r in member.roles
+                    if r.name != "@everyone"
+                ],
+            }
+        )
+    roles = {
+        role.id: sum(1 for member in guild.members if role in member.roles)
+        for role in guild.roles
+        if not role.is_default()
+    }
+    if search:
+        members = [
+            m
+            for m in members
+            if search in m["name"].lower() or search in m["id"].lower()
+        ]
+    start = (page - 1) * per_page
+    return members[start : start + per_page], len(members), roles
+
+
+def timed(fn, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--members", type=int, default=20000)
+    parser.add_argument("--roles", type=int, default=150)
+    args = parser.parse_args()
+
+    guild = fake_guild(args.members, args.roles)
+    index = MemberIndex()
+    start = time.perf_counter()
+    asyncio.run(index.build(guild))
+    print(
+        f"Built index of {len(index)} members and {len(index.roles())} roles "
+        f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+
+    (_, old_total, old_roles), old_ms = timed(per_request, guild, None, 1, 10)
+    print(f"{'per request, page 1':32} {old_ms:9.1f} ms")
+    for label, search, page in [
+        ("index, page 1", None, 1),
+        ("index, last page", None, len(index) // 10),
+        ("index, search 'ab'", "ab", 1),
+        ("index, search 'abc'", "abc", 1),
+        ("index, search 'abcde'", "abcde", 1),
+    ]:
+        (members, total), ms = timed(index.page, search, page, 10, repeat=20)
+        print(f"{label:32} {ms:9.3f} ms   {total} members")
+    _, ms = timed(index.roles, repeat=20)
+    print(f"{'index, roles with counts':32} {ms:9.3f} ms")
+
+    assert old_total == len(index), "member count differs"
+    assert old_roles == {
+        int(role["id"]): role["member_count"] for role in index.roles()
+    }, "role counts differ"
+    for search in ("ab", "abc", "xyz", "nick", "1000000000000004"):
+        _, old, _ = per_request(guild, search, 1, 10)
+        _, new = index.page(search, 1, 10)
+        # The old filter ignored display names
+        assert new >= old, f"search {search!r} lost matches"
+
+    member = guild.members[1]
+    start = time.perf_counter()
+    for number in range(1000):
+        member.roles = member.roles[:1] + guild.roles[1 + number % 5 : 3 + number % 5]
+        member.display_name = f"renamed{number}"
+        index.upsert_member(member)
+    print(
+        f"{'index, member update':32} "
+        f"{(time.perf_counter() - start) * 1000 / 1000:9.3f} ms"
+    )
+    assert index.page("renamed999")[1] == 1
+    assert index.page("renamed998")[1] == 0
+    index.remove_member(member.id)
+    assert len(index) == old_total - 1
+    print("Index matches the member cache")
+
+
+if __name__ == "__main__":
+    main()
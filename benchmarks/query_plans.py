@@ -0,0 +1,210 @@
+"""
+Query plan benchmark for the ticket and invite schema migrations
+
+Seeds a throwaway database with ROWS tickets per ticket table and ROWS
+invites, prints the query plan and timing of the hot queries, applies the
+schema migrations and prints them again. After the migrations the legacy
+ticket queries run through the compatibility views over the unified
+tickets table, which is also queried directly.
+
+Usage: python benchmarks/query_plans.py [--rows 100000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cogs.helpers.database_init import (
+    create_invites_tables,
+    create_ticket_system_tables,
+    run_migrations,
+    INVITES_MIGRATIONS,
+    TICKET_SYSTEM_MIGRATIONS,
+)
+
+TICKET_QUERIES = [
+    (
+        "close by ticket_id",
+        "SELECT * FROM plex_ticket_data WHERE ticket_id = ?",
+        (4242,),
+    ),
+    (
+        "button handler by channel_id",
+        "SELECT * FROM plex_ticket_data WHERE channel_id = ?",
+        (900000000000004242,),
+    ),
+    (
+        "dashboard open count",
+        "SELECT COUNT(*) FROM plex_ticket_data WHERE closed = 0",
+        (),
+    ),
+    (
+        "open tickets, newest first",
+        "SELECT ticket_id FROM plex_ticket_data WHERE closed = 0 ORDER BY opened DESC LIMIT 10",
+        (),
+    ),
+    (
+        "all tickets, newest first",
+        "SELECT ticket_id FROM plex_ticket_data ORDER BY opened DESC LIMIT 10",
+        (),
+    ),
+]
+
+# Unified tickets table (schema v2 and later)
+UNIFIED_TICKET_QUERIES = [
+    (
+        "close by ticket_id (any service)",
+        "SELECT * FROM tickets WHERE ticket_id = ? ORDER BY closed, opened DESC LIMIT 1",
+        (4242,),
+    ),
+    (
+        "button handler by channel_id",
+        "SELECT * FROM tickets WHERE channel_id = ? AND service = ?",
+        (900000000000004242, "plex"),
+    ),
+    (
+        "dashboard total/open count",
+        "SELECT COUNT(*), SUM(closed = 0) FROM tickets",
+        (),
+    ),
+    (
+        "all services, newest first",
+        "SELECT ticket_id FROM tickets ORDER BY opened DESC LIMIT 10",
+        (),
+    ),
+    (
+        "open tv tickets, newest first",
+        "SELECT ticket_id FROM tickets WHERE service = 'tv' AND closed = 0 ORDER BY opened DESC LIMIT 10",
+        (),
+    ),
+]
+
+INVITE_QUERIES = [
+    (
+        "active invite count",
+        "SELECT COUNT(*) FROM invites WHERE status = 'active'",
+        (),
+    ),
+    (
+        "invites, newest first",
+        "SELECT id FROM invites ORDER BY created_at DESC LIMIT 10",
+        (),
+    ),
+    (
+        "revoke by discord_user",
+        "SELECT id FROM invites WHERE discord_user = ? AND status = 'active'",
+        ("user4242",),
+    ),
+]
+
+
+def seed_tickets(conn, rows):
+    """Insert rows tickets into each ticket data table"""
+    now = int(time.time())
+    for table_prefix in ("plex", "tv"):
+        conn.executemany(
+            f"""
+            INSERT INTO {table_prefix}_ticket_data (guild_id, member_id, ticket_id, channel_id, closed, locked, claimed, claimed_by, type, created_by, opened)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            (
+                (
+                    1,
+                    random.randint(1, 20000),
+                    i,
+                    900000000000000000 + i,
+                    random.random() < 0.98,
+                    False,
+                    False,
+                    None,
+                    random.choice(["help", "invite", "movie"]),
+                    random.randint(1, 20000),
+                    now - random.randint(0, 3 * 365 * 86400),
+                )
+                for i in range(rows)
+            ),
+        )
+    conn.commit()
+
+
+def seed_invites(conn, rows):
+    """Insert rows invites"""
+    statuses = ["active", "expired", "revoked", "removed"]
+    conn.executemany(
+        """
+        INSERT INTO invites (email, discord_user, status, created_at, expires_at)
+        VALUES (?, ?, ?, datetime('now', ?), NULL)
+    """,
+        (
+            (
+                f"user{i}@example.com",
+                f"user{i}",
+                random.choice(statuses),
+                f"-{random.randint(0, 3 * 365 * 86400)} seconds",
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+
+
+def report(conn, queries, label):
+    """Print the query plan and average runtime of each query"""
+    print(f"\n=== {label} ===")
+    for name, sql, params in queries:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        detail = " | ".join(row[3] for row in plan)
+
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            conn.execute(sql, params).fetchall()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / runs
+
+        print(f"{name:32} {elapsed_ms:9.3f} ms   {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        tickets = sqlite3.connect(os.path.join(tmp, "ticket_system.db"))
+        create_ticket_system_tables(tickets)
+        seed_tickets(tickets, args.rows)
+
+        invites = sqlite3.connect(os.path.join(tmp, "invites.db"))
+        create_invites_tables(invites)
+        seed_invites(invites, args.rows)
+
+        print(f"Seeded {args.rows} rows per ticket table and {args.rows} invites")
+        report(tickets, TICKET_QUERIES, "ticket_system.db before migrations")
+        report(invites, INVITE_QUERIES, "invites.db before migrations")
+
+        version = run_migrations(tickets, TICKET_SYSTEM_MIGRATIONS)
+        tickets.execute("ANALYZE")
+        report(tickets, TICKET_QUERIES, f"ticket_system.db at schema v{version}")
+        report(
+            tickets,
+            UNIFIED_TICKET_QUERIES,
+            f"ticket_system.db tickets table at schema v{version}",
+        )
+
+        version = run_migrations(invites, INVITES_MIGRATIONS)
+        invites.execute("ANALYZE")
+        report(invites, INVITE_QUERIES, f"invites.db at schema v{version}")
+
+        tickets.close()
+        invites.close()
+
+
+if __name__ == "__main__":
+    main()
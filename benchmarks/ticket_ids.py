@@ -0,0 +1,133 @@
+"""
+Concurrency check for the per-guild ticket number sequence
+
+Seeds legacy plex/tv ticket tables with colliding random ticket numbers,
+applies the schema migrations (which renumber the collisions), then opens
+TICKETS tickets concurrently through the pooled database layer the way the
+ticket buttons do: allocate a number, then save the ticket. Verifies that
+no number is handed out twice and that every guild's numbers are gapless.
+
+Usage: python benchmarks/ticket_ids.py [--tickets 5000] [--guilds 3]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cogs.helpers.database_init import (
+    create_ticket_system_tables,
+    run_migrations,
+    TICKET_SYSTEM_MIGRATIONS,
+)
+from cogs.helpers.db import Database, enable_wal
+from cogs.helpers.ticket_ids import allocate_ticket_id
+
+
+def seed_legacy_tickets(conn, rows, guilds):
+    """Insert tickets with random 5-digit numbers, like the old allocator"""
+    now = int(time.time())
+    for table_prefix in ("plex", "tv"):
+        conn.executemany(
+            f"""
+            INSERT INTO {table_prefix}_ticket_data (guild_id, member_id, ticket_id, channel_id, closed, locked, claimed, claimed_by, type, created_by, opened)
+            VALUES (?, ?, ?, ?, 1, 0, 0, NULL, 'help', ?, ?)
+        """,
+            (
+                (
+                    random.randint(1, guilds),
+                    i,
+                    random.randint(10000, 99999),
+                    (800000000000000000 if table_prefix == "plex" else 0)
+                    + 900000000000000000
+                    + i,
+                    i,
+                    now - random.randint(0, 365 * 86400),
+                )
+                for i in range(rows)
+            ),
+        )
+    conn.commit()
+
+
+def save_ticket(conn, guild_id, ticket_id, channel_id):
+    conn.execute(
+        """
+        INSERT INTO tickets (service, guild_id, member_id, ticket_id, channel_id, type, created_by, opened)
+        VALUES ('plex', ?, 1, ?, ?, 'help', 1, strftime('%s', 'now'))
+    """,
+        (guild_id, ticket_id, channel_id),
+    )
+
+
+async def open_tickets(db, count, guilds):
+    """Open count tickets at once, spread over guilds"""
+
+    async def open_one(i):
+        guild_id = i % guilds + 1
+        ticket_id = await db.run(allocate_ticket_id, guild_id)
+        await db.run(save_ticket, guild_id, ticket_id, 700000000000000000 + i)
+        return guild_id, ticket_id
+
+    return await asyncio.gather(*(open_one(i) for i in range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--guilds", type=int, default=3)
+    parser.add_argument("--legacy", type=int, default=20000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ticket_system.db")
+        conn = sqlite3.connect(path)
+        enable_wal(conn)
+        create_ticket_system_tables(conn)
+        seed_legacy_tickets(conn, args.legacy, args.guilds)
+
+        start = time.perf_counter()
+        version = run_migrations(conn, TICKET_SYSTEM_MIGRATIONS)
+        elapsed = time.perf_counter() - start
+        duplicates = conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM tickets GROUP BY guild_id, ticket_id HAVING COUNT(*) > 1)"
+        ).fetchone()[0]
+        print(
+            f"Migrated {2 * args.legacy} legacy tickets to schema v{version} in {elapsed:.2f}s, "
+            f"{duplicates} duplicate numbers left"
+        )
+        conn.close()
+
+        db = Database("ticket_system")
+        db.path = path
+        start = time.perf_counter()
+        opened = asyncio.run(open_tickets(db, args.tickets, args.guilds))
+        elapsed = time.perf_counter() - start
+        print(
+            f"Opened {args.tickets} tickets concurrently in {elapsed:.2f}s "
+            f"({args.tickets / elapsed:.0f} tickets/s)"
+        )
+
+        assert len(set(opened)) == len(opened), "ticket number handed out twice"
+        for guild_id in range(1, args.guilds + 1):
+            numbers = sorted(n for g, n in opened if g == guild_id)
+            assert numbers == list(
+                range(numbers[0], numbers[0] + len(numbers))
+            ), f"gap in guild {guild_id}"
+        total = db.fetchone_sync(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM tickets GROUP BY guild_id, ticket_id HAVING COUNT(*) > 1)"
+        )[0]
+        assert total == 0, "duplicate ticket numbers in the database"
+        print("No duplicate or skipped ticket numbers")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
+import asyncio
 import codecs
+import contextlib
 import sys
 import discord
 import os
 import logging
 import threading
 from datetime import datetime, timezone
-from discord.ext import commands
+from discord.ext import commands, tasks
 from config.settings import (
     BOT_TOKEN,
     GUILD_ID,
@@ -39,12 +41,26 @@ from cogs.helpers.database_init import (
     init_invites_db,
     init_ticket_system_db,
     init_plex_clients_db,
+    init_transcripts_db,
 )
+from cogs.helpers.db import checkpoint_all, close_all
+from cogs.helpers.ticket_state import ticket_state
+
+# How often the WAL of every bot database is folded back into the main file
+WAL_CHECKPOINT_MINUTES = 5
+
+# Seconds the embedded web UI gets to finish requests on shutdown
+WEB_UI_SHUTDOWN_SECONDS = 10
 
 # Web UI imports (only if enabled)
+WEB_UI_ON_BOT_LOOP = False
 try:
+    from config import settings
     from config.settings import WEB_ENABLED, WEB_HOST, WEB_PORT, WEB_VERBOSE_LOGGING
 
+    # Opt-in: serve the web UI from the bot's event loop instead of a thread
+    WEB_UI_ON_BOT_LOOP = getattr(settings, "WEB_UI_ON_BOT_LOOP", False)
+
     if WEB_ENABLED:
         from api.main import app, set_bot_instance
 
@@ -92,6 +108,8 @@ class MyBot(commands.Bot):
 
         self.synced_guilds = set()  # Track synced guilds
         self.start_time = None  # Track bot start time
+        self.web_server = None  # Uvicorn server when embedded in the bot loop
+        self.web_server_task = None
 
     async def get_channel_name(self, guild, channel_id, is_category=False):
         """Get channel or category name from ID and store in global map."""
@@ -242,6 +260,51 @@ class MyBot(commands.Bot):
         # Note: We only sync globally to avoid duplicates
         # Commands will be available both in guilds and DMs
 
+        # Keep the SQLite WAL files from growing unbounded
+        self.wal_checkpoint.start()
+
+        if WEB_UI_AVAILABLE and WEB_UI_ON_BOT_LOOP:
+            self.start_embedded_web_ui()
+
+    def start_embedded_web_ui(self):
+        """Serve the web UI as a task on the bot's loop (WEB_UI_ON_BOT_LOOP)."""
+        set_bot_instance(self)
+        self.web_server = create_web_server(embedded=True)
+        self.web_server_task = asyncio.create_task(self.web_server.serve())
+        logger.info(
+            f"Starting Uvicorn server on http://{WEB_HOST}:{WEB_PORT} (bot event loop)"
+        )
+
+    async def stop_embedded_web_ui(self):
+        """Let the embedded web UI finish open requests, then stop it."""
+        if not self.web_server_task:
+            return
+        self.web_server.should_exit = True
+        try:
+            await asyncio.wait_for(self.web_server_task, WEB_UI_SHUTDOWN_SECONDS)
+        except Exception as e:
+            logger.error(f"Web UI did not stop cleanly: {e}")
+        self.web_server_task = None
+
+    @tasks.loop(minutes=WAL_CHECKPOINT_MINUTES)
+    async def wal_checkpoint(self):
+        """Periodically checkpoint the WAL of every bot database."""
+        results = await checkpoint_all()
+        logger.debug(f"WAL checkpoint results: {results}")
+
+    async def close(self):
+        """Flush the WAL and release pooled database connections on shutdown."""
+        await self.stop_embedded_web_ui()
+        self.wal_checkpoint.cancel()
+        try:
+            # Ticket state changes not written yet
+            await ticket_state.flush()
+            await checkpoint_all("TRUNCATE")
+        except Exception as e:
+            logger.error(f"Final WAL checkpoint failed: {e}")
+        close_all()
+        await super().close()
+
     async def on_guild_join(self, guild):
         """Handle bot joining a new guild."""
         if guild.id in self.synced_guilds:
@@ -364,6 +427,35 @@ async def list_cogs(ctx):
     await ctx.send(f"Loaded cogs: {', '.join(cogs)}")
 
 
+def create_web_server(embedded=False):
+    """Uvicorn server for the web UI.
+
+    The embedded server runs on the bot's loop and leaves SIGINT/SIGTERM to
+    discord.py; MyBot.close() stops it.
+    """
+    import uvicorn
+
+    class EmbeddedServer(uvicorn.Server):
+        @contextlib.contextmanager
+        def capture_signals(self):
+            yield
+
+        def install_signal_handlers(self):
+            # uvicorn < 0.29
+            pass
+
+    logger.info(f"Creating Uvicorn server config...")
+    config = uvicorn.Config(
+        app,
+        host=WEB_HOST,
+        port=WEB_PORT,
+        log_level="info" if WEB_VERBOSE_LOGGING else "error",
+        loop="asyncio",
+        access_log=WEB_VERBOSE_LOGGING,
+    )
+    return EmbeddedServer(config) if embedded else uvicorn.Server(config)
+
+
 def start_web_ui(bot_instance):
     """Start the FastAPI web UI in a separate thread."""
     if WEB_UI_AVAILABLE:
@@ -373,24 +465,11 @@ def start_web_ui(bot_instance):
 
             logger.info(f"Starting FastAPI on {WEB_HOST}:{WEB_PORT}")
 
-            # Run Uvicorn with proper thread handling
-            import uvicorn
-            import asyncio
-
             # Create a new event loop for this thread
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
 
-            logger.info(f"Creating Uvicorn server config...")
-            config = uvicorn.Config(
-                app,
-                host=WEB_HOST,
-                port=WEB_PORT,
-                log_level="info" if WEB_VERBOSE_LOGGING else "error",
-                loop="asyncio",
-                access_log=WEB_VERBOSE_LOGGING,
-            )
-            server = uvicorn.Server(config)
+            server = create_web_server()
             logger.info(f"Starting Uvicorn server on http://{WEB_HOST}:{WEB_PORT}")
             loop.run_until_complete(server.serve())
             logger.info(f"Uvicorn server stopped")
@@ -417,6 +496,7 @@ if __name__ == "__main__":
         init_invites_db,
         init_ticket_system_db,
         init_plex_clients_db,
+        init_transcripts_db,
     )
 
     try:
@@ -426,6 +506,8 @@ if __name__ == "__main__":
         logger.info(f"  - {msg2}")
         msg3 = init_plex_clients_db()
         logger.info(f"  - {msg3}")
+        msg4 = init_transcripts_db()
+        logger.info(f"  - {msg4}")
         logger.info("Database initialization completed")
     except Exception as e:
         logger.error(f"Failed to initialize databases: {e}")
@@ -441,8 +523,8 @@ if __name__ == "__main__":
     bot.add_command(list_guilds)
     bot.add_command(list_commands)
 
-    # Start the web UI if enabled and available
-    if WEB_UI_AVAILABLE and WEB_ENABLED:
+    # Start the web UI if enabled and available (embedded mode starts in setup_hook)
+    if WEB_UI_AVAILABLE and WEB_ENABLED and not WEB_UI_ON_BOT_LOOP:
         threading.Thread(target=start_web_ui, args=(bot,), daemon=True).start()
     # Run the bot
     bot.run(BOT_TOKEN)
@@ -5,15 +5,62 @@ Run this once to set up the database structure
 
 import sqlite3
 import os
+from datetime import datetime
+from cogs.helpers.db import enable_wal
+from cogs.helpers.logger import logger
+from cogs.helpers.plex_helper import ensure_friends_table
+from cogs.helpers.plex_jobs import ensure_jobs_table
+from cogs.helpers.ticket_ids import ensure_ticket_sequences, renumber_ticket_collisions
+from cogs.helpers.ticket_analytics import ensure_ticket_analytics_tables
+from cogs.helpers.transcript_store import ensure_transcripts_table
 
 
-def init_invites_db():
-    """Initialize invites database"""
-    db_path = os.path.join("databases", "invites.db")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# Schema migrations
+# Each migration is (version, description, function(conn)). Migrations run in
+# order, once per database file, and the applied version is recorded in the
+# schema_migrations table of that database.
+def run_migrations(conn, migrations):
+    """Apply pending migrations and return the resulting schema version"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """
+    )
+    conn.commit()
 
-    cursor.execute(
+    current = get_schema_version(conn)
+    for version, description, migrate in sorted(migrations, key=lambda m: m[0]):
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN")
+            migrate(conn)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().isoformat()),
+            )
+            conn.commit()
+            current = version
+        except Exception:
+            conn.rollback()
+            raise
+
+    return current
+
+
+def get_schema_version(conn):
+    """Get the highest applied migration version (0 if none)"""
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+
+def create_invites_tables(conn):
+    """Create the base invites tables"""
+    conn.execute(
         """
         CREATE TABLE IF NOT EXISTS invites (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -26,15 +73,98 @@ def init_invites_db():
     """
     )
 
+
+def _invites_v1_indexes(conn):
+    """Index invites by status and creation date"""
+    # Status counts and status-filtered listings
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_invites_status_created ON invites (status, created_at)"
+    )
+    # Newest-first listing without a status filter
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_invites_created ON invites (created_at)"
+    )
+    # Role removal / member leave updates
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_invites_discord_user ON invites (discord_user, status)"
+    )
+
+
+def _invites_v2_search(conn):
+    """Index invite emails and Discord users for substring search"""
+    try:
+        # Trigram FTS5 answers case-insensitive substring searches from the index
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE invites_fts USING fts5(
+                email, discord_user,
+                content='invites', content_rowid='id', tokenize='trigram'
+            )
+        """
+        )
+    except sqlite3.OperationalError as e:
+        # SQLite without FTS5/trigram (< 3.34): index the columns for LIKE/prefix lookups
+        logger.warning(
+            f"[DB] FTS5 trigram search unavailable, using plain indexes: {e}"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_invites_email ON invites (email COLLATE NOCASE)"
+        )
+        return
+
+    conn.execute("INSERT INTO invites_fts (invites_fts) VALUES ('rebuild')")
+
+    # Keep the external-content index in sync with the invites table
+    conn.execute(
+        """
+        CREATE TRIGGER invites_fts_insert AFTER INSERT ON invites BEGIN
+            INSERT INTO invites_fts (rowid, email, discord_user)
+            VALUES (NEW.id, NEW.email, NEW.discord_user);
+        END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER invites_fts_delete AFTER DELETE ON invites BEGIN
+            INSERT INTO invites_fts (invites_fts, rowid, email, discord_user)
+            VALUES ('delete', OLD.id, OLD.email, OLD.discord_user);
+        END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER invites_fts_update AFTER UPDATE OF email, discord_user ON invites BEGIN
+            INSERT INTO invites_fts (invites_fts, rowid, email, discord_user)
+            VALUES ('delete', OLD.id, OLD.email, OLD.discord_user);
+            INSERT INTO invites_fts (rowid, email, discord_user)
+            VALUES (NEW.id, NEW.email, NEW.discord_user);
+        END
+    """
+    )
+
+
+INVITES_MIGRATIONS = [
+    (1, "Add status, created_at and discord_user indexes", _invites_v1_indexes),
+    (2, "Add email/discord_user search index", _invites_v2_search),
+]
+
+
+def init_invites_db():
+    """Initialize invites database"""
+    db_path = os.path.join("databases", "invites.db")
+    conn = sqlite3.connect(db_path)
+    enable_wal(conn)
+
+    create_invites_tables(conn)
     conn.commit()
+    version = run_migrations(conn, INVITES_MIGRATIONS)
+
     conn.close()
-    return "Invites database initialized"
+    return f"Invites database initialized (schema v{version})"
 
 
-def init_ticket_system_db():
-    """Initialize ticket system database"""
-    db_path = os.path.join("databases", "ticket_system.db")
-    conn = sqlite3.connect(db_path)
+def create_ticket_system_tables(conn):
+    """Create the base ticket system tables"""
     cursor = conn.cursor()
 
     # Plex ticket panel
@@ -54,7 +184,7 @@ def init_ticket_system_db():
     """
     )
 
-    # Plex ticket data
+    # Plex ticket data (replaced by a view over tickets in schema v2)
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS plex_ticket_data (
@@ -91,7 +221,7 @@ def init_ticket_system_db():
     """
     )
 
-    # TV ticket data
+    # TV ticket data (replaced by a view over tickets in schema v2)
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS tv_ticket_data (
@@ -111,15 +241,282 @@ def init_ticket_system_db():
     """
     )
 
+
+def _ticket_system_v1_indexes(conn):
+    """Index ticket data by ticket_id, channel_id, closed and opened"""
+    for table_prefix in ("plex", "tv"):
+        table = f"{table_prefix}_ticket_data"
+        # Web UI close / detail lookups
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_ticket_id ON {table} (ticket_id)"
+        )
+        # Button handlers look tickets up by channel only (PK starts with guild_id)
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_channel_id ON {table} (channel_id)"
+        )
+        # Open/closed counts and status-filtered, newest-first listings
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_closed_opened ON {table} (closed, opened)"
+        )
+        # Newest-first listing without a status filter
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_opened ON {table} (opened)"
+        )
+
+
+# Columns of the legacy per-service ticket data tables, in their original order
+TICKET_DATA_COLUMNS = (
+    "guild_id",
+    "member_id",
+    "ticket_id",
+    "channel_id",
+    "closed",
+    "locked",
+    "claimed",
+    "claimed_by",
+    "type",
+    "created_by",
+    "opened",
+)
+
+
+def _ticket_system_v2_unified_tickets(conn):
+    """Move plex/tv ticket data into one tickets table and keep the old names as views"""
+    columns = ", ".join(TICKET_DATA_COLUMNS)
+
+    conn.execute(
+        """
+        CREATE TABLE tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            service TEXT NOT NULL,
+            guild_id INTEGER NOT NULL,
+            member_id INTEGER,
+            ticket_id INTEGER,
+            channel_id INTEGER,
+            closed BOOLEAN NOT NULL DEFAULT 0,
+            locked BOOLEAN NOT NULL DEFAULT 0,
+            claimed BOOLEAN NOT NULL DEFAULT 0,
+            claimed_by INTEGER,
+            type TEXT,
+            created_by INTEGER,
+            opened TIMESTAMP,
+            UNIQUE (guild_id, channel_id)
+        )
+    """
+    )
+    conn.execute("CREATE INDEX idx_tickets_ticket_id ON tickets (ticket_id)")
+    conn.execute("CREATE INDEX idx_tickets_channel_id ON tickets (channel_id)")
+    conn.execute("CREATE INDEX idx_tickets_closed_opened ON tickets (closed, opened)")
+    conn.execute("CREATE INDEX idx_tickets_opened ON tickets (opened)")
+    conn.execute(
+        "CREATE INDEX idx_tickets_service_closed_opened ON tickets (service, closed, opened)"
+    )
+
+    # Move the existing rows of both services, oldest first so ids follow
+    # creation order across services
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO tickets (service, {columns})
+        SELECT service, guild_id, member_id, ticket_id, channel_id,
+               COALESCE(closed, 0), COALESCE(locked, 0), COALESCE(claimed, 0),
+               claimed_by, type, created_by, opened
+        FROM (
+            SELECT 'plex' AS service, {columns} FROM plex_ticket_data
+            UNION ALL
+            SELECT 'tv' AS service, {columns} FROM tv_ticket_data
+        )
+        ORDER BY opened
+    """
+    )
+
+    for table_prefix in ("plex", "tv"):
+        table = f"{table_prefix}_ticket_data"
+        conn.execute(f"DROP TABLE {table}")
+
+        # Compatibility view with the old table name and column order
+        conn.execute(
+            f"""
+            CREATE VIEW {table} AS
+            SELECT {columns} FROM tickets WHERE service = '{table_prefix}'
+        """
+        )
+
+        # Keep writes through the old name working
+        new_values = ", ".join(f"NEW.{column}" for column in TICKET_DATA_COLUMNS)
+        conn.execute(
+            f"""
+            CREATE TRIGGER {table}_insert INSTEAD OF INSERT ON {table}
+            BEGIN
+                INSERT INTO tickets (service, {columns})
+                VALUES ('{table_prefix}', {new_values});
+            END
+        """
+        )
+        assignments = ", ".join(
+            f"{column} = NEW.{column}" for column in TICKET_DATA_COLUMNS
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER {table}_update INSTEAD OF UPDATE ON {table}
+            BEGIN
+                UPDATE tickets SET {assignments}
+                WHERE service = '{table_prefix}'
+                  AND guild_id = OLD.guild_id AND channel_id = OLD.channel_id;
+            END
+        """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER {table}_delete INSTEAD OF DELETE ON {table}
+            BEGIN
+                DELETE FROM tickets
+                WHERE service = '{table_prefix}'
+                  AND guild_id = OLD.guild_id AND channel_id = OLD.channel_id;
+            END
+        """
+        )
+
+
+def _ticket_system_v3_message_search(conn):
+    """Store closed-ticket messages with a full-text index for staff search"""
+    conn.execute(
+        """
+        CREATE TABLE ticket_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_row_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL UNIQUE,
+            author_id INTEGER,
+            author_name TEXT,
+            created_at INTEGER NOT NULL,
+            content TEXT NOT NULL
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX idx_ticket_messages_ticket ON ticket_messages (ticket_row_id, created_at)"
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER tickets_delete_messages AFTER DELETE ON tickets BEGIN
+            DELETE FROM ticket_messages WHERE ticket_row_id = OLD.id;
+        END
+    """
+    )
+
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE ticket_messages_fts USING fts5(
+                content, author_name,
+                content='ticket_messages', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """
+        )
+    except sqlite3.OperationalError as e:
+        # SQLite without FTS5: search falls back to LIKE over ticket_messages
+        logger.warning(f"[DB] FTS5 unavailable, ticket search uses LIKE: {e}")
+        return
+
+    # Keep the external-content index in sync (messages are only added or removed)
+    conn.execute(
+        """
+        CREATE TRIGGER ticket_messages_fts_insert AFTER INSERT ON ticket_messages BEGIN
+            INSERT INTO ticket_messages_fts (rowid, content, author_name)
+            VALUES (NEW.id, NEW.content, NEW.author_name);
+        END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER ticket_messages_fts_delete AFTER DELETE ON ticket_messages BEGIN
+            INSERT INTO ticket_messages_fts (ticket_messages_fts, rowid, content, author_name)
+            VALUES ('delete', OLD.id, OLD.content, OLD.author_name);
+        END
+    """
+    )
+
+
+def _ticket_system_v4_ticket_sequences(conn):
+    """Renumber duplicate ticket numbers and allocate new ones from a per-guild sequence"""
+    renumbered = renumber_ticket_collisions(conn)
+    if renumbered:
+        logger.warning(f"[DB] Renumbered {len(renumbered)} duplicate ticket numbers")
+
+    conn.execute(
+        "CREATE UNIQUE INDEX idx_tickets_guild_ticket_id ON tickets (guild_id, ticket_id)"
+    )
+    ensure_ticket_sequences(conn)
+
+
+def _ticket_system_v5_sla_analytics(conn):
+    """Record ticket response/claim/close events and their daily rollups"""
+    ensure_ticket_analytics_tables(conn)
+
+
+def _ticket_system_v6_ticket_activity(conn):
+    """Track the last message of every ticket for the stale-ticket sweeper"""
+    conn.execute("ALTER TABLE tickets ADD COLUMN last_activity INTEGER")
+    conn.execute("ALTER TABLE tickets ADD COLUMN stale_warned_at INTEGER")
+    conn.execute("UPDATE tickets SET last_activity = opened")
+    conn.execute(
+        "CREATE INDEX idx_tickets_open_activity ON tickets (closed, last_activity)"
+    )
+
+
+TICKET_SYSTEM_MIGRATIONS = [
+    (
+        1,
+        "Add ticket_id, channel_id, closed and opened indexes",
+        _ticket_system_v1_indexes,
+    ),
+    (
+        2,
+        "Unify plex/tv ticket data into tickets with compatibility views",
+        _ticket_system_v2_unified_tickets,
+    ),
+    (
+        3,
+        "Add full-text search over closed-ticket messages",
+        _ticket_system_v3_message_search,
+    ),
+    (
+        4,
+        "Renumber duplicate ticket ids and add per-guild ticket sequences",
+        _ticket_system_v4_ticket_sequences,
+    ),
+    (
+        5,
+        "Add ticket SLA events and daily rollups",
+        _ticket_system_v5_sla_analytics,
+    ),
+    (
+        6,
+        "Add last activity and stale warning columns to tickets",
+        _ticket_system_v6_ticket_activity,
+    ),
+]
+
+
+def init_ticket_system_db():
+    """Initialize ticket system database"""
+    db_path = os.path.join("databases", "ticket_system.db")
+    conn = sqlite3.connect(db_path)
+    enable_wal(conn)
+
+    create_ticket_system_tables(conn)
     conn.commit()
+    version = run_migrations(conn, TICKET_SYSTEM_MIGRATIONS)
+
     conn.close()
-    return "Ticket system database initialized"
+    return f"Ticket system database initialized (schema v{version})"
 
 
 def init_plex_clients_db():
     """Initialize plex clients database"""
     db_path = os.path.join("databases", "plex_clients.db")
     conn = sqlite3.connect(db_path)
+    enable_wal(conn)
     cursor = conn.cursor()
 
     cursor.execute(
@@ -136,6 +533,23 @@ def init_plex_clients_db():
     """
     )
 
+    # Plex friends cache used for removals and the bulk invite/remove queue
+    ensure_friends_table(conn)
+    ensure_jobs_table(conn)
+
     conn.commit()
     conn.close()
     return "Plex clients database initialized"
+
+
+def init_transcripts_db():
+    """Initialize the transcript archive index"""
+    db_path = os.path.join("databases", "transcripts.db")
+    conn = sqlite3.connect(db_path)
+    enable_wal(conn)
+
+    ensure_transcripts_table(conn)
+
+    conn.commit()
+    conn.close()
+    return "Transcript archive initialized"
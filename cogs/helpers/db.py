@@ -0,0 +1,273 @@
+"""
+Shared SQLite access layer
+Keeps a small pool of long-lived connections per database file and runs
+queries in a worker thread so callers never block the event loop
+"""
+
+import asyncio
+import functools
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from cogs.helpers.logger import logger
+
+# Database directory (repo root/databases), independent of the working directory
+DB_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "databases",
+)
+
+# Known database names
+TICKET_SYSTEM_DB = "ticket_system"
+INVITES_DB = "invites"
+PLEX_CLIENTS_DB = "plex_clients"
+TRANSCRIPTS_DB = "transcripts"
+
+# Connections kept open per database file
+POOL_SIZE = 4
+
+# Connection tuning
+BUSY_TIMEOUT_MS = 10000  # wait up to 10s for a lock instead of "database is locked"
+MMAP_SIZE = 64 * 1024 * 1024  # memory-mapped read window (64 MB)
+
+# Worker threads shared by every database
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sqlite")
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+# Callbacks told the database name after each committed write
+_write_listeners = []
+
+
+def configure_connection(conn):
+    """Apply the per-connection pragmas used for every bot database"""
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+
+
+def enable_wal(conn):
+    """Switch a database to WAL journaling (persists in the file) and tune the connection"""
+    mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    if str(mode).lower() != "wal":
+        logger.warning(f"[DB] Could not enable WAL mode (journal_mode={mode})")
+    configure_connection(conn)
+    return mode
+
+
+class Database:
+    """Pooled access to a single SQLite database file"""
+
+    def __init__(self, name, pool_size=POOL_SIZE):
+        self.name = name
+        self.path = os.path.join(DB_DIR, f"{name}.db")
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def exists(self):
+        """Check whether the database file has been created"""
+        return os.path.exists(self.path)
+
+    def _connect(self):
+        """Open a new connection usable from any worker thread"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(
+            self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        configure_connection(conn)
+        logger.debug(f"[DB] Opened pooled connection to {self.name}.db")
+        return conn
+
+    def _acquire(self):
+        """Take a connection from the pool, opening one if the pool is not full"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        return self._pool.get()
+
+    def _release(self, conn):
+        """Return a connection to the pool"""
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, committing on success and rolling back on error"""
+        conn = self._acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+                _notify_write(self.name)
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    # Synchronous API (for code that already runs in a worker thread)
+    def run_sync(self, fn, *args, **kwargs):
+        """Call fn(conn, *args, **kwargs) with a pooled connection in one transaction"""
+        with self.connection() as conn:
+            return fn(conn, *args, **kwargs)
+
+    def fetchone_sync(self, sql, params=()):
+        """Run a query and return the first row"""
+        return self.run_sync(lambda conn: conn.execute(sql, params).fetchone())
+
+    def fetchall_sync(self, sql, params=()):
+        """Run a query and return all rows"""
+        return self.run_sync(lambda conn: conn.execute(sql, params).fetchall())
+
+    def execute_sync(self, sql, params=()):
+        """Run a write statement and return (lastrowid, rowcount)"""
+
+        def _execute(conn):
+            cursor = conn.execute(sql, params)
+            return cursor.lastrowid, cursor.rowcount
+
+        return self.run_sync(_execute)
+
+    def executemany_sync(self, sql, seq_of_params):
+        """Run a write statement for every parameter set and return the rowcount"""
+        return self.run_sync(lambda conn: conn.executemany(sql, seq_of_params).rowcount)
+
+    # Async API (safe to call from the bot loop and the uvicorn loop)
+    async def run(self, fn, *args, **kwargs):
+        """Call fn(conn, *args, **kwargs) in a worker thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, functools.partial(self.run_sync, fn, *args, **kwargs)
+        )
+
+    async def fetchone(self, sql, params=()):
+        """Run a query off the event loop and return the first row"""
+        return await self.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql, params=()):
+        """Run a query off the event loop and return all rows"""
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def execute(self, sql, params=()):
+        """Run a write statement off the event loop and return (lastrowid, rowcount)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, functools.partial(self.execute_sync, sql, params)
+        )
+
+    async def executemany(self, sql, seq_of_params):
+        """Run a write statement for every parameter set off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, functools.partial(self.executemany_sync, sql, seq_of_params)
+        )
+
+    def checkpoint_sync(self, mode="PASSIVE"):
+        """Copy WAL content back into the database file; returns (busy, log, checkpointed)"""
+        if not self.exists():
+            return None
+        return self.run_sync(
+            lambda conn: tuple(
+                conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            )
+        )
+
+    async def checkpoint(self, mode="PASSIVE"):
+        """Run a WAL checkpoint off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, functools.partial(self.checkpoint_sync, mode)
+        )
+
+    def close(self):
+        """Close every idle pooled connection"""
+        with self._lock:
+            while True:
+                try:
+                    conn = self._pool.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._created -= 1
+
+
+def add_write_listener(callback):
+    """Call callback(name) after every write committed through the pool
+
+    Callbacks run on the writing thread, so they must be quick and thread-safe.
+    """
+    if callback not in _write_listeners:
+        _write_listeners.append(callback)
+
+
+def remove_write_listener(callback):
+    if callback in _write_listeners:
+        _write_listeners.remove(callback)
+
+
+def _notify_write(name):
+    for callback in list(_write_listeners):
+        try:
+            callback(name)
+        except Exception as e:
+            logger.error(f"[DB] Write listener failed for {name}.db: {e}")
+
+
+def get_db(name):
+    """Get the shared Database for a database name (e.g. "ticket_system")"""
+    with _databases_lock:
+        db = _databases.get(name)
+        if db is None:
+            db = Database(name)
+            _databases[name] = db
+        return db
+
+
+def escape_like(value):
+    """Escape LIKE wildcards so search terms match literally (use ESCAPE '\\')"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def checkpoint_all(mode="PASSIVE"):
+    """Checkpoint the WAL of every bot database"""
+    names = {TICKET_SYSTEM_DB, INVITES_DB, PLEX_CLIENTS_DB, TRANSCRIPTS_DB}
+    with _databases_lock:
+        names.update(_databases.keys())
+
+    results = {}
+    for name in sorted(names):
+        try:
+            results[name] = await get_db(name).checkpoint(mode)
+        except Exception as e:
+            logger.error(f"[DB] WAL checkpoint failed for {name}.db: {e}")
+    return results
+
+
+def close_all():
+    """Close the idle connections of every database"""
+    with _databases_lock:
+        for db in _databases.values():
+            db.close()
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
@@ -0,0 +1,89 @@
+"""
+In-process event bus
+Cogs publish what they see first (tickets opened and closed, Plex access
+granted or revoked by role changes, Ko-fi support) as typed events.
+Consumers on other event loops, such as the web API's websocket router on
+the uvicorn loop, subscribe with their loop and get every event delivered
+there. Publishing never blocks and costs nothing while nobody listens
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple
+
+# Event types and the topic each one belongs to
+EVENT_TOPICS = {
+    "ticket_opened": "tickets",
+    "ticket_closed": "tickets",
+    "plex_access_granted": "invites",
+    "plex_access_revoked": "invites",
+    "kofi_support": "kofi",
+}
+
+
+class BotEvent(NamedTuple):
+    type: str
+    topic: str
+    data: Dict[str, Any]
+    at: float
+
+    def as_message(self):
+        """The event as a websocket message dict"""
+        return {
+            "topic": self.topic,
+            "type": self.type,
+            "data": self.data,
+            "at": self.at,
+        }
+
+
+class EventBus:
+    """Thread-safe publish/subscribe between the bot loop and other loops"""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, callback: Callable[[BotEvent], None], loop=None):
+        """Call callback(event) on loop (default: the running loop) for every event"""
+        loop = loop or asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.append((callback, loop))
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [
+                (subscriber, loop)
+                for subscriber, loop in self._subscribers
+                if subscriber != callback
+            ]
+
+    def publish(self, event_type, **data):
+        """Publish an event from any thread; returns the event"""
+        topic = EVENT_TOPICS.get(event_type)
+        if topic is None:
+            raise ValueError(f"Unknown event type: {event_type}")
+        event = BotEvent(event_type, topic, data, time.time())
+        self.published += 1
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, loop in subscribers:
+            if loop.is_closed():
+                continue
+            try:
+                loop.call_soon_threadsafe(callback, event)
+            except RuntimeError:
+                # Loop closed between the check and the call
+                pass
+        return event
+
+
+event_bus = EventBus()
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
@@ -0,0 +1,255 @@
+"""
+Member and role index for the web UI
+The members page used to serialize every guild member and count every
+role's members on each request. The index keeps compact member records
+sorted by display name, member counts per role and a trigram index over
+name and display name. It is built once the member cache is ready and then
+updated from the gateway events, so a page costs O(page) plus the matches
+of a search. It lives on the bot loop; the API reads it through call_on_bot
+"""
+
+import asyncio
+import bisect
+from collections import defaultdict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Queries shorter than a trigram (and id searches) scan the member records
+TRIGRAM = 3
+
+# Members indexed between yields to the event loop while building
+BUILD_BATCH = 1000
+
+# Colour shown for roles without one
+DEFAULT_ROLE_COLOR = "#99aab5"
+
+
+class MemberRecord(NamedTuple):
+    id: int
+    name: str
+    display_name: str
+    avatar: Optional[str]
+    status: str
+    role_ids: Tuple[int, ...]
+    # Lowercased "name\ndisplay_name\nid" for matching
+    search_text: str
+
+    @property
+    def sort_key(self):
+        return (self.display_name.lower(), self.id)
+
+
+def member_record(member):
+    """Compact record of a discord.Member"""
+    name = str(member)
+    return MemberRecord(
+        id=member.id,
+        name=name,
+        display_name=member.display_name,
+        avatar=str(member.display_avatar.url) if member.display_avatar else None,
+        status=str(member.status),
+        role_ids=tuple(role.id for role in member.roles if not role.is_default()),
+        search_text=f"{name}\n{member.display_name}\n{member.id}".lower(),
+    )
+
+
+def role_color(role):
+    return f"#{role.color.value:06x}" if role.color.value else DEFAULT_ROLE_COLOR
+
+
+def trigrams(text):
+    return {text[i : i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+def name_trigrams(record):
+    """Trigrams of the name and display name (ids are left out of the index)"""
+    return trigrams(record.search_text.rsplit("\n", 1)[0])
+
+
+class MemberIndex:
+    """Members of one guild (bots excluded) kept current from gateway events"""
+
+    def __init__(self):
+        self.guild_id = None
+        self.ready = False
+        self._members: Dict[int, MemberRecord] = {}
+        # Sort keys (lowercased display name, id) in display order
+        self._order = []
+        self._trigrams = defaultdict(set)
+        # Bots are not listed but count towards their roles
+        self._bot_role_ids: Dict[int, Tuple[int, ...]] = {}
+        self._roles: Dict[int, dict] = {}
+        self._role_counts = defaultdict(int)
+        self._sorted_roles = None
+
+    def __len__(self):
+        return len(self._members)
+
+    async def build(self, guild):
+        """Index every member and role of a guild (yields between batches)"""
+        self.ready = False
+        self.guild_id = guild.id
+        self._members.clear()
+        self._order.clear()
+        self._trigrams.clear()
+        self._bot_role_ids.clear()
+        self._role_counts.clear()
+        self._roles = {}
+        for role in guild.roles:
+            self.upsert_role(role)
+
+        for number, member in enumerate(list(guild.members), 1):
+            self.upsert_member(member)
+            if number % BUILD_BATCH == 0:
+                await asyncio.sleep(0)
+        self.ready = True
+
+    def upsert_member(self, member):
+        """Add a member or bring its record up to date"""
+        if member.guild.id != self.guild_id:
+            return
+        if member.bot:
+            self._set_bot_roles(member)
+        else:
+            self._add(member_record(member))
+
+    def _count(self, role_ids, delta):
+        """Adjust member counts; deleted roles (still on old records) are skipped"""
+        for role_id in role_ids:
+            if role_id in self._roles:
+                self._role_counts[role_id] += delta
+
+    def _set_bot_roles(self, member):
+        role_ids = tuple(role.id for role in member.roles if not role.is_default())
+        self._count(self._bot_role_ids.get(member.id, ()), -1)
+        self._bot_role_ids[member.id] = role_ids
+        self._count(role_ids, 1)
+
+    def remove_member(self, member_id):
+        self._count(self._bot_role_ids.pop(member_id, ()), -1)
+        record = self._members.pop(member_id, None)
+        if record is None:
+            return
+        position = bisect.bisect_left(self._order, record.sort_key)
+        del self._order[position]
+        for trigram in name_trigrams(record):
+            ids = self._trigrams[trigram]
+            ids.discard(record.id)
+            if not ids:
+                del self._trigrams[trigram]
+        self._count(record.role_ids, -1)
+
+    def update_status(self, member):
+        """Presence change: only the status of the record changes"""
+        record = self._members.get(member.id)
+        if record is not None:
+            self._members[member.id] = record._replace(status=str(member.status))
+
+    def _add(self, record):
+        old = self._members.get(record.id)
+        if old == record:
+            return
+        if old is not None:
+            self.remove_member(old.id)
+        self._members[record.id] = record
+        bisect.insort(self._order, record.sort_key)
+        for trigram in name_trigrams(record):
+            self._trigrams[trigram].add(record.id)
+        self._count(record.role_ids, 1)
+
+    def upsert_role(self, role):
+        if role.is_default() or role.guild.id != self.guild_id:
+            return
+        self._roles[role.id] = {
+            "id": str(role.id),
+            "name": role.name,
+            "color": role_color(role),
+            "position": role.position,
+            "mentionable": role.mentionable,
+            "hoist": role.hoist,
+        }
+        self._sorted_roles = None
+
+    def remove_role(self, role_id):
+        """Role deleted; member records may keep its id, it is neither listed nor counted"""
+        self._roles.pop(role_id, None)
+        self._role_counts.pop(role_id, None)
+        self._sorted_roles = None
+
+    def roles(self):
+        """Roles with member counts, highest position first"""
+        if self._sorted_roles is None:
+            self._sorted_roles = sorted(
+                self._roles.values(), key=lambda role: role["position"], reverse=True
+            )
+        return [
+            {**role, "member_count": self._role_counts.get(int(role["id"]), 0)}
+            for role in self._sorted_roles
+        ]
+
+    def _matching_ids(self, search):
+        """Ids of members whose name, display name or id contains search"""
+        search = search.lower()
+        if len(search) < TRIGRAM or search.isdigit():
+            return [
+                member_id
+                for member_id, record in self._members.items()
+                if search in record.search_text
+            ]
+        candidates = sorted(
+            (self._trigrams.get(trigram, ()) for trigram in trigrams(search)), key=len
+        )
+        if not candidates[0]:
+            return []
+        matches = set(candidates[0]).intersection(*candidates[1:])
+        # Trigrams only say the pieces occur; check the whole string
+        return [
+            member_id
+            for member_id in matches
+            if search in self._members[member_id].search_text
+        ]
+
+    def page(self, search=None, page=1, per_page=10):
+        """One page of members in display-name order
+
+        Returns (members, total_members) with the members as API dicts.
+        """
+        start = max(page - 1, 0) * per_page
+        if search:
+            records = sorted(
+                (self._members[member_id] for member_id in self._matching_ids(search)),
+                key=lambda record: record.sort_key,
+            )
+            total = len(records)
+            records = records[start : start + per_page]
+        else:
+            total = len(self._order)
+            records = [
+                self._members[member_id]
+                for _, member_id in self._order[start : start + per_page]
+            ]
+        return [self.member_dict(record) for record in records], total
+
+    def member_dict(self, record):
+        roles = []
+        for role_id in record.role_ids:
+            role = self._roles.get(role_id)
+            if role:
+                roles.append(
+                    {"id": role["id"], "name": role["name"], "color": role["color"]}
+                )
+        return {
+            "id": str(record.id),
+            "name": record.name,
+            "display_name": record.display_name,
+            "avatar": record.avatar,
+            "status": record.status,
+            "roles": roles,
+        }
+
+
+member_index = MemberIndex()
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
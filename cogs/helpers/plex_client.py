@@ -0,0 +1,309 @@
+"""
+Shared Plex server connection, cached library statistics and async call wrapper
+The PlexCommands cog and the web API use the same PlexServer client, library
+stats are served from memory and refreshed in the background, and blocking
+plexapi calls run through PlexService instead of on the event loop
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cogs.helpers.logger import logger
+
+# Seconds before cached library stats are considered stale
+PLEX_STATS_TTL = 300
+
+# Blocking plexapi calls run in this many worker threads
+PLEX_WORKERS = 4
+
+# Default per-call timeout in seconds (plex.tv friend listings can be slow)
+PLEX_CALL_TIMEOUT = 30
+
+# Circuit breaker: open after this many consecutive failures, probe again after the cooldown
+PLEX_FAILURE_THRESHOLD = 3
+PLEX_CIRCUIT_COOLDOWN = 60
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def connect_plex_server():
+    """Connect to the configured Plex server and share the connection"""
+    global _server
+
+    from config import settings
+
+    token = getattr(settings, "PLEX_TOKEN", "")
+    base_url = getattr(settings, "PLEX_BASE_URL", "")
+    user = getattr(settings, "PLEX_USER", "")
+    password = getattr(settings, "PLEX_PASS", "")
+    server_name = getattr(settings, "PLEX_SERVER_NAME", "")
+
+    with _server_lock:
+        # A failed connect drops the old connection so the next call retries
+        _server = None
+        if token and base_url:
+            from plexapi.server import PlexServer
+
+            _server = PlexServer(base_url, token)
+        elif user and password and server_name:
+            from plexapi.myplex import MyPlexAccount
+
+            account = MyPlexAccount(user, password)
+            _server = account.resource(server_name).connect()
+        return _server
+
+
+def get_plex_server():
+    """Get the shared Plex server, connecting on first use
+
+    Returns None if Plex is not configured. Connect errors propagate, so calls
+    made through plex_service count them towards opening the circuit; the
+    next call connects again.
+    """
+    if _server is not None:
+        return _server
+    try:
+        return connect_plex_server()
+    except Exception as e:
+        logger.error(f"[PLEX] Error connecting to Plex: {e}")
+        raise
+
+
+class PlexStatsCache:
+    """Library statistics kept in memory with stale-while-revalidate refresh"""
+
+    def __init__(self, ttl=PLEX_STATS_TTL):
+        self.ttl = ttl
+        self._stats = None
+        self._refreshed_at = None
+        self._refreshing = False
+        self._task = None
+        self._lock = threading.Lock()
+
+    def age(self):
+        """Seconds since the last successful refresh (None if never refreshed)"""
+        if self._refreshed_at is None:
+            return None
+        return time.monotonic() - self._refreshed_at
+
+    def refresh(self):
+        """Fetch fresh stats from Plex (blocking, run through plex_service.call)
+
+        Errors propagate so the circuit breaker sees them; the last good stats
+        stay cached until Plex answers again.
+        """
+        plex = get_plex_server()
+        if not plex:
+            stats = {
+                "connected": False,
+                "server_name": "N/A",
+                "version": "N/A",
+                "movies": 0,
+                "shows": 0,
+            }
+        else:
+            movies = 0
+            shows = 0
+            for section in plex.library.sections():
+                if section.type == "movie":
+                    movies += section.totalSize
+                elif section.type == "show":
+                    shows += section.totalSize
+            stats = {
+                "connected": True,
+                "server_name": plex.friendlyName,
+                "version": plex.version,
+                "movies": movies,
+                "shows": shows,
+            }
+
+        with self._lock:
+            self._stats = stats
+            self._refreshed_at = time.monotonic()
+        return stats
+
+    async def _revalidate(self):
+        try:
+            await plex_service.call("library_stats", self.refresh)
+        except PlexUnavailable:
+            pass
+        except Exception as e:
+            # Keep serving the last good stats until Plex answers again
+            logger.error(f"[PLEX] Error refreshing library stats: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refresh_in_background(self):
+        """Schedule a refresh through the circuit breaker on the running loop
+
+        Skipped while a refresh is running or the Plex circuit is open.
+        """
+        if plex_service.circuit_open:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self._task = asyncio.get_running_loop().create_task(self._revalidate())
+
+    def get(self):
+        """Return (stats, age) from memory, revalidating in the background when stale
+
+        stats is None until the first refresh has completed. Must be called on
+        an event loop, which runs the revalidation.
+        """
+        age = self.age()
+        if age is None or age > self.ttl:
+            self.refresh_in_background()
+        return self._stats, age
+
+
+class PlexUnavailable(Exception):
+    """Raised when the Plex circuit breaker is open"""
+
+
+class PlexService:
+    """Runs blocking plexapi calls in a bounded thread pool with timeouts,
+    a circuit breaker and per-operation latency metrics"""
+
+    def __init__(
+        self,
+        workers=PLEX_WORKERS,
+        timeout=PLEX_CALL_TIMEOUT,
+        failure_threshold=PLEX_FAILURE_THRESHOLD,
+        cooldown=PLEX_CIRCUIT_COOLDOWN,
+    ):
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="plex"
+        )
+        self._failures = 0
+        self._opened_at = None
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    # Circuit breaker
+    @property
+    def circuit_open(self):
+        """True while Plex is considered unreachable"""
+        return self._opened_at is not None
+
+    def trip(self):
+        """Open the circuit (e.g. after a failed health check)"""
+        with self._lock:
+            if self._opened_at is None:
+                logger.warning("[PLEX] Circuit breaker opened")
+            self._opened_at = time.monotonic()
+
+    def reset(self):
+        """Close the circuit after Plex answered again"""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("[PLEX] Circuit breaker closed")
+            self._failures = 0
+            self._opened_at = None
+
+    def _allow(self):
+        """Check whether a call may go through (half-open once the cooldown passed)"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                # Let one probe through and hold the others for another cooldown
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def _record(self, name, elapsed, ok, timed_out=False):
+        """Update the metrics of an operation and the failure counter"""
+        with self._lock:
+            metric = self._metrics.setdefault(
+                name,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "timeouts": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                },
+            )
+            elapsed_ms = elapsed * 1000
+            metric["calls"] += 1
+            metric["total_ms"] += elapsed_ms
+            metric["max_ms"] = max(metric["max_ms"], elapsed_ms)
+            metric["last_ms"] = elapsed_ms
+            if timed_out:
+                metric["timeouts"] += 1
+            if not ok:
+                metric["errors"] += 1
+                self._failures += 1
+                if self._failures >= self.failure_threshold and self._opened_at is None:
+                    self._opened_at = time.monotonic()
+                    logger.warning(
+                        f"[PLEX] Circuit breaker opened after {self._failures} failures"
+                    )
+            else:
+                self._failures = 0
+                if self._opened_at is not None:
+                    self._opened_at = None
+                    logger.info("[PLEX] Circuit breaker closed")
+
+    async def call(self, name, fn, *args, timeout=None, probe=False, **kwargs):
+        """Run fn(*args, **kwargs) in the Plex pool and await the result
+
+        Raises PlexUnavailable while the circuit is open (unless probe=True)
+        and asyncio.TimeoutError when the call takes longer than the timeout.
+        """
+        if not probe and not self._allow():
+            raise PlexUnavailable("Plex is unavailable (circuit open)")
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(
+                    self._executor, functools.partial(fn, *args, **kwargs)
+                ),
+                timeout or self.timeout,
+            )
+        except asyncio.TimeoutError:
+            self._record(name, time.perf_counter() - start, ok=False, timed_out=True)
+            logger.error(f"[PLEX] {name} timed out after {timeout or self.timeout}s")
+            raise
+        except Exception:
+            self._record(name, time.perf_counter() - start, ok=False)
+            raise
+
+        self._record(name, time.perf_counter() - start, ok=True)
+        return result
+
+    def metrics(self):
+        """Latency and error counters per operation"""
+        with self._lock:
+            result = {}
+            for name, metric in self._metrics.items():
+                result[name] = dict(metric)
+                result[name]["avg_ms"] = (
+                    metric["total_ms"] / metric["calls"] if metric["calls"] else 0.0
+                )
+            return {
+                "circuit_open": self._opened_at is not None,
+                "consecutive_failures": self._failures,
+                "operations": result,
+            }
+
+
+# Shared instances used by the PlexCommands cog and the web API
+plex_stats = PlexStatsCache()
+plex_service = PlexService()
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
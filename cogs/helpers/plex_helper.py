@@ -4,6 +4,7 @@ import logging
 import sqlite3
 import os
 import discord
+from datetime import datetime, timedelta
 from cogs.helpers.logger import logger
 
 
@@ -51,17 +52,34 @@ def plexinviter(plex, plexname, plex_libs):
         return False
 
 
-def plexremove(plex, plexname):
+def plexremove(plex, plexname, friend_id=None):
     """
     Remove a user from the Plex server
     Args:
         plex: Plex server instance
         plexname: Email or username to remove
+        friend_id: Plex user id from the friends cache (skips listing all friends)
     """
     try:
         logger.info(f"[PLEX REMOVE] Starting removal process for: {plexname}")
         account = plex.myPlexAccount()
 
+        if friend_id:
+            # Cached id: a single DELETE instead of listing every friend
+            try:
+                account.query(
+                    account.FRIENDUPDATE.format(userId=friend_id),
+                    account._session.delete,
+                )
+                logger.info(
+                    f"[PLEX REMOVE] SUCCESS: Removed {plexname} (cached id {friend_id}) from Plex"
+                )
+                return True
+            except Exception as e:
+                logger.debug(
+                    f"[PLEX REMOVE] Cached id {friend_id} failed ({e}), falling back to friends list"
+                )
+
         # Get all friends to find the correct one
         friends = account.users()
         logger.debug(f"[PLEX REMOVE] Found {len(friends)} users on Plex server")
@@ -79,16 +97,17 @@ def plexremove(plex, plexname):
                 and friend.username
                 and friend.username.lower() == plexname.lower()
             ):
-                user_to_remove = (
-                    friend.username if hasattr(friend, "username") else friend.email
+                user_to_remove = friend
+                logger.debug(
+                    f"[PLEX REMOVE] Found matching user: {friend.username or friend.email}"
                 )
-                logger.debug(f"[PLEX REMOVE] Found matching user: {user_to_remove}")
                 break
 
         if user_to_remove:
+            # Pass the user object so plexapi does not list the friends again
             account.removeFriend(user=user_to_remove)
             logger.info(
-                f"[PLEX REMOVE] SUCCESS: Removed {user_to_remove} (searched as {plexname}) from Plex"
+                f"[PLEX REMOVE] SUCCESS: Removed {user_to_remove.username or user_to_remove.email} (searched as {plexname}) from Plex"
             )
             return True
         else:
@@ -107,6 +126,22 @@ def plexremove(plex, plexname):
         return False
 
 
+def fetch_plex_friends(plex):
+    """
+    List the friends of the Plex account as plain dicts (one API call)
+    """
+    account = plex.myPlexAccount()
+    return [
+        {
+            "id": friend.id,
+            "username": friend.username,
+            "email": friend.email,
+            "title": friend.title,
+        }
+        for friend in account.users()
+    ]
+
+
 def verifyemail(addressToVerify):
     """
     Verify if an email address is valid
@@ -144,21 +179,26 @@ def check_table_exists(dbcon, tablename):
     return False
 
 
+def ensure_clients_table(conn):
+    """Create the clients table if it does not exist yet"""
+    if not check_table_exists(conn, "clients"):
+        conn.execute(
+            """CREATE TABLE "clients" (
+            "id"	INTEGER NOT NULL UNIQUE,
+            "discord_username"	TEXT NOT NULL UNIQUE,
+            "email"	TEXT,
+            PRIMARY KEY("id" AUTOINCREMENT)
+            );"""
+        )
+        conn.commit()
+        logger.info("Created Plex clients table")
+
+
 def init_db(db_path):
     """Initialize the database"""
     conn = create_connection(db_path)
     if conn:
-        if not check_table_exists(conn, "clients"):
-            conn.execute(
-                """CREATE TABLE "clients" (
-                "id"	INTEGER NOT NULL UNIQUE,
-                "discord_username"	TEXT NOT NULL UNIQUE,
-                "email"	TEXT,
-                PRIMARY KEY("id" AUTOINCREMENT)
-                );"""
-            )
-            conn.commit()
-            logger.info("Created Plex clients table")
+        ensure_clients_table(conn)
     return conn
 
 
@@ -271,6 +311,162 @@ def read_all_users(conn):
         return []
 
 
+# Plex friends cache (plex_clients.db) operations
+def ensure_friends_table(conn):
+    """Create the Plex friends cache table if it does not exist yet"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plex_friends (
+            id INTEGER PRIMARY KEY,
+            username TEXT,
+            email TEXT,
+            title TEXT,
+            username_lower TEXT,
+            email_lower TEXT,
+            synced_at TEXT NOT NULL
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plex_friends_email ON plex_friends (email_lower)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plex_friends_username ON plex_friends (username_lower)"
+    )
+
+
+def sync_plex_friends(conn, friends):
+    """Apply a fresh friends list to the cache, touching only changed rows
+
+    Returns (changed, removed) row counts.
+    """
+    now = datetime.now().isoformat()
+    changed = 0
+    for friend in friends:
+        cursor = conn.execute(
+            """
+            INSERT INTO plex_friends (id, username, email, title, username_lower, email_lower, synced_at)
+            VALUES (?, ?, ?, ?, lower(?), lower(?), ?)
+            ON CONFLICT (id) DO UPDATE SET
+                username = excluded.username,
+                email = excluded.email,
+                title = excluded.title,
+                username_lower = excluded.username_lower,
+                email_lower = excluded.email_lower,
+                synced_at = excluded.synced_at
+            WHERE username IS NOT excluded.username
+               OR email IS NOT excluded.email
+               OR title IS NOT excluded.title
+        """,
+            (
+                friend["id"],
+                friend["username"],
+                friend["email"],
+                friend["title"],
+                friend["username"],
+                friend["email"],
+                now,
+            ),
+        )
+        changed += cursor.rowcount
+
+    # Drop friends that are no longer shared with
+    ids = [friend["id"] for friend in friends]
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS plex_friend_ids (id INTEGER)")
+    conn.execute("DELETE FROM plex_friend_ids")
+    conn.executemany("INSERT INTO plex_friend_ids (id) VALUES (?)", [(i,) for i in ids])
+    removed = conn.execute(
+        "DELETE FROM plex_friends WHERE id NOT IN (SELECT id FROM plex_friend_ids)"
+    ).rowcount
+    conn.execute("DELETE FROM plex_friend_ids")
+
+    logger.debug(
+        f"[PLEX DB] Synced {len(friends)} Plex friends ({changed} changed, {removed} removed)"
+    )
+    return changed, removed
+
+
+def find_plex_friend(conn, plexname):
+    """Look up a cached Plex friend by email or username (case-insensitive)"""
+    if not plexname:
+        return None
+    name = plexname.lower()
+    return conn.execute(
+        """
+        SELECT id, username, email FROM plex_friends WHERE email_lower = ?
+        UNION ALL
+        SELECT id, username, email FROM plex_friends WHERE username_lower = ?
+        LIMIT 1
+    """,
+        (name, name),
+    ).fetchone()
+
+
+def forget_plex_friend(conn, plexname):
+    """Drop a friend from the cache after it was removed from Plex"""
+    if not plexname:
+        return 0
+    name = plexname.lower()
+    return conn.execute(
+        "DELETE FROM plex_friends WHERE email_lower = ? OR username_lower = ?",
+        (name, name),
+    ).rowcount
+
+
+# Invite tracking (invites.db) operations
+def record_invite(conn, email, discord_user, days_valid=30):
+    """Record a new active invite in the tracking database"""
+    now = datetime.now()
+    conn.execute(
+        """
+        INSERT INTO invites (email, discord_user, status, created_at, expires_at)
+        VALUES (?, ?, 'active', ?, ?)
+    """,
+        (
+            email,
+            discord_user,
+            now.isoformat(),
+            (now + timedelta(days=days_valid)).isoformat(),
+        ),
+    )
+
+
+def mark_invites_revoked(conn, discord_user):
+    """Mark a user's active invites as revoked"""
+    conn.execute(
+        """
+        UPDATE invites 
+        SET status = 'revoked'
+        WHERE discord_user = ? AND status = 'active'
+    """,
+        (discord_user,),
+    )
+
+
+def mark_invites_removed(conn, discord_user):
+    """Mark a user's active or revoked invites as removed"""
+    conn.execute(
+        """
+        UPDATE invites 
+        SET status = 'removed'
+        WHERE discord_user = ? AND status IN ('active', 'revoked')
+    """,
+        (discord_user,),
+    )
+
+
+def mark_email_invites_revoked(conn, email):
+    """Mark the active invites of an email as revoked"""
+    conn.execute(
+        """
+        UPDATE invites
+        SET status = 'revoked'
+        WHERE email = ? COLLATE NOCASE AND status = 'active'
+    """,
+        (email,),
+    )
+
+
 # Add this setup function to make it compatible with Discord's extension loader
 # This will allow the bot to load this file as a cog even though it's just a helper module
 async def setup(bot):
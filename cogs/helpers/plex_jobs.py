@@ -0,0 +1,252 @@
+"""
+Persistent Plex invite/remove job queue
+Jobs are stored in plex_clients.db and processed in rate-limited batches
+by the PlexCommands worker, with retries and exponential backoff
+"""
+
+import csv
+import io
+import time
+import uuid
+from datetime import datetime
+from cogs.helpers.logger import logger
+
+# Job actions
+PLEX_JOB_INVITE = "invite"
+PLEX_JOB_REMOVE = "remove"
+PLEX_JOB_ACTIONS = (PLEX_JOB_INVITE, PLEX_JOB_REMOVE)
+
+# Worker tuning
+PLEX_JOB_BATCH_SIZE = 10  # jobs claimed per worker tick (also the rate burst)
+PLEX_JOB_RATE_PER_MINUTE = 20  # Plex operations per minute across all batches
+PLEX_JOB_MAX_ATTEMPTS = 5
+PLEX_JOB_BACKOFF_SECONDS = 30  # doubled after every failed attempt
+
+
+def ensure_jobs_table(conn):
+    """Create the Plex job queue table if it does not exist yet"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plex_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            email TEXT NOT NULL,
+            discord_user TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            revoked_role TEXT
+        )
+    """
+    )
+    # Plex role whose removal queued the job; the member is told once it succeeded
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(plex_jobs)")}
+    if "revoked_role" not in columns:
+        conn.execute("ALTER TABLE plex_jobs ADD COLUMN revoked_role TEXT")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plex_jobs_due ON plex_jobs (status, next_attempt_at)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plex_jobs_batch ON plex_jobs (batch_id, status)"
+    )
+
+
+def new_batch_id():
+    """Create an id for a group of jobs enqueued together"""
+    return uuid.uuid4().hex[:12]
+
+
+def enqueue_plex_jobs(conn, action, entries, batch_id=None, revoked_role=None):
+    """Queue (email, discord_user) entries for an action and return the batch id
+
+    revoked_role names the Plex role whose removal queued a remove job.
+    """
+    if action not in PLEX_JOB_ACTIONS:
+        raise ValueError(f"Unknown Plex job action: {action}")
+
+    batch_id = batch_id or new_batch_id()
+    now = datetime.now().isoformat()
+    conn.executemany(
+        """
+        INSERT INTO plex_jobs (batch_id, action, email, discord_user, revoked_role,
+                               created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+        [
+            (batch_id, action, email, discord_user, revoked_role, now, now)
+            for email, discord_user in entries
+        ],
+    )
+    logger.info(f"[PLEX JOBS] Queued {len(entries)} {action} jobs (batch {batch_id})")
+    return batch_id
+
+
+def claim_plex_jobs(conn, limit):
+    """Mark up to limit due jobs as running and return them (oldest first)"""
+    rows = conn.execute(
+        """
+        SELECT id, batch_id, action, email, discord_user, revoked_role, attempts
+        FROM plex_jobs
+        WHERE status = 'pending' AND next_attempt_at <= ?
+        ORDER BY id
+        LIMIT ?
+    """,
+        (time.time(), limit),
+    ).fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE plex_jobs SET status = 'running', updated_at = ? WHERE id = ?",
+            [(datetime.now().isoformat(), row["id"]) for row in rows],
+        )
+    return rows
+
+
+def complete_plex_job(conn, job_id):
+    """Mark a job as done"""
+    conn.execute(
+        "UPDATE plex_jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE id = ?",
+        (datetime.now().isoformat(), job_id),
+    )
+
+
+def fail_plex_job(conn, job_id, attempts, error):
+    """Schedule a retry with exponential backoff, or give up after the last attempt"""
+    attempts += 1
+    if attempts >= PLEX_JOB_MAX_ATTEMPTS:
+        status = "failed"
+        next_attempt_at = 0
+    else:
+        status = "pending"
+        next_attempt_at = time.time() + PLEX_JOB_BACKOFF_SECONDS * 2 ** (attempts - 1)
+
+    conn.execute(
+        """
+        UPDATE plex_jobs
+        SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+        WHERE id = ?
+    """,
+        (
+            status,
+            attempts,
+            next_attempt_at,
+            str(error)[:500],
+            datetime.now().isoformat(),
+            job_id,
+        ),
+    )
+    return status
+
+
+def release_plex_jobs(conn, job_ids):
+    """Put claimed jobs back in the queue without using up an attempt"""
+    conn.executemany(
+        "UPDATE plex_jobs SET status = 'pending', updated_at = ? WHERE id = ?",
+        [(datetime.now().isoformat(), job_id) for job_id in job_ids],
+    )
+
+
+def recover_plex_jobs(conn):
+    """Put jobs left running by a previous process back in the queue"""
+    return conn.execute(
+        "UPDATE plex_jobs SET status = 'pending' WHERE status = 'running'"
+    ).rowcount
+
+
+def plex_job_progress(conn, batch_id=None):
+    """Count jobs per status, for one batch or the whole queue"""
+    progress = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+    if batch_id:
+        rows = conn.execute(
+            "SELECT status, COUNT(*) FROM plex_jobs WHERE batch_id = ? GROUP BY status",
+            (batch_id,),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT status, COUNT(*) FROM plex_jobs GROUP BY status"
+        ).fetchall()
+    for status, count in rows:
+        progress[status] = count
+    progress["total"] = sum(progress.values())
+    return progress
+
+
+def list_plex_batches(conn, limit=20):
+    """Progress of the most recent batches, newest first"""
+    rows = conn.execute(
+        """
+        SELECT batch_id, action, MIN(created_at) AS created_at, MAX(updated_at) AS updated_at,
+               COUNT(*) AS total,
+               SUM(status = 'pending') AS pending,
+               SUM(status = 'running') AS running,
+               SUM(status = 'done') AS done,
+               SUM(status = 'failed') AS failed
+        FROM plex_jobs
+        GROUP BY batch_id
+        ORDER BY MAX(id) DESC
+        LIMIT ?
+    """,
+        (limit,),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def parse_jobs_csv(text):
+    """Parse "email[,discord_user]" lines (an optional header row is skipped)"""
+    entries = []
+    for row in csv.reader(io.StringIO(text)):
+        if not row or not row[0].strip():
+            continue
+        email = row[0].strip()
+        if email.lower() == "email":
+            continue
+        discord_user = row[1].strip() if len(row) > 1 and row[1].strip() else None
+        entries.append((email, discord_user))
+    return entries
+
+
+def role_member_entries(conn, members):
+    """Look up the stored Plex emails of role members
+
+    Returns (entries, skipped) where skipped lists members without an email.
+    """
+    entries = []
+    skipped = []
+    for member in members:
+        row = conn.execute(
+            "SELECT email FROM clients WHERE discord_username = ?", (str(member.id),)
+        ).fetchone()
+        if row and row[0]:
+            entries.append((row[0], str(member.id)))
+        else:
+            skipped.append(str(member))
+    return entries, skipped
+
+
+class RateBudget:
+    """Token bucket limiting how many Plex operations the worker may start"""
+
+    def __init__(self, per_minute=PLEX_JOB_RATE_PER_MINUTE, burst=PLEX_JOB_BATCH_SIZE):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def available(self):
+        """Refill the bucket and return how many whole operations may start"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return int(self.tokens)
+
+    def spend(self, count=1):
+        """Use up tokens for started operations"""
+        self.tokens = max(0, self.tokens - count)
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
@@ -0,0 +1,252 @@
+"""
+Ticket SLA analytics
+First staff response, claim and close are recorded once per ticket in
+ticket_events (ticket_system.db) with the seconds elapsed since the ticket
+was opened. A periodic rollup turns new events into daily p50/p90 figures
+per ticket type and per helper in ticket_sla_daily, which is the only table
+the web UI reads
+"""
+
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB
+from cogs.helpers.logger import logger
+
+# Recorded events (metric names in the rollups)
+TICKET_EVENTS = ("first_response", "claimed", "closed")
+
+# Rollup key that covers every ticket type
+ALL_TYPES = "*"
+
+# Channels whose first staff response is already recorded (skips the DB per message)
+_responded_channels = set()
+
+
+def ensure_ticket_analytics_tables(conn):
+    """Create the event, rollup and rollup-progress tables"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ticket_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_row_id INTEGER NOT NULL,
+            event TEXT NOT NULL,
+            actor_id INTEGER,
+            at INTEGER NOT NULL,
+            elapsed INTEGER NOT NULL,
+            UNIQUE (ticket_row_id, event)
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ticket_events_at ON ticket_events (at)"
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS tickets_delete_events AFTER DELETE ON tickets BEGIN
+            DELETE FROM ticket_events WHERE ticket_row_id = OLD.id;
+        END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ticket_sla_daily (
+            day TEXT NOT NULL,
+            service TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            key TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            p50 INTEGER NOT NULL,
+            p90 INTEGER NOT NULL,
+            average REAL NOT NULL,
+            PRIMARY KEY (day, service, dimension, key, metric)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ticket_sla_rollup_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_event_id INTEGER NOT NULL
+        )
+    """
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO ticket_sla_rollup_state (id, last_event_id) VALUES (1, 0)"
+    )
+
+
+def record_ticket_event(conn, service, channel_id, event, actor_id=None, at=None):
+    """Record an event of a ticket unless it was recorded before
+
+    Returns True if the event is new.
+    """
+    at = int(at if at is not None else time.time())
+    cursor = conn.execute(
+        """
+        INSERT OR IGNORE INTO ticket_events (ticket_row_id, event, actor_id, at, elapsed)
+        SELECT id, ?, ?, ?, MAX(? - opened, 0)
+        FROM tickets WHERE service = ? AND channel_id = ?
+    """,
+        (event, actor_id, at, at, service, channel_id),
+    )
+    return cursor.rowcount > 0
+
+
+async def record_event(service, channel_id, event, actor_id=None, at=None):
+    """Record a ticket event from the bot loop; errors are logged"""
+    if event == "closed":
+        _responded_channels.discard(channel_id)
+    try:
+        return await get_db(TICKET_SYSTEM_DB).run(
+            record_ticket_event, service, channel_id, event, actor_id, at
+        )
+    except Exception as e:
+        logger.error(f"[TICKET SLA] Could not record {event} of {service} ticket: {e}")
+        return False
+
+
+async def record_first_response(service, channel_id, actor_id, at=None):
+    """Record the first staff message of a ticket (once per channel)"""
+    if channel_id in _responded_channels:
+        return False
+    _responded_channels.add(channel_id)
+    return await record_event(service, channel_id, "first_response", actor_id, at)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _day_bounds(day):
+    start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    start = int(start.timestamp())
+    return start, start + 86400
+
+
+def rollup_day(conn, day):
+    """Recompute the rollups of one UTC day from its events"""
+    start, end = _day_bounds(day)
+    rows = conn.execute(
+        """
+        SELECT t.service, t.type, e.event, e.actor_id, e.elapsed
+        FROM ticket_events e
+        JOIN tickets t ON t.id = e.ticket_row_id
+        WHERE e.at >= ? AND e.at < ?
+    """,
+        (start, end),
+    ).fetchall()
+
+    groups = defaultdict(list)
+    for service, ticket_type, event, actor_id, elapsed in rows:
+        groups[(service, "type", ticket_type or "unknown", event)].append(elapsed)
+        groups[(service, "type", ALL_TYPES, event)].append(elapsed)
+        if actor_id:
+            groups[(service, "helper", str(actor_id), event)].append(elapsed)
+
+    conn.execute("DELETE FROM ticket_sla_daily WHERE day = ?", (day,))
+    rollups = []
+    for (service, dimension, key, metric), values in groups.items():
+        values.sort()
+        rollups.append(
+            (
+                day,
+                service,
+                dimension,
+                key,
+                metric,
+                len(values),
+                percentile(values, 0.5),
+                percentile(values, 0.9),
+                sum(values) / len(values),
+            )
+        )
+    conn.executemany(
+        """
+        INSERT INTO ticket_sla_daily
+            (day, service, dimension, key, metric, count, p50, p90, average)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+        rollups,
+    )
+    return len(rollups)
+
+
+def rollup_ticket_sla(conn):
+    """Roll up every day that got events since the last run
+
+    Returns the number of days recomputed.
+    """
+    last_event_id = conn.execute(
+        "SELECT last_event_id FROM ticket_sla_rollup_state WHERE id = 1"
+    ).fetchone()[0]
+    max_event_id = conn.execute("SELECT MAX(id) FROM ticket_events").fetchone()[0]
+    if not max_event_id or max_event_id <= last_event_id:
+        return 0
+
+    days = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT DISTINCT date(at, 'unixepoch') FROM ticket_events
+            WHERE id > ? AND id <= ?
+        """,
+            (last_event_id, max_event_id),
+        )
+    ]
+    for day in days:
+        rollup_day(conn, day)
+
+    conn.execute(
+        "UPDATE ticket_sla_rollup_state SET last_event_id = ? WHERE id = 1",
+        (max_event_id,),
+    )
+    return len(days)
+
+
+def read_ticket_sla(conn, since_day, service=None):
+    """Summaries and daily series from the rollups (never the raw events)
+
+    p50/p90 over several days are count-weighted means of the daily values.
+    Returns (by_type, by_helper, daily) lists of rows.
+    """
+    service_filter = "AND service = ?" if service else ""
+    params = (since_day, service) if service else (since_day,)
+
+    def summary(dimension):
+        return conn.execute(
+            f"""
+            SELECT key, metric, SUM(count) AS count,
+                   CAST(ROUND(SUM(p50 * count) * 1.0 / SUM(count)) AS INTEGER) AS p50,
+                   CAST(ROUND(SUM(p90 * count) * 1.0 / SUM(count)) AS INTEGER) AS p90,
+                   SUM(average * count) / SUM(count) AS average
+            FROM ticket_sla_daily
+            WHERE dimension = ? AND day >= ? {service_filter}
+            GROUP BY key, metric
+            ORDER BY key, metric
+        """,
+            (dimension, *params),
+        ).fetchall()
+
+    daily = conn.execute(
+        f"""
+        SELECT day, metric, SUM(count) AS count,
+               CAST(ROUND(SUM(p50 * count) * 1.0 / SUM(count)) AS INTEGER) AS p50,
+               CAST(ROUND(SUM(p90 * count) * 1.0 / SUM(count)) AS INTEGER) AS p90
+        FROM ticket_sla_daily
+        WHERE dimension = 'type' AND key = '{ALL_TYPES}' AND day >= ? {service_filter}
+        GROUP BY day, metric
+        ORDER BY day, metric
+    """,
+        params,
+    ).fetchall()
+    return summary("type"), summary("helper"), daily
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
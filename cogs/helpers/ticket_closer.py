@@ -0,0 +1,257 @@
+"""
+Helper module for closing tickets with full transcript generation
+Used by the web UI close jobs and the stale-ticket sweeper
+"""
+
+import asyncio
+import discord
+from typing import Dict, Any, Optional
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB
+from cogs.helpers.logger import logger
+from cogs.helpers.transcript import build_transcript
+from cogs.helpers.transcript_store import archive_transcript
+from cogs.helpers.ticket_search import index_transcript_messages
+from cogs.helpers.ticket_panels import ticket_panels
+from cogs.helpers.ticket_state import ticket_state
+from cogs.helpers.ticket_analytics import record_event
+from cogs.helpers.transcript_delivery import (
+    run_concurrently,
+    upload_transcript,
+    dm_transcript,
+    transcript_stored,
+)
+
+
+async def close_ticket_with_transcript(
+    ticket_id: int,
+    bot_instance,
+    closed_by_username: str,
+    progress=None,
+    channel_id: Optional[int] = None,
+    closed_via: str = "Web UI",
+) -> Dict[str, Any]:
+    """
+    Close a ticket with full transcript creation, matching Discord behavior
+
+    Args:
+        ticket_id: The ticket ID to close
+        bot_instance: The Discord bot instance
+        closed_by_username: Username of who closed the ticket (for logging)
+        progress: Optional callback(step, message) called as the close advances
+        channel_id: Look the ticket up by channel instead of ticket ID
+        closed_via: Where the close came from (shown in the embeds)
+
+    Returns:
+        Dict with success status and message
+    """
+
+    def report(step, message):
+        if progress:
+            progress(step, message)
+
+    try:
+        report("lookup", "Looking up ticket")
+        db = get_db(TICKET_SYSTEM_DB)
+
+        # Ticket ids are not unique across guilds, prefer the open one
+        lookup = "channel_id" if channel_id else "ticket_id"
+        result = await db.fetchone(
+            f"""SELECT service, guild_id, member_id, ticket_id, channel_id, closed, locked,
+                      claimed, claimed_by, type, created_by, opened
+               FROM tickets WHERE {lookup} = ?
+               ORDER BY closed, opened DESC LIMIT 1""",
+            (channel_id or ticket_id,),
+        )
+
+        if not result:
+            return {"success": False, "message": "Ticket not found"}
+
+        (
+            table_prefix,
+            guild_id,
+            member_id,
+            ticket_id,
+            channel_id,
+            closed,
+            locked,
+            claimed,
+            claimed_by,
+            ticket_type,
+            created_by,
+            opened,
+        ) = result
+
+        if closed:
+            return {"success": False, "message": "Ticket is already closed"}
+
+        # Get channel and guild
+        channel = bot_instance.get_channel(int(channel_id))
+        guild = bot_instance.get_guild(int(guild_id))
+
+        if not channel or not guild:
+            return {"success": False, "message": "Channel or guild not found"}
+
+        # Get transcripts channel ID from setup
+        setup_result = await ticket_panels.get(table_prefix, guild_id)
+
+        if not setup_result:
+            # Without a setup there is nowhere to upload to; keep the ticket open
+            logger.error(
+                f"No {table_prefix} ticket setup for guild {guild_id}, ticket {ticket_id} stays open"
+            )
+            return {
+                "success": False,
+                "message": "Ticket setup not found, ticket left open",
+            }
+
+        transcripts_channel_id = setup_result["transcripts_id"]
+
+        report("transcript", "Creating transcript")
+
+        # Render the transcript, counting messages and participants on the way
+        logger.debug(f"Creating transcript for ticket {ticket_id}")
+        transcript = await build_transcript(
+            channel,
+            f"transcript-{table_prefix}-{ticket_id}.html",
+            tz_info="UTC",
+            military_time=False,
+            bot=bot_instance,
+        )
+
+        if transcript is None:
+            # Deleting the channel now would lose the history; retry later
+            logger.error(
+                f"Transcript creation failed for ticket {ticket_id}, ticket stays open"
+            )
+            return {
+                "success": False,
+                "message": "Transcript creation failed, ticket left open",
+            }
+
+        message_count = transcript.message_count
+
+        logger.debug(
+            f"Transcript created: {message_count} messages, {transcript.participant_count} participants"
+        )
+
+        # Create transcript embed
+        transcript_embed = discord.Embed(
+            title=f"📑 {table_prefix.upper()} Ticket Transcript: #{ticket_id}",
+            description=f"**Ticket Information**\n"
+            f"Ticket ID: `{ticket_id}`\n"
+            f"Type: `{table_prefix.upper()}-{ticket_type}`\n"
+            f"Closed by: {closed_via} ({closed_by_username})\n"
+            f"Messages: `{message_count}`\n"
+            f"Participants: `{transcript.participant_count}`\n\n"
+            f"The complete transcript is attached as an HTML file which can be downloaded and opened in any browser.",
+            color=discord.Color.blue(),
+            timestamp=discord.utils.utcnow(),
+        )
+
+        # Add thumbnail
+        if table_prefix == "plex":
+            transcript_embed.set_thumbnail(
+                url="https://github.com/cyb3rgh05t/brands-logos/blob/master/StreamNet/club/discord/splex.png?raw=true"
+            )
+        else:
+            transcript_embed.set_thumbnail(
+                url="https://github.com/cyb3rgh05t/brands-logos/blob/master/StreamNet/club/discord/s_tv.png?raw=true"
+            )
+
+        transcript_embed.set_footer(
+            text=f"{guild.name} • Support System",
+            icon_url=guild.icon.url if guild.icon else None,
+        )
+
+        transcripts_channel = guild.get_channel(transcripts_channel_id)
+        ticket_creator = guild.get_member(created_by)
+
+        report("delivering", "Uploading transcript and closing ticket")
+        # Store the transcript first; the ticket is only closed once it is kept somewhere
+        steps = {
+            # Keep a local copy for the web UI
+            "archive": archive_transcript(
+                transcript,
+                service=table_prefix,
+                guild_id=guild_id,
+                ticket_id=ticket_id,
+                channel_id=channel_id,
+                member_id=created_by,
+                type=ticket_type,
+                opened=opened,
+            ),
+            "index": index_transcript_messages(transcript, table_prefix, channel_id),
+        }
+        if transcripts_channel:
+            steps["upload"] = upload_transcript(
+                transcripts_channel, transcript, transcript_embed
+            )
+        label = f"{closed_via} close of ticket {ticket_id}"
+        outcome = await run_concurrently(label, **steps)
+        if not transcript_stored(outcome):
+            transcript.close()
+            logger.error(
+                f"Transcript of ticket {ticket_id} could not be stored, ticket stays open"
+            )
+            return {
+                "success": False,
+                "message": "Transcript could not be archived or uploaded, ticket left open",
+            }
+
+        steps = {
+            "close": ticket_state.close(channel_id, table_prefix),
+            "sla": record_event(table_prefix, channel_id, "closed"),
+        }
+        if ticket_creator:
+            user_embed = discord.Embed(
+                title=f"📑 Dein {table_prefix.upper()} Ticket wurde geschlossen",
+                description=f"**Ticket Details**\n"
+                f"Ticket ID: `{ticket_id}`\n"
+                f"Typ: `{table_prefix.upper()}-{ticket_type}`\n"
+                f"Geschlossen von: {closed_via}\n"
+                f"Nachrichten: `{message_count}`\n\n"
+                f"Eine vollständige Kopie des Gesprächsverlaufs ist als HTML-Datei angehängt.",
+                color=discord.Color.blue(),
+                timestamp=discord.utils.utcnow(),
+            )
+
+            if table_prefix == "plex":
+                user_embed.set_thumbnail(
+                    url="https://github.com/cyb3rgh05t/brands-logos/blob/master/StreamNet/club/discord/splex.png?raw=true"
+                )
+            else:
+                user_embed.set_thumbnail(
+                    url="https://github.com/cyb3rgh05t/brands-logos/blob/master/StreamNet/club/discord/s_tv.png?raw=true"
+                )
+
+            user_embed.set_footer(
+                text=f"{guild.name} • Support System",
+                icon_url=guild.icon.url if guild.icon else None,
+            )
+
+            steps["dm"] = dm_transcript(
+                ticket_creator,
+                transcript,
+                user_embed,
+                notice_channel=transcripts_channel,
+                notice=f"{ticket_creator.mention} konnte nicht über DMs erreicht werden.",
+            )
+        await run_concurrently(label, **steps)
+        transcript.close()
+        logger.info(f"Ticket {ticket_id} marked as closed in database")
+
+        # Delete the channel after a brief delay
+        report("deleting", "Deleting ticket channel")
+        await asyncio.sleep(3)
+        await channel.delete(reason=f"Ticket {ticket_id} closed via {closed_via}")
+
+        logger.info(f"Channel {channel.name} deleted")
+
+        return {
+            "success": True,
+            "message": "Ticket closed successfully with transcript",
+        }
+
+    except Exception as e:
+        logger.exception(f"Error in close_ticket_with_transcript: {e}")
+        return {"success": False, "message": f"Error: {str(e)}"}
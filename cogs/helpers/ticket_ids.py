@@ -0,0 +1,100 @@
+"""
+Per-guild ticket number sequence
+Ticket numbers are allocated from the ticket_sequences table in
+ticket_system.db with a single UPSERT statement, so concurrent ticket
+buttons never get the same number and never need to retry
+"""
+
+from cogs.helpers.logger import logger
+
+# First ticket number of a guild without tickets (keeps the familiar 5 digits)
+TICKET_ID_START = 10000
+
+
+def ensure_ticket_sequences(conn):
+    """Create the sequence table and seed it from the existing tickets"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ticket_sequences (
+            guild_id INTEGER PRIMARY KEY,
+            last_ticket_id INTEGER NOT NULL
+        )
+    """
+    )
+    conn.execute(
+        """
+        INSERT INTO ticket_sequences (guild_id, last_ticket_id)
+        SELECT guild_id, MAX(ticket_id) FROM tickets
+        WHERE ticket_id IS NOT NULL
+        GROUP BY guild_id
+        ON CONFLICT(guild_id) DO UPDATE SET
+            last_ticket_id = MAX(last_ticket_id, excluded.last_ticket_id)
+    """
+    )
+
+
+def renumber_ticket_collisions(conn):
+    """Give every ticket that shares its guild's ticket number a new one
+
+    The oldest ticket keeps the number, the others get numbers after the
+    guild's current maximum. Returns [(row id, old number, new number)].
+    """
+    duplicates = conn.execute(
+        """
+        SELECT id, guild_id, ticket_id FROM (
+            SELECT id, guild_id, ticket_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY guild_id, ticket_id ORDER BY opened, id
+                   ) AS position
+            FROM tickets
+            WHERE ticket_id IS NOT NULL
+        )
+        WHERE position > 1
+        ORDER BY guild_id, id
+    """
+    ).fetchall()
+    if not duplicates:
+        return []
+
+    last_ids = dict(
+        conn.execute(
+            "SELECT guild_id, MAX(ticket_id) FROM tickets GROUP BY guild_id"
+        ).fetchall()
+    )
+
+    renumbered = []
+    for row_id, guild_id, old_ticket_id in duplicates:
+        last_ids[guild_id] += 1
+        renumbered.append((row_id, old_ticket_id, last_ids[guild_id]))
+
+    conn.executemany(
+        "UPDATE tickets SET ticket_id = ? WHERE id = ?",
+        [(new_id, row_id) for row_id, _, new_id in renumbered],
+    )
+    for row_id, old_ticket_id, new_id in renumbered:
+        logger.warning(
+            f"[DB] Renumbered duplicate ticket #{old_ticket_id} (row {row_id}) to #{new_id}"
+        )
+    return renumbered
+
+
+def allocate_ticket_id(conn, guild_id):
+    """Reserve the next ticket number of a guild (atomic, run via db.run)
+
+    A guild without a sequence row starts after its highest existing
+    ticket number, or at TICKET_ID_START.
+    """
+    return conn.execute(
+        """
+        INSERT INTO ticket_sequences (guild_id, last_ticket_id)
+        VALUES (?, COALESCE((SELECT MAX(ticket_id) FROM tickets WHERE guild_id = ?) + 1, ?))
+        ON CONFLICT(guild_id) DO UPDATE SET last_ticket_id = last_ticket_id + 1
+        RETURNING last_ticket_id
+    """,
+        (guild_id, guild_id, TICKET_ID_START),
+    ).fetchone()[0]
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
@@ -0,0 +1,70 @@
+"""
+Process-wide cache of ticket panel configuration
+The {service}_ticket_panel rows only change when a ticket setup command
+runs, so they are loaded once and served from memory to the ticket buttons
+and the web API. BaseTicketSetup.save_ticket_panel refreshes the cached row
+after every write
+"""
+
+import sqlite3
+import threading
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB
+from cogs.helpers.logger import logger
+
+TICKET_SERVICES = ("plex", "tv")
+
+
+class TicketPanelCache:
+    """Ticket panel rows keyed by (service, guild_id)"""
+
+    def __init__(self):
+        self._panels = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _read_all(self, conn):
+        panels = {}
+        for service in TICKET_SERVICES:
+            try:
+                rows = conn.execute(f"SELECT * FROM {service}_ticket_panel").fetchall()
+            except sqlite3.OperationalError:
+                # Panel table not created yet
+                continue
+            for row in rows:
+                panels[(service, row["guild_id"])] = row
+        return panels
+
+    async def load(self):
+        """(Re)load every panel without blocking the event loop"""
+        panels = await get_db(TICKET_SYSTEM_DB).run(self._read_all)
+        with self._lock:
+            self._panels = panels
+            self._loaded = True
+        logger.debug(f"[TICKETS] Cached {len(panels)} ticket panel configs")
+        return len(panels)
+
+    async def get(self, service, guild_id):
+        """Panel row of a guild (None if the service is not set up there)"""
+        if not self._loaded:
+            await self.load()
+        return self._panels.get((service, guild_id))
+
+    async def refresh(self, service, guild_id):
+        """Re-read one panel after it was written"""
+        row = await get_db(TICKET_SYSTEM_DB).fetchone(
+            f"SELECT * FROM {service}_ticket_panel WHERE guild_id = ?", (guild_id,)
+        )
+        with self._lock:
+            if row:
+                self._panels[(service, guild_id)] = row
+            else:
+                self._panels.pop((service, guild_id), None)
+        return row
+
+
+ticket_panels = TicketPanelCache()
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
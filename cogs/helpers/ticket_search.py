@@ -0,0 +1,354 @@
+"""
+Full-text search over closed-ticket messages
+Messages are stored in ticket_messages (ticket_system.db) when a ticket is
+closed and indexed by the ticket_messages_fts FTS5 table. Older tickets can
+be backfilled from the local transcript archive
+"""
+
+import asyncio
+import html
+import re
+from html.parser import HTMLParser
+import discord
+from cogs.helpers.db import get_db, escape_like, TICKET_SYSTEM_DB, TRANSCRIPTS_DB
+from cogs.helpers.logger import logger
+
+# Discord snowflakes carry their creation time (ms since 2015-01-01)
+DISCORD_EPOCH_MS = 1420070400000
+
+# Markers around matched terms in search snippets
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_TOKENS = 16
+
+# Name of the transcript files the close flows upload
+TRANSCRIPT_FILENAME = re.compile(r"^transcript-([a-z]+)-(\d+)\.html$")
+
+
+def has_message_fts(conn):
+    """Check whether the FTS5 message index exists in this database"""
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'ticket_messages_fts'"
+        ).fetchone()
+        is not None
+    )
+
+
+def index_ticket_messages(conn, ticket_row_id, messages):
+    """Add (message_id, author_id, author_name, created_at, text) rows to the index
+
+    Already indexed messages are skipped, so indexing is safe to repeat.
+    Returns the number of new messages.
+    """
+    cursor = conn.executemany(
+        """
+        INSERT OR IGNORE INTO ticket_messages
+            (ticket_row_id, message_id, author_id, author_name, created_at, content)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+        [(ticket_row_id, *message) for message in messages],
+    )
+    return max(cursor.rowcount, 0)
+
+
+def index_closed_ticket(conn, service, channel_id, messages):
+    """Index the messages of a ticket identified by service and channel"""
+    row = conn.execute(
+        "SELECT id FROM tickets WHERE service = ? AND channel_id = ?",
+        (service, channel_id),
+    ).fetchone()
+    if not row:
+        return 0
+    return index_ticket_messages(conn, row[0], messages)
+
+
+async def index_transcript_messages(transcript, service, channel_id):
+    """Index the messages collected while rendering a transcript; errors are logged"""
+    try:
+        added = await get_db(TICKET_SYSTEM_DB).run(
+            index_closed_ticket, service, channel_id, transcript.messages
+        )
+        logger.debug(f"[TICKET SEARCH] Indexed {added} messages of {service} ticket")
+        return added
+    except Exception as e:
+        logger.error(f"[TICKET SEARCH] Could not index ticket messages: {e}")
+        return 0
+
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query matching all terms (prefix match on the last)"""
+    terms = [term.replace('"', '""') for term in text.split()]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_ticket_messages(conn, text, service=None, limit=20, offset=0):
+    """Rank closed-ticket messages matching text, best first
+
+    Returns rows with ticket_id, service, ticket_type, message_id, author_name,
+    created_at and an HTML-escaped snippet with matches wrapped in <mark>.
+    """
+    service_filter = "AND t.service = ?" if service else ""
+    service_params = [service] if service else []
+
+    if has_message_fts(conn):
+        query = _fts_query(text)
+        if not query:
+            return []
+        rows = conn.execute(
+            f"""
+            SELECT t.ticket_id, t.service, t.type AS ticket_type, m.message_id,
+                   m.author_name, m.created_at,
+                   snippet(ticket_messages_fts, 0, char(1), char(2), ' … ', {SNIPPET_TOKENS}) AS snippet,
+                   bm25(ticket_messages_fts) AS score
+            FROM ticket_messages_fts
+            JOIN ticket_messages m ON m.id = ticket_messages_fts.rowid
+            JOIN tickets t ON t.id = m.ticket_row_id
+            WHERE ticket_messages_fts MATCH ? {service_filter}
+            ORDER BY score
+            LIMIT ? OFFSET ?
+        """,
+            (query, *service_params, limit, offset),
+        ).fetchall()
+    else:
+        # No FTS5: unranked substring match, newest first
+        rows = conn.execute(
+            f"""
+            SELECT t.ticket_id, t.service, t.type AS ticket_type, m.message_id,
+                   m.author_name, m.created_at, m.content AS snippet, 0 AS score
+            FROM ticket_messages m
+            JOIN tickets t ON t.id = m.ticket_row_id
+            WHERE m.content LIKE ? ESCAPE '\\' {service_filter}
+            ORDER BY m.created_at DESC
+            LIMIT ? OFFSET ?
+        """,
+            (f"%{escape_like(text)}%", *service_params, limit, offset),
+        ).fetchall()
+
+    results = []
+    for row in rows:
+        result = dict(row)
+        # Escape the message text, then turn the match markers into <mark> tags
+        result["snippet"] = (
+            html.escape(result["snippet"] or "")
+            .replace("\x01", SNIPPET_START)
+            .replace("\x02", SNIPPET_END)
+        )
+        results.append(result)
+    return results
+
+
+class TranscriptMessageParser(HTMLParser):
+    """Extract messages from a chat_exporter transcript
+
+    Collects (message_id, author_id, author_name, created_at, text) tuples.
+    Continuation messages inherit the author of their message group.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.messages = []
+        self._depth = 0
+        self._message_id = None
+        self._author_id = None
+        self._author_name = None
+        self._in_author = False
+        self._content_depth = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+
+        if tag == "span" and "chatlog__author-name" in classes:
+            self._author_id = attrs.get("data-user-id")
+            self._author_name = ""
+            self._in_author = True
+        elif tag == "br" and self._content_depth is not None:
+            self._text.append("\n")
+
+        if tag != "div":
+            return
+        self._depth += 1
+        if "chatlog__message-container" in classes:
+            self._finish()
+            self._message_id = attrs.get("data-message-id")
+        elif "chatlog__content" in classes and self._message_id:
+            self._content_depth = self._depth
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag == "span" and self._in_author:
+            self._in_author = False
+        elif tag == "div":
+            if self._content_depth is not None and self._depth == self._content_depth:
+                self._content_depth = None
+                self._finish()
+            self._depth -= 1
+        elif tag in ("p", "li") and self._content_depth is not None:
+            self._text.append("\n")
+
+    def handle_data(self, data):
+        if self._in_author:
+            self._author_name += data
+        elif self._content_depth is not None:
+            self._text.append(data)
+
+    def _finish(self):
+        """Store the message collected so far"""
+        if not self._message_id:
+            return
+        text = " ".join(" ".join(self._text).split())
+        try:
+            message_id = int(self._message_id)
+        except ValueError:
+            message_id = None
+        if text and message_id:
+            created_at = ((message_id >> 22) + DISCORD_EPOCH_MS) // 1000
+            author_id = int(self._author_id) if self._author_id else None
+            self.messages.append(
+                (
+                    message_id,
+                    author_id,
+                    (self._author_name or "").strip() or None,
+                    created_at,
+                    text,
+                )
+            )
+        self._message_id = None
+        self._text = []
+
+    def close(self):
+        super().close()
+        self._finish()
+
+
+def parse_transcript_messages(transcript_html):
+    """Extract the messages of a stored transcript"""
+    parser = TranscriptMessageParser()
+    parser.feed(transcript_html.decode("utf-8", errors="replace"))
+    parser.close()
+    return parser.messages
+
+
+def backfill_ticket_messages(limit=None):
+    """Index archived transcripts of tickets that have no indexed messages yet
+
+    Runs synchronously (call it in a worker thread). Returns
+    (tickets_indexed, messages_indexed).
+    """
+    from cogs.helpers.transcript_store import load_transcript_html
+
+    transcripts_db = get_db(TRANSCRIPTS_DB)
+    tickets_db = get_db(TICKET_SYSTEM_DB)
+    if not transcripts_db.exists():
+        return 0, 0
+
+    archived = transcripts_db.fetchall_sync(
+        "SELECT service, channel_id, etag FROM transcripts ORDER BY closed_at DESC"
+    )
+
+    tickets_indexed = 0
+    messages_indexed = 0
+    for row in archived:
+        if limit is not None and tickets_indexed >= limit:
+            break
+
+        ticket = tickets_db.fetchone_sync(
+            """
+            SELECT t.id, EXISTS (
+                SELECT 1 FROM ticket_messages m WHERE m.ticket_row_id = t.id
+            ) AS indexed
+            FROM tickets t WHERE t.service = ? AND t.channel_id = ?
+        """,
+            (row["service"], row["channel_id"]),
+        )
+        if not ticket or ticket["indexed"]:
+            continue
+
+        try:
+            messages = parse_transcript_messages(load_transcript_html(row["etag"]))
+        except FileNotFoundError:
+            logger.warning(
+                f"[TICKET SEARCH] Transcript file missing for {row['service']} channel {row['channel_id']}"
+            )
+            continue
+
+        messages_indexed += tickets_db.run_sync(
+            index_ticket_messages, ticket["id"], messages
+        )
+        tickets_indexed += 1
+
+    logger.info(
+        f"[TICKET SEARCH] Backfilled {messages_indexed} messages from {tickets_indexed} transcripts"
+    )
+    return tickets_indexed, messages_indexed
+
+
+def _unindexed_ticket(conn, service, guild_id, ticket_id):
+    """Row id of a closed ticket without indexed messages (None if indexed or unknown)"""
+    row = conn.execute(
+        """
+        SELECT t.id, EXISTS (
+            SELECT 1 FROM ticket_messages m WHERE m.ticket_row_id = t.id
+        ) AS indexed
+        FROM tickets t
+        WHERE t.service = ? AND t.guild_id = ? AND t.ticket_id = ? AND t.closed = 1
+        ORDER BY t.opened DESC LIMIT 1
+    """,
+        (service, guild_id, ticket_id),
+    ).fetchone()
+    if not row or row["indexed"]:
+        return None
+    return row["id"]
+
+
+async def backfill_from_channel(channel, limit=None):
+    """Index transcripts attached in a transcript channel
+
+    Tickets closed before the local archive existed only have the uploaded
+    attachment. Returns (tickets_indexed, messages_indexed).
+    """
+    db = get_db(TICKET_SYSTEM_DB)
+    tickets_indexed = 0
+    messages_indexed = 0
+    async for message in channel.history(limit=None):
+        for attachment in message.attachments:
+            match = TRANSCRIPT_FILENAME.match(attachment.filename)
+            if not match:
+                continue
+            if limit is not None and tickets_indexed >= limit:
+                return tickets_indexed, messages_indexed
+
+            service, ticket_id = match.group(1), int(match.group(2))
+            row_id = await db.run(
+                _unindexed_ticket, service, channel.guild.id, ticket_id
+            )
+            if row_id is None:
+                continue
+            try:
+                data = await attachment.read()
+            except discord.HTTPException as e:
+                logger.warning(
+                    f"[TICKET SEARCH] Could not download {attachment.filename}: {e}"
+                )
+                continue
+
+            messages = await asyncio.to_thread(parse_transcript_messages, data)
+            messages_indexed += await db.run(index_ticket_messages, row_id, messages)
+            tickets_indexed += 1
+
+    logger.info(
+        f"[TICKET SEARCH] Backfilled {messages_indexed} messages from {tickets_indexed} "
+        f"attachments in #{channel.name}"
+    )
+    return tickets_indexed, messages_indexed
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
@@ -0,0 +1,222 @@
+"""
+Live state of open tickets
+Open tickets are loaded once from ticket_system.db and kept in memory keyed
+by channel id, so the lock/unlock/claim/close buttons answer without waiting
+for SQLite. State changes are applied in memory at once and written back in
+the background, one UPDATE per ticket with every changed column
+"""
+
+import asyncio
+import threading
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB
+from cogs.helpers.event_bus import event_bus
+from cogs.helpers.logger import logger
+
+# Columns of a ticket state, in the order fetch_ticket_data returns them
+TICKET_STATE_COLUMNS = (
+    "guild_id",
+    "member_id",
+    "ticket_id",
+    "channel_id",
+    "closed",
+    "locked",
+    "claimed",
+    "claimed_by",
+    "type",
+    "created_by",
+    "opened",
+)
+
+# Activity columns kept in memory for the stale-ticket sweeper
+TICKET_ACTIVITY_COLUMNS = ("last_activity", "stale_warned_at")
+
+# Seconds between last_activity writes while a ticket is busy
+ACTIVITY_RESOLUTION = 60
+
+# Seconds changes are held back so quick successive presses share one write
+FLUSH_DELAY = 1.0
+
+# Seconds before a failed write is retried
+RETRY_DELAY = 5.0
+
+# Discord refuses new channels in a category that already holds this many
+CATEGORY_CHANNEL_LIMIT = 50
+
+
+class OpenTicketState:
+    """Open tickets keyed by channel_id, with write-behind persistence
+
+    Mutate only from the bot loop; other threads may read.
+    """
+
+    def __init__(self, flush_delay=FLUSH_DELAY):
+        self.flush_delay = flush_delay
+        self._tickets = {}  # channel_id -> state dict
+        self._pending = {}  # (service, channel_id) -> {column: value}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._flush_task = None
+        self._flush_lock = None
+
+    def _read_open(self, conn):
+        rows = conn.execute(
+            f"""
+            SELECT service, {", ".join(TICKET_STATE_COLUMNS + TICKET_ACTIVITY_COLUMNS)}
+            FROM tickets WHERE closed = 0
+        """
+        ).fetchall()
+        return {row["channel_id"]: dict(row) for row in rows}
+
+    def load_sync(self):
+        """(Re)load every open ticket from the database (blocking)"""
+        tickets = get_db(TICKET_SYSTEM_DB).run_sync(self._read_open)
+        self._replace(tickets)
+        return len(tickets)
+
+    async def load(self):
+        """(Re)load every open ticket without blocking the event loop"""
+        tickets = await get_db(TICKET_SYSTEM_DB).run(self._read_open)
+        self._replace(tickets)
+        return len(tickets)
+
+    def _replace(self, tickets):
+        with self._lock:
+            # Changes not written yet are newer than the database
+            for (service, channel_id), changes in self._pending.items():
+                if channel_id in tickets:
+                    tickets[channel_id].update(changes)
+            self._tickets = {
+                channel_id: state
+                for channel_id, state in tickets.items()
+                if not state["closed"]
+            }
+            self._loaded = True
+        logger.debug(f"[TICKETS] Cached state of {len(tickets)} open tickets")
+
+    async def get(self, channel_id, service=None):
+        """Copy of an open ticket's state (None if unknown, closed or another service)"""
+        if not self._loaded:
+            await self.load()
+        state = self._tickets.get(channel_id)
+        if state is None or (service and state["service"] != service):
+            return None
+        return dict(state)
+
+    def open_tickets(self, service=None):
+        """Copies of every open ticket's state"""
+        with self._lock:
+            states = list(self._tickets.values())
+        return [
+            dict(state)
+            for state in states
+            if not service or state["service"] == service
+        ]
+
+    def add(self, service, **state):
+        """Track a ticket that was just saved to the database"""
+        state["service"] = service
+        with self._lock:
+            self._tickets[state["channel_id"]] = state
+
+    def update(self, channel_id, service, **changes):
+        """Apply changes at once and queue them for the database
+
+        Closing a ticket (closed=True) drops it from the open tickets. Works
+        for tickets that are not cached too; only the write is queued then.
+        """
+        with self._lock:
+            state = self._tickets.get(channel_id)
+            if state is not None:
+                state.update(changes)
+                if state["closed"]:
+                    del self._tickets[channel_id]
+            self._pending.setdefault((service, channel_id), {}).update(changes)
+        self._schedule(self.flush_delay)
+
+    def touch(self, channel_id, at):
+        """Note a message in an open ticket; clears a pending stale warning
+
+        last_activity is only rewritten once per ACTIVITY_RESOLUTION.
+        """
+        state = self._tickets.get(channel_id)
+        if state is None:
+            return
+        if (
+            state.get("stale_warned_at")
+            or at - (state.get("last_activity") or 0) >= ACTIVITY_RESOLUTION
+        ):
+            self.update(
+                channel_id, state["service"], last_activity=at, stale_warned_at=None
+            )
+
+    async def close(self, channel_id, service):
+        """Mark a ticket closed and write it to the database right away"""
+        state = self._tickets.get(channel_id) or {}
+        self.update(channel_id, service, closed=True)
+        await self.flush()
+        event_bus.publish(
+            "ticket_closed",
+            service=service,
+            channel_id=channel_id,
+            ticket_id=state.get("ticket_id"),
+            type=state.get("type"),
+        )
+
+    def _schedule(self, delay):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._flush_later(delay)
+            )
+
+    async def _flush_later(self, delay):
+        await asyncio.sleep(delay)
+        # Changes queued while this flush runs schedule the next one
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Write every queued change now; returns the number of tickets written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            try:
+                await get_db(TICKET_SYSTEM_DB).run(_write_ticket_changes, pending)
+            except Exception as e:
+                logger.error(
+                    f"[TICKETS] Could not save state of {len(pending)} tickets, retrying: {e}"
+                )
+                with self._lock:
+                    # Keep changes made while the write was running
+                    for key, changes in pending.items():
+                        newer = self._pending.setdefault(key, {})
+                        for column, value in changes.items():
+                            newer.setdefault(column, value)
+                self._schedule(RETRY_DELAY)
+                return 0
+
+            logger.debug(f"[TICKETS] Saved state of {len(pending)} tickets")
+            return len(pending)
+
+
+def _write_ticket_changes(conn, pending):
+    """One UPDATE per ticket, all in one transaction"""
+    for (service, channel_id), changes in pending.items():
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        conn.execute(
+            f"UPDATE tickets SET {assignments} WHERE channel_id = ? AND service = ?",
+            (*changes.values(), channel_id, service),
+        )
+
+
+ticket_state = OpenTicketState()
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
@@ -0,0 +1,181 @@
+"""
+Single-pass ticket transcripts
+The channel history is read once, message and participant counts are
+collected while streaming it, and the rendered HTML is written to a spooled
+temporary file that is reused for every upload (transcript channel and DM).
+chat_exporter renders from a complete message list into one string, so
+while a transcript is rendered the messages and the HTML are both in memory;
+only the buffer is kept afterwards
+"""
+
+import io
+import tempfile
+import threading
+import discord
+import chat_exporter
+from cogs.helpers.logger import logger
+
+# Transcripts larger than this are spooled to disk instead of kept in memory
+TRANSCRIPT_SPOOL_SIZE = 4 * 1024 * 1024
+
+# Characters encoded per write when copying the rendered HTML into the buffer
+TRANSCRIPT_WRITE_CHUNK = 64 * 1024
+
+
+def message_text(message):
+    """Searchable text of a message: its content plus embed titles, descriptions and fields"""
+    parts = [message.content] if message.content else []
+    for embed in message.embeds:
+        parts.extend(part for part in (embed.title, embed.description) if part)
+        for field in embed.fields:
+            parts.extend(part for part in (field.name, field.value) if part)
+    return "\n".join(parts)
+
+
+class TranscriptReader(io.RawIOBase):
+    """Read-only view of a TranscriptBuffer with its own position
+
+    Several readers can stream the same buffer at once (aiohttp reads upload
+    bodies from worker threads), the buffer lock keeps seek+read atomic.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._buffer.size
+        self._position = max(offset, 0)
+        return self._position
+
+    def readinto(self, b):
+        data = self._buffer.read_at(self._position, len(b))
+        b[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class TranscriptBuffer:
+    """Rendered transcript HTML plus the counts collected while rendering it"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.message_count = 0
+        self.participants = set()
+        # (message_id, author_id, author_name, created_at, text) for the search index
+        self.messages = []
+        self.size = 0
+        self._fp = tempfile.SpooledTemporaryFile(
+            max_size=TRANSCRIPT_SPOOL_SIZE, mode="w+b"
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def participant_count(self):
+        """Number of non-bot members who wrote in the channel"""
+        return len(self.participants)
+
+    def add_message(self, message):
+        """Count a message from the history stream and keep its searchable text"""
+        self.message_count += 1
+        if not message.author.bot:
+            self.participants.add(message.author.id)
+
+        text = message_text(message)
+        if text:
+            self.messages.append(
+                (
+                    message.id,
+                    message.author.id,
+                    message.author.display_name,
+                    int(message.created_at.timestamp()),
+                    text,
+                )
+            )
+
+    def write(self, text):
+        """Append text to the buffer, encoding it chunk by chunk"""
+        with self._lock:
+            self._fp.seek(0, io.SEEK_END)
+            for start in range(0, len(text), TRANSCRIPT_WRITE_CHUNK):
+                chunk = text[start : start + TRANSCRIPT_WRITE_CHUNK].encode()
+                self._fp.write(chunk)
+                self.size += len(chunk)
+
+    def read_at(self, position, size):
+        """Read up to size bytes starting at position"""
+        with self._lock:
+            self._fp.seek(position)
+            return self._fp.read(size)
+
+    def as_file(self):
+        """Return a discord.File over the start of the buffer
+
+        discord.File objects are single use, so call this once per send.
+        Files from separate calls can be uploaded at the same time.
+        """
+        return discord.File(
+            io.BufferedReader(TranscriptReader(self)), filename=self.filename
+        )
+
+    def read(self):
+        """Return the whole transcript as bytes (for archiving)"""
+        return self.read_at(0, self.size)
+
+    def close(self):
+        """Free the buffer (and its temporary file if it was spooled to disk)"""
+        with self._lock:
+            self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def build_transcript(channel, filename, **export_options):
+    """Render a channel transcript in a single pass over its history
+
+    export_options are passed to chat_exporter (tz_info, guild, bot,
+    military_time). Returns a TranscriptBuffer, or None if rendering failed.
+    Peak memory is the message list plus the rendered HTML string (chat_exporter
+    needs every message to resolve replies); both are released before returning.
+    """
+    transcript = TranscriptBuffer(filename)
+    try:
+        messages = []
+        async for message in channel.history(limit=None):
+            messages.append(message)
+            transcript.add_message(message)
+
+        html = await chat_exporter.raw_export(channel, messages, **export_options)
+        del messages
+        if not html:
+            transcript.close()
+            return None
+
+        transcript.write(html)
+        return transcript
+    except Exception as e:
+        logger.error(f"Error rendering transcript for channel {channel.name}: {e}")
+        transcript.close()
+        return None
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
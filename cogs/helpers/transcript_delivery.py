@@ -0,0 +1,104 @@
+"""
+Concurrent delivery of closed-ticket transcripts
+Once a transcript is rendered, the upload to the transcripts channel, the DM
+to the ticket creator and the database writes do not depend on each other,
+so they run at the same time. Uploads go through per-route semaphores keyed
+like discord.py's rate limit buckets, so closing several tickets at once
+queues sends per channel instead of running into 429 responses
+"""
+
+import asyncio
+import discord
+from discord.http import Route
+from cogs.helpers.logger import logger
+
+# Messages sent to one channel at the same time (Discord allows 5 per 5s)
+SENDS_PER_CHANNEL = 2
+
+# DMs opened at the same time (DM channel creation shares one bot-wide bucket)
+DMS_AT_ONCE = 2
+
+
+class RouteLimiter:
+    """One semaphore per Discord rate limit bucket (route + major parameters)"""
+
+    def __init__(self):
+        self._semaphores = {}
+
+    def limit(self, route, concurrency):
+        """Semaphore guarding a discord.http.Route"""
+        key = f"{route.key}:{route.major_parameters}"
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(concurrency)
+        return semaphore
+
+
+route_limiter = RouteLimiter()
+
+
+async def send_to_channel(channel, **kwargs):
+    """channel.send, queued behind other sends to the same channel"""
+    route = Route("POST", "/channels/{channel_id}/messages", channel_id=channel.id)
+    async with route_limiter.limit(route, SENDS_PER_CHANNEL):
+        return await channel.send(**kwargs)
+
+
+async def send_dm(member, **kwargs):
+    """member.send, queued behind other DMs the bot is opening"""
+    route = Route("POST", "/users/@me/channels")
+    async with route_limiter.limit(route, DMS_AT_ONCE):
+        return await member.send(**kwargs)
+
+
+async def run_concurrently(label, **steps):
+    """Await the named coroutines together; one failing does not stop the others
+
+    Failures are logged with the step name. Returns {name: result or exception}.
+    """
+    names = list(steps)
+    results = await asyncio.gather(*steps.values(), return_exceptions=True)
+    outcome = dict(zip(names, results))
+    for name, result in outcome.items():
+        if isinstance(result, Exception):
+            logger.error(f"[TRANSCRIPT] {label}: {name} failed: {result}")
+    return outcome
+
+
+def transcript_stored(outcome):
+    """True if the archive or the transcripts channel got the transcript
+
+    outcome is what run_concurrently returned for the "archive" and
+    "upload" steps. A ticket must not be closed and deleted otherwise.
+    """
+    archived = outcome.get("archive")
+    archived = archived is not None and not isinstance(archived, Exception)
+    return archived or outcome.get("upload") is True
+
+
+async def upload_transcript(channel, transcript, embed):
+    """Post the transcript to the transcripts channel; returns True"""
+    await send_to_channel(channel, embed=embed, file=transcript.as_file())
+    logger.info(f"Transcript saved to channel {channel.name}")
+    return True
+
+
+async def dm_transcript(member, transcript, embed, notice_channel=None, notice=None):
+    """DM the transcript; if DMs are closed, post notice in notice_channel
+
+    Returns True if the DM was delivered.
+    """
+    try:
+        await send_dm(member, embed=embed, file=transcript.as_file())
+    except discord.Forbidden:
+        logger.warning(f"Could not send transcript to {member.name} (DMs disabled).")
+        if notice_channel and notice:
+            await send_to_channel(notice_channel, content=notice)
+        return False
+    logger.info(f"Transcript sent to {member.name} via DM")
+    return True
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
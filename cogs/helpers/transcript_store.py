@@ -0,0 +1,202 @@
+"""
+Local archive of closed-ticket transcripts
+Transcripts are stored gzip-compressed under databases/transcripts/. The
+large inline <style>/<script> blocks every chat_exporter transcript repeats
+are stored once as content-addressed assets, and transcripts.db indexes the
+archive by ticket, member, type and date so the web UI can show old tickets
+without any Discord API calls
+"""
+
+import functools
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+from cogs.helpers.db import get_db, DB_DIR, TRANSCRIPTS_DB
+from cogs.helpers.logger import logger
+
+TRANSCRIPT_DIR = os.path.join(DB_DIR, "transcripts")
+BLOB_DIR = os.path.join(TRANSCRIPT_DIR, "blobs")
+ASSET_DIR = os.path.join(TRANSCRIPT_DIR, "assets")
+
+# Inline blocks at least this large are moved into the shared asset store
+ASSET_MIN_SIZE = 1024
+
+# gzip level for stored transcripts and assets (written once, read often)
+COMPRESS_LEVEL = 9
+
+# Reassembled transcripts kept in memory for repeated (range) requests
+HTML_CACHE_SIZE = 8
+
+_INLINE_BLOCK = re.compile(
+    rb"<style\b[^>]*>.*?</style>|<script\b(?![^>]*\bsrc=)[^>]*>.*?</script>",
+    re.DOTALL | re.IGNORECASE,
+)
+_ASSET_MARKER = re.compile(rb"<!--transcript-asset:([0-9a-f]{64})-->")
+
+
+def ensure_transcripts_table(conn):
+    """Create the transcript index table if it does not exist yet"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            service TEXT NOT NULL,
+            guild_id INTEGER NOT NULL,
+            ticket_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            member_id INTEGER,
+            closed_by INTEGER,
+            type TEXT,
+            opened INTEGER,
+            closed_at INTEGER NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            participant_count INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL,
+            stored_size INTEGER NOT NULL,
+            etag TEXT NOT NULL,
+            UNIQUE(service, channel_id)
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transcripts_ticket_id ON transcripts (ticket_id)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transcripts_member ON transcripts (member_id, closed_at)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transcripts_type ON transcripts (type, closed_at)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transcripts_closed_at ON transcripts (closed_at)"
+    )
+
+
+def _blob_path(etag):
+    return os.path.join(BLOB_DIR, f"{etag}.html.gz")
+
+
+def _asset_path(digest):
+    return os.path.join(ASSET_DIR, f"{digest}.gz")
+
+
+def _write_once(path, data):
+    """Write compressed data to a content-addressed path unless it already exists"""
+    if os.path.exists(path):
+        return 0
+    # Concurrent closes may write the same asset; each gets its own temp file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(gzip.compress(data, COMPRESS_LEVEL))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def split_assets(html):
+    """Move large inline blocks out of a transcript
+
+    Returns (stripped_html, {digest: block}) where each block is replaced
+    by a marker comment in stripped_html.
+    """
+    assets = {}
+
+    def _extract(match):
+        block = match.group(0)
+        if len(block) < ASSET_MIN_SIZE:
+            return block
+        digest = hashlib.sha256(block).hexdigest()
+        assets[digest] = block
+        return b"<!--transcript-asset:" + digest.encode() + b"-->"
+
+    return _INLINE_BLOCK.sub(_extract, html), assets
+
+
+def store_transcript(conn, transcript, **meta):
+    """Archive a rendered TranscriptBuffer and index it (blocking, run via db.run)
+
+    meta holds the index columns: service, guild_id, ticket_id, channel_id,
+    member_id, closed_by, type and opened. Returns the transcript row id.
+    """
+    html = transcript.read()
+    etag = hashlib.sha256(html).hexdigest()
+
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    os.makedirs(ASSET_DIR, exist_ok=True)
+
+    stripped, assets = split_assets(html)
+    for digest, block in assets.items():
+        _write_once(_asset_path(digest), block)
+    _write_once(_blob_path(etag), stripped)
+
+    cursor = conn.execute(
+        """
+        INSERT INTO transcripts (
+            service, guild_id, ticket_id, channel_id, member_id, closed_by, type,
+            opened, closed_at, message_count, participant_count, size, stored_size, etag
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(service, channel_id) DO UPDATE SET
+            closed_by = excluded.closed_by,
+            closed_at = excluded.closed_at,
+            message_count = excluded.message_count,
+            participant_count = excluded.participant_count,
+            size = excluded.size,
+            stored_size = excluded.stored_size,
+            etag = excluded.etag
+        RETURNING id
+    """,
+        (
+            meta["service"],
+            meta["guild_id"],
+            meta["ticket_id"],
+            meta["channel_id"],
+            meta.get("member_id"),
+            meta.get("closed_by"),
+            meta.get("type"),
+            meta.get("opened"),
+            int(time.time()),
+            transcript.message_count,
+            transcript.participant_count,
+            len(html),
+            os.path.getsize(_blob_path(etag)),
+            etag,
+        ),
+    )
+    logger.info(
+        f"[TRANSCRIPTS] Archived {meta['service']} ticket {meta['ticket_id']} "
+        f"({len(html)} bytes, {len(stripped)} after sharing {len(assets)} assets)"
+    )
+    return cursor.fetchone()[0]
+
+
+async def archive_transcript(transcript, **meta):
+    """Archive a transcript off the event loop; errors are logged, not raised"""
+    try:
+        return await get_db(TRANSCRIPTS_DB).run(store_transcript, transcript, **meta)
+    except Exception as e:
+        logger.error(
+            f"[TRANSCRIPTS] Could not archive {meta.get('service')} ticket {meta.get('ticket_id')}: {e}"
+        )
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def _load_asset(digest):
+    with open(_asset_path(digest), "rb") as f:
+        return gzip.decompress(f.read())
+
+
+@functools.lru_cache(maxsize=HTML_CACHE_SIZE)
+def load_transcript_html(etag):
+    """Decompress a stored transcript and put its shared assets back in"""
+    with open(_blob_path(etag), "rb") as f:
+        stripped = gzip.decompress(f.read())
+    return _ASSET_MARKER.sub(lambda m: _load_asset(m.group(1).decode()), stripped)
+
+
+# This is just a helper module, so we don't need to do anything here
+async def setup(bot):
+    pass
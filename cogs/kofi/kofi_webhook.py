@@ -18,6 +18,7 @@ from config.settings import (
     KOFI_LANGUAGE,
 )
 from cogs.helpers.logger import logger
+from cogs.helpers.event_bus import event_bus
 
 
 # Configure Flask to use our logger
@@ -693,6 +694,17 @@ class KofiWebhook(commands.Cog):
             await channel.send(embed=embed)
             logger.info(f"Sent Ko-fi notification to channel {channel.name}")
 
+            event_bus.publish(
+                "kofi_support",
+                type=kofi_data.get("type"),
+                from_name=kofi_data.get("from_name"),
+                amount=kofi_data.get("amount"),
+                currency=kofi_data.get("currency"),
+                tier_name=kofi_data.get("tier_name"),
+                is_subscription=bool(is_subscription),
+                timestamp=kofi_data.get("timestamp"),
+            )
+
         except Exception as e:
             logger.error(f"Error processing Ko-fi data: {str(e)}")
 
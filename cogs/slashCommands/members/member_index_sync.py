@@ -0,0 +1,75 @@
+from discord.ext import commands
+from config.settings import GUILD_ID
+from cogs.helpers.logger import logger
+from cogs.helpers.member_index import member_index
+
+
+class MemberIndexSync(commands.Cog):
+    """Keeps the web UI's member index in step with the gateway"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        # Reloaded after startup: on_ready will not fire again
+        if self.bot.is_ready():
+            self.bot.loop.create_task(self.build())
+
+    async def build(self):
+        guild = self.bot.get_guild(int(GUILD_ID))
+        if not guild:
+            logger.warning("[MEMBER INDEX] Guild not found, members page stays empty")
+            return
+        await member_index.build(guild)
+        logger.info(
+            f"[MEMBER INDEX] Indexed {len(member_index)} members and "
+            f"{len(member_index.roles())} roles"
+        )
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """(Re)build once the member cache is filled."""
+        await self.build()
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        member_index.upsert_member(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        member_index.remove_member(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Nickname, roles or guild avatar changed."""
+        member_index.upsert_member(after)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        """Username or avatar changed."""
+        guild = self.bot.get_guild(int(GUILD_ID))
+        member = guild.get_member(after.id) if guild else None
+        if member:
+            member_index.upsert_member(member)
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        if before.status != after.status:
+            member_index.update_status(after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        member_index.upsert_role(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        member_index.upsert_role(after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        member_index.remove_role(role.id)
+
+
+async def setup(bot):
+    await bot.add_cog(MemberIndexSync(bot))
+    logger.debug("MemberIndexSync cog loaded.")
@@ -2,29 +2,62 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 import asyncio
+import time
 import os
-from plexapi.myplex import MyPlexAccount
-from plexapi.server import PlexServer
 import texttable
 from config.settings import GUILD_ID
 from cogs.helpers.logger import logger  # Updated import
+from cogs.helpers.event_bus import event_bus
 from cogs.helpers.plex_helper import (
     plexinviter,
     plexremove,
     verifyemail,
-    init_db,
+    ensure_clients_table,
     save_user_email,
     get_user_email,
     remove_email,
     delete_user,
     read_all_users,
+    record_invite,
+    mark_invites_revoked,
+    mark_invites_removed,
+    ensure_friends_table,
+    fetch_plex_friends,
+    sync_plex_friends,
+    find_plex_friend,
+    forget_plex_friend,
+    mark_email_invites_revoked,
+)
+from cogs.helpers.plex_jobs import (
+    PLEX_JOB_INVITE,
+    PLEX_JOB_REMOVE,
+    PLEX_JOB_BATCH_SIZE,
+    RateBudget,
+    ensure_jobs_table,
+    enqueue_plex_jobs,
+    claim_plex_jobs,
+    complete_plex_job,
+    fail_plex_job,
+    release_plex_jobs,
+    recover_plex_jobs,
+    parse_jobs_csv,
+    role_member_entries,
+)
+from cogs.helpers.db import get_db, PLEX_CLIENTS_DB, INVITES_DB
+from cogs.helpers.plex_client import (
+    connect_plex_server,
+    plex_service,
+    plex_stats,
+    PlexUnavailable,
 )
 
-# Database path
-PLEX_DB_PATH = "databases/plex_clients.db"
+# Full friends list resync interval (seconds); invites and failed removals
+# mark the cache dirty so it is resynced on the next check instead
+PLEX_FRIENDS_SYNC_INTERVAL = 3600
+PLEX_FRIENDS_CHECK_MINUTES = 5
 
-# Ensure database directory exists
-os.makedirs(os.path.dirname(PLEX_DB_PATH), exist_ok=True)
+# How often the job queue worker claims a batch
+PLEX_JOB_INTERVAL_SECONDS = 15
 
 
 class PlexCommands(commands.Cog):
@@ -32,7 +65,13 @@ class PlexCommands(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.db_conn = init_db(PLEX_DB_PATH)
+        self.db = get_db(PLEX_CLIENTS_DB)
+        self.invites_db = get_db(INVITES_DB)
+        self.plex_friends_dirty = True
+        self.plex_friends_synced_at = None
+
+        # Bulk invite/remove queue (tables are set up in cog_load)
+        self.plex_job_budget = RateBudget()
 
         # Try to load Plex configuration
         self.plex_configured = False
@@ -41,15 +80,14 @@ class PlexCommands(commands.Cog):
         self.plex_roles = []
         self.plex_libs = ["all"]
         self.use_plex = False
-        self.plex_connection_failed = False  # Track connection status
+        self.plex_has_token = False
+        self.plex_has_credentials = False
+        self.plex_down_notified = False  # Admin has been told Plex is down
         self.admin_user_id = None  # Will be loaded from config
 
         # Try to initialize Plex
         self.load_plex_config()
 
-        # Start the Plex health check task
-        self.plex_health_check.start()
-
     def load_plex_config(self):
         """Load Plex configuration from settings or environment variables"""
         try:
@@ -86,26 +124,115 @@ class PlexCommands(commands.Cog):
             )
             self.use_plex = PLEX_ENABLED
 
-            # Try to connect to Plex
-            if self.use_plex:
-                if PLEX_TOKEN and PLEX_BASE_URL:
-                    # Connect using token
-                    self.plex_server = PlexServer(PLEX_BASE_URL, PLEX_TOKEN)
-                    self.plex_configured = True
-                    logger.info("Connected to Plex using token")
-                elif PLEX_USER and PLEX_PASS and PLEX_SERVER_NAME:
-                    # Connect using username and password
-                    account = MyPlexAccount(PLEX_USER, PLEX_PASS)
-                    self.plex_server = account.resource(PLEX_SERVER_NAME).connect()
-                    self.plex_configured = True
-                    logger.info("Connected to Plex using username and password")
-                else:
-                    logger.warning("Insufficient Plex credentials provided")
+            self.plex_has_token = bool(PLEX_TOKEN and PLEX_BASE_URL)
+            self.plex_has_credentials = bool(
+                PLEX_USER and PLEX_PASS and PLEX_SERVER_NAME
+            )
         except ImportError:
             logger.warning("Could not import Plex settings from config.settings")
+
+    async def connect_plex(self):
+        """Connect to Plex off the event loop (the connection is shared with the web API)"""
+        if not self.use_plex:
+            return
+        if not self.plex_has_token and not self.plex_has_credentials:
+            logger.warning("Insufficient Plex credentials provided")
+            return
+
+        try:
+            self.plex_server = await plex_service.call(
+                "connect", connect_plex_server, probe=True
+            )
+            if self.plex_server:
+                self.plex_configured = True
+                if self.plex_has_token:
+                    logger.info("Connected to Plex using token")
+                else:
+                    logger.info("Connected to Plex using username and password")
+                plex_stats.refresh_in_background()
         except Exception as e:
             logger.error(f"Error connecting to Plex: {e}")
 
+    @property
+    def plex_connection_failed(self):
+        """Plex connection status, shared with the Plex circuit breaker"""
+        return plex_service.circuit_open
+
+    @plex_connection_failed.setter
+    def plex_connection_failed(self, failed):
+        if failed:
+            plex_service.trip()
+        else:
+            plex_service.reset()
+
+    async def plex_invite(self, email, libs=None, raise_outage=False):
+        """Invite an email to Plex in the Plex worker pool
+
+        With raise_outage, PlexUnavailable and timeouts propagate instead of
+        returning False.
+        """
+        try:
+            invited = await plex_service.call(
+                "invite", plexinviter, self.plex_server, email, libs or self.plex_libs
+            )
+        except (PlexUnavailable, asyncio.TimeoutError) as e:
+            if raise_outage:
+                raise
+            logger.error(f"[PLEX] Could not invite {email}: {e}")
+            return False
+
+        if invited:
+            # The new friend shows up once the invite is accepted
+            self.invalidate_plex_friends()
+        return invited
+
+    async def plex_remove(self, email, raise_outage=False):
+        """Remove an email from Plex, using the friends cache to skip the friends listing
+
+        With raise_outage, PlexUnavailable and timeouts propagate instead of
+        returning False.
+        """
+        friend = await self.db.run(find_plex_friend, email)
+        try:
+            removed = await plex_service.call(
+                "remove",
+                plexremove,
+                self.plex_server,
+                email,
+                friend["id"] if friend else None,
+            )
+        except (PlexUnavailable, asyncio.TimeoutError) as e:
+            if raise_outage:
+                self.invalidate_plex_friends()
+                raise
+            logger.error(f"[PLEX] Could not remove {email}: {e}")
+            removed = False
+
+        if removed:
+            await self.db.run(forget_plex_friend, email)
+        else:
+            self.invalidate_plex_friends()
+        return removed
+
+    def invalidate_plex_friends(self):
+        """Resync the Plex friends cache on the next check"""
+        self.plex_friends_dirty = True
+
+    async def refresh_plex_friends(self):
+        """Sync the local Plex friends cache with the account's friends list"""
+        try:
+            friends = await plex_service.call(
+                "list_friends", fetch_plex_friends, self.plex_server
+            )
+            changed, removed = await self.db.run(sync_plex_friends, friends)
+            self.plex_friends_dirty = False
+            self.plex_friends_synced_at = time.monotonic()
+            logger.info(
+                f"[PLEX] Friends cache synced: {len(friends)} friends ({changed} changed, {removed} removed)"
+            )
+        except Exception as e:
+            logger.error(f"[PLEX] Could not sync Plex friends cache: {e}")
+
     # Embed message functions
     async def embederror(self, interaction, message):
         """Send an error embed message"""
@@ -204,28 +331,12 @@ class PlexCommands(commands.Cog):
 
         if verifyemail(email):
             logger.debug(f"[PLEX] Email validation passed for: {email}")
-            if plexinviter(self.plex_server, email, self.plex_libs):
+            if await self.plex_invite(email):
                 # Save to invites tracking database
                 try:
-                    import sqlite3
-                    from datetime import datetime, timedelta
-
-                    conn = sqlite3.connect("databases/invites.db")
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        """
-                        INSERT INTO invites (email, discord_user, status, created_at, expires_at)
-                        VALUES (?, ?, 'active', ?, ?)
-                    """,
-                        (
-                            email,
-                            str(interaction.user),
-                            datetime.now().isoformat(),
-                            (datetime.now() + timedelta(days=30)).isoformat(),
-                        ),
+                    await self.invites_db.run(
+                        record_invite, email, str(interaction.user)
                     )
-                    conn.commit()
-                    conn.close()
                     logger.info(f"[PLEX] Saved invite for {email} to tracking database")
                 except Exception as e:
                     logger.error(f"[PLEX] Failed to save invite to database: {e}")
@@ -272,7 +383,7 @@ class PlexCommands(commands.Cog):
 
         if verifyemail(email):
             logger.debug(f"[PLEX] Email validation passed for: {email}")
-            if plexremove(self.plex_server, email):
+            if await self.plex_remove(email):
                 logger.info(
                     f"[PLEX] SUCCESS: Completed removal of {email} by user {interaction.user}"
                 )
@@ -332,39 +443,27 @@ class PlexCommands(commands.Cog):
                         )
                         await after.send(embed=embed)
 
-                        if plexinviter(self.plex_server, email, self.plex_libs):
-                            save_user_email(
-                                self.db_conn, str(after.id), email, after.name
+                        if await self.plex_invite(email):
+                            await self.db.run(
+                                save_user_email, str(after.id), email, after.name
                             )
 
                             # Save to invites tracking database
                             try:
-                                import sqlite3
-                                from datetime import datetime, timedelta
-
-                                conn = sqlite3.connect("databases/invites.db")
-                                cursor = conn.cursor()
-                                cursor.execute(
-                                    """
-                                    INSERT INTO invites (email, discord_user, status, created_at, expires_at)
-                                    VALUES (?, ?, 'active', ?, ?)
-                                """,
-                                    (
-                                        email,
-                                        str(after),
-                                        datetime.now().isoformat(),
-                                        (
-                                            datetime.now() + timedelta(days=30)
-                                        ).isoformat(),
-                                    ),
+                                await self.invites_db.run(
+                                    record_invite, email, str(after)
                                 )
-                                conn.commit()
-                                conn.close()
                                 logger.info(
                                     f"Saved auto-role invite for {email} to tracking database"
                                 )
                             except Exception as e:
                                 logger.error(f"Failed to save invite to database: {e}")
+                            event_bus.publish(
+                                "plex_access_granted",
+                                member_id=after.id,
+                                member=str(after),
+                                role=role.name,
+                            )
 
                             await asyncio.sleep(5)
 
@@ -438,10 +537,18 @@ class PlexCommands(commands.Cog):
                 ):
                     try:
                         user_id = after.id
-                        email = get_user_email(self.db_conn, user_id)
+                        email = await self.db.run(get_user_email, user_id)
                         if email:
-                            plexremove(self.plex_server, email)
-                            removed = remove_email(self.db_conn, user_id)
+                            # Queued so mass role changes are rate limited; the
+                            # worker marks the invite revoked and tells the member
+                            # once Plex has removed the access
+                            await self.db.run(
+                                enqueue_plex_jobs,
+                                PLEX_JOB_REMOVE,
+                                [(email, str(user_id))],
+                                revoked_role=role.name,
+                            )
+                            removed = await self.db.run(remove_email, user_id)
                             if removed:
                                 logger.info(
                                     f"Removed Plex email for {after.name} from database"
@@ -450,53 +557,6 @@ class PlexCommands(commands.Cog):
                                 logger.warning(
                                     f"Could not remove Plex from user {after.name}"
                                 )
-
-                            # Update invite status in tracking database
-                            try:
-                                import sqlite3
-                                from datetime import datetime
-
-                                conn = sqlite3.connect("databases/invites.db")
-                                cursor = conn.cursor()
-                                cursor.execute(
-                                    """
-                                    UPDATE invites 
-                                    SET status = 'revoked'
-                                    WHERE discord_user = ? AND status = 'active'
-                                """,
-                                    (str(after),),
-                                )
-                                conn.commit()
-                                conn.close()
-                                logger.info(
-                                    f"Marked invite as revoked for {after} in tracking database"
-                                )
-                            except Exception as e:
-                                logger.error(f"Failed to update invite status: {e}")
-
-                            embed = discord.Embed(
-                                title="👋 StreamNet Plex Zugriff entfernt",
-                                description=(
-                                    f"**Hallo {after.mention}!**\n\n"
-                                    f"Dein Zugriff auf **{self.plex_server_name}** wurde entfernt.\n\n"
-                                    f"━━━━━━━━━━━━━━━━━━━━━━\n\n"
-                                    f"📧 Email: `{email}`\n"
-                                    f"🎬 Server: **{self.plex_server_name}**\n\n"
-                                    f"ℹ️ **Grund:**\n"
-                                    f"• Deine Rolle wurde entfernt\n"
-                                    f"• Zugriff auf Plex wurde automatisch entzogen\n\n"
-                                    f"💡 *Bei Fragen wende dich an <@408885990971670531>*"
-                                ),
-                                color=0xE5A00D,
-                            )
-                            embed.set_thumbnail(
-                                url="https://cdn.discordapp.com/emojis/1033460420587049021.png"
-                            )
-                            embed.set_footer(
-                                text=f"{self.plex_server_name} • Zugriff entfernt",
-                                icon_url="https://cdn.discordapp.com/emojis/1310635856318562334.png",
-                            )
-                            await after.send(embed=embed)
                     except Exception as e:
                         logger.error(f"Error removing user from Plex: {e}")
 
@@ -510,11 +570,13 @@ class PlexCommands(commands.Cog):
     async def on_member_remove(self, member):
         """Clean up when a member leaves the server"""
         if self.plex_configured and self.use_plex:
-            email = get_user_email(self.db_conn, member.id)
+            email = await self.db.run(get_user_email, member.id)
             if email:
-                plexremove(self.plex_server, email)
+                await self.db.run(
+                    enqueue_plex_jobs, PLEX_JOB_REMOVE, [(email, str(member.id))]
+                )
 
-        deleted = delete_user(self.db_conn, member.id)
+        deleted = await self.db.run(delete_user, member.id)
         if deleted:
             logger.info(
                 f"Removed {member.name} from database because user left Discord server."
@@ -522,21 +584,7 @@ class PlexCommands(commands.Cog):
 
         # Update invite status in tracking database
         try:
-            import sqlite3
-            from datetime import datetime
-
-            conn = sqlite3.connect("databases/invites.db")
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE invites 
-                SET status = 'removed'
-                WHERE discord_user = ? AND status IN ('active', 'revoked')
-            """,
-                (str(member),),
-            )
-            conn.commit()
-            conn.close()
+            await self.invites_db.run(mark_invites_removed, str(member))
             logger.info(f"Marked invite as removed for {member} in tracking database")
         except Exception as e:
             logger.error(f"Failed to update invite status on member remove: {e}")
@@ -561,7 +609,7 @@ class PlexCommands(commands.Cog):
     async def dbls(self, interaction: discord.Interaction):
         """Command to list the Plex database"""
 
-        all_users = read_all_users(self.db_conn)
+        all_users = await self.db.run(read_all_users)
 
         embed = discord.Embed(title="PlexInviter Database.")
         table = texttable.Texttable()
@@ -630,7 +678,7 @@ class PlexCommands(commands.Cog):
             return
 
         try:
-            if save_user_email(self.db_conn, str(member.id), email, member.name):
+            if await self.db.run(save_user_email, str(member.id), email, member.name):
                 await self.embedinfo(
                     interaction,
                     "<:approved:995615632961847406> Email wurde zur Datenbank hinzugefügt.",
@@ -656,7 +704,7 @@ class PlexCommands(commands.Cog):
     @app_commands.checks.has_permissions(administrator=True)
     async def dbrm(self, interaction: discord.Interaction, position: int):
         """Command to remove a user from the Plex database"""
-        all_users = read_all_users(self.db_conn)
+        all_users = await self.db.run(read_all_users)
 
         try:
             position = int(position) - 1
@@ -665,7 +713,7 @@ class PlexCommands(commands.Cog):
                 discord_user = await self.bot.fetch_user(user_id)
                 username = discord_user.name
 
-                if delete_user(self.db_conn, user_id):
+                if await self.db.run(delete_user, user_id):
                     logger.info(f"Removed {username} from database")
                     await self.embedinfo(
                         interaction,
@@ -688,6 +736,204 @@ class PlexCommands(commands.Cog):
                 "<:rejected:995614671128244224> Es gab einen Fehler beim Entfernen dieses Benutzers aus der Datenbank. Bitte überprüfe die Logs für mehr Informationen.",
             )
 
+    @app_commands.command(
+        name="plexbulk", description="Queue bulk Plex invites or removals"
+    )
+    @app_commands.describe(
+        action="Invite or remove",
+        role="Use the stored Plex emails of every member with this role",
+        file="CSV file with email[,discord_user_id] lines",
+    )
+    @app_commands.choices(
+        action=[
+            app_commands.Choice(name="invite", value=PLEX_JOB_INVITE),
+            app_commands.Choice(name="remove", value=PLEX_JOB_REMOVE),
+        ]
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def plexbulk(
+        self,
+        interaction: discord.Interaction,
+        action: app_commands.Choice[str],
+        role: discord.Role = None,
+        file: discord.Attachment = None,
+    ):
+        """Command to queue bulk Plex invites or removals from a role or CSV"""
+        if not role and not file:
+            await self.embederror(
+                interaction,
+                "<:rejected:995614671128244224> Bitte wähle eine Rolle oder lade eine CSV-Datei hoch.",
+            )
+            return
+
+        entries = []
+        skipped = []
+        if role:
+            role_entries, skipped = await self.db.run(role_member_entries, role.members)
+            entries.extend(role_entries)
+        if file:
+            try:
+                text = (await file.read()).decode("utf-8-sig")
+                entries.extend(parse_jobs_csv(text))
+            except Exception as e:
+                logger.error(f"[PLEX JOBS] Could not read CSV {file.filename}: {e}")
+                await self.embederror(
+                    interaction,
+                    "<:rejected:995614671128244224> Die CSV-Datei konnte nicht gelesen werden.",
+                )
+                return
+
+        valid = [(email, user) for email, user in entries if verifyemail(email)]
+        invalid = len(entries) - len(valid)
+        if not valid:
+            await self.embederror(
+                interaction,
+                "<:rejected:995614671128244224> Keine gültigen Email-Adressen gefunden.",
+            )
+            return
+
+        batch_id = await self.db.run(enqueue_plex_jobs, action.value, valid)
+        logger.info(
+            f"[PLEX JOBS] {interaction.user} queued {len(valid)} {action.value} jobs (batch {batch_id})"
+        )
+        await self.embedinfo(
+            interaction,
+            f"<:approved:995615632961847406> {len(valid)} {action.value} Jobs eingereiht (Batch `{batch_id}`).\n"
+            f"Ungültige Emails: {invalid} • Mitglieder ohne Email: {len(skipped)}",
+        )
+
+    @tasks.loop(seconds=PLEX_JOB_INTERVAL_SECONDS)
+    async def plex_job_worker(self):
+        """Process queued Plex invite/remove jobs in rate-limited batches"""
+        if not self.use_plex or not self.plex_configured or self.plex_connection_failed:
+            return
+
+        limit = min(PLEX_JOB_BATCH_SIZE, self.plex_job_budget.available())
+        if limit <= 0:
+            return
+        jobs = await self.db.run(claim_plex_jobs, limit)
+        if not jobs:
+            return
+        self.plex_job_budget.spend(len(jobs))
+
+        # Resolve the shared libraries once for every invite in the batch
+        libs = self.plex_libs
+        if self.plex_libs[0] == "all" and any(
+            job["action"] == PLEX_JOB_INVITE for job in jobs
+        ):
+            try:
+                libs = await plex_service.call(
+                    "library_sections", lambda: self.plex_server.library.sections()
+                )
+            except Exception as e:
+                logger.warning(f"[PLEX JOBS] Could not resolve libraries: {e}")
+
+        done = 0
+        for position, job in enumerate(jobs):
+            email = job["email"]
+            discord_user = job["discord_user"]
+            try:
+                if job["action"] == PLEX_JOB_INVITE:
+                    ok = await self.plex_invite(email, libs, raise_outage=True)
+                else:
+                    ok = await self.plex_remove(email, raise_outage=True)
+                error = None if ok else f"Plex {job['action']} failed"
+            except (PlexUnavailable, asyncio.TimeoutError) as e:
+                # Plex is down: the rest of the batch would fail the same way
+                error = str(e) or type(e).__name__
+                await self.db.run(fail_plex_job, job["id"], job["attempts"], error)
+                rest = [later["id"] for later in jobs[position + 1 :]]
+                await self.db.run(release_plex_jobs, rest)
+                logger.warning(
+                    f"[PLEX JOBS] Plex unavailable ({error}), stopped batch "
+                    f"and requeued {len(rest)} jobs"
+                )
+                break
+            except Exception as e:
+                ok = False
+                error = e
+
+            if not ok:
+                status = await self.db.run(
+                    fail_plex_job, job["id"], job["attempts"], error
+                )
+                logger.warning(
+                    f"[PLEX JOBS] {job['action']} {email} failed (attempt {job['attempts'] + 1}, now {status}): {error}"
+                )
+                continue
+
+            await self.db.run(complete_plex_job, job["id"])
+            done += 1
+
+            # Same bookkeeping as the interactive commands
+            try:
+                if job["action"] == PLEX_JOB_INVITE:
+                    if discord_user and discord_user.isdigit():
+                        await self.db.run(save_user_email, discord_user, email)
+                    await self.invites_db.run(
+                        record_invite, email, discord_user or "bulk"
+                    )
+                else:
+                    await self.invites_db.run(mark_email_invites_revoked, email)
+                    if job["revoked_role"]:
+                        await self.notify_access_removed(
+                            discord_user, email, job["revoked_role"]
+                        )
+            except Exception as e:
+                logger.error(f"[PLEX JOBS] Bookkeeping failed for {email}: {e}")
+
+        logger.info(f"[PLEX JOBS] Processed batch: {done}/{len(jobs)} succeeded")
+
+    async def notify_access_removed(self, discord_user, email, role_name):
+        """Announce and DM a Plex removal caused by a removed role (after it succeeded)"""
+        guild = self.bot.get_guild(GUILD_ID)
+        member = (
+            guild.get_member(int(discord_user))
+            if guild and discord_user and discord_user.isdigit()
+            else None
+        )
+        if member is None:
+            return
+        await self.invites_db.run(mark_invites_revoked, str(member))
+        event_bus.publish(
+            "plex_access_revoked",
+            member_id=member.id,
+            member=str(member),
+            role=role_name,
+        )
+
+        embed = discord.Embed(
+            title="👋 StreamNet Plex Zugriff entfernt",
+            description=(
+                f"**Hallo {member.mention}!**\n\n"
+                f"Dein Zugriff auf **{self.plex_server_name}** wurde entfernt.\n\n"
+                f"━━━━━━━━━━━━━━━━━━━━━━\n\n"
+                f"📧 Email: `{email}`\n"
+                f"🎬 Server: **{self.plex_server_name}**\n\n"
+                f"ℹ️ **Grund:**\n"
+                f"• Deine Rolle wurde entfernt\n"
+                f"• Zugriff auf Plex wurde automatisch entzogen\n\n"
+                f"💡 *Bei Fragen wende dich an <@408885990971670531>*"
+            ),
+            color=0xE5A00D,
+        )
+        embed.set_thumbnail(
+            url="https://cdn.discordapp.com/emojis/1033460420587049021.png"
+        )
+        embed.set_footer(
+            text=f"{self.plex_server_name} • Zugriff entfernt",
+            icon_url="https://cdn.discordapp.com/emojis/1310635856318562334.png",
+        )
+        try:
+            await member.send(embed=embed)
+        except discord.Forbidden:
+            logger.warning(f"[PLEX JOBS] Could not DM {member} about the removal")
+
+    @plex_job_worker.before_loop
+    async def before_plex_job_worker(self):
+        """Wait until the bot is ready before processing queued jobs"""
+        await self.bot.wait_until_ready()
+
     @tasks.loop(hours=1)
     async def plex_health_check(self):
         """Check Plex connection every hour and notify admin if it fails"""
@@ -697,13 +943,18 @@ class PlexCommands(commands.Cog):
         try:
             # Try to connect to Plex server
             if self.plex_server:
-                # Simple ping to check if server is responsive
-                _ = self.plex_server.library.sections()
+                # Simple ping to check if server is responsive (always probes,
+                # even while the circuit is open, and closes it on success)
+                await plex_service.call(
+                    "health_check",
+                    lambda: self.plex_server.library.sections(),
+                    probe=True,
+                )
 
                 # If we get here, connection is successful
-                if self.plex_connection_failed:
+                if self.plex_down_notified:
                     # Connection was down but is now back up
-                    self.plex_connection_failed = False
+                    self.plex_down_notified = False
                     logger.info("Plex connection restored")
 
                     # Notify admin that connection is back
@@ -728,9 +979,10 @@ class PlexCommands(commands.Cog):
                             logger.error(f"Could not send restoration DM to admin: {e}")
         except Exception as e:
             # Connection failed
-            if not self.plex_connection_failed:
+            self.plex_connection_failed = True
+            if not self.plex_down_notified:
                 # First time failure - notify admin
-                self.plex_connection_failed = True
+                self.plex_down_notified = True
                 logger.error(f"Plex health check failed: {e}")
 
                 # Send DM to admin
@@ -768,18 +1020,68 @@ class PlexCommands(commands.Cog):
         """Wait until the bot is ready before starting the health check"""
         await self.bot.wait_until_ready()
 
+    @tasks.loop(minutes=PLEX_FRIENDS_CHECK_MINUTES)
+    async def plex_friends_sync(self):
+        """Resync the Plex friends cache when it is dirty or older than the sync interval"""
+        if not self.use_plex or not self.plex_configured:
+            return
+        if (
+            self.plex_friends_dirty
+            or self.plex_friends_synced_at is None
+            or time.monotonic() - self.plex_friends_synced_at
+            > PLEX_FRIENDS_SYNC_INTERVAL
+        ):
+            await self.refresh_plex_friends()
+
+    @plex_friends_sync.before_loop
+    async def before_plex_friends_sync(self):
+        """Wait until the bot is ready before syncing the friends cache"""
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(seconds=plex_stats.ttl)
+    async def plex_stats_refresh(self):
+        """Refresh the cached Plex library stats served by the web API"""
+        if not self.use_plex or not self.plex_configured:
+            return
+        try:
+            await plex_service.call("library_stats", plex_stats.refresh)
+        except (PlexUnavailable, asyncio.TimeoutError):
+            pass
+        except Exception as e:
+            # Keep the loop alive; the last good stats stay cached
+            logger.error(f"[PLEX] Could not refresh library stats: {e}")
+
     def cog_unload(self):
-        """Stop the health check task when cog is unloaded"""
+        """Stop the background tasks when cog is unloaded"""
         self.plex_health_check.cancel()
+        self.plex_stats_refresh.cancel()
+        self.plex_friends_sync.cancel()
+        self.plex_job_worker.cancel()
 
     async def cog_load(self):
-        """Associate commands with a specific guild."""
+        """Set up the tables, connect to Plex and associate commands with a specific guild."""
+        await self.db.run(ensure_clients_table)
+        await self.db.run(ensure_friends_table)
+        await self.db.run(ensure_jobs_table)
+        recovered = await self.db.run(recover_plex_jobs)
+        if recovered:
+            logger.info(f"[PLEX JOBS] Requeued {recovered} interrupted jobs")
+
+        await self.connect_plex()
+
+        # Start the Plex health check, library stats and friends cache tasks
+        self.plex_health_check.start()
+        self.plex_stats_refresh.start()
+        self.plex_friends_sync.start()
+        self.plex_job_worker.start()
+
         guild = discord.Object(GUILD_ID)
         self.bot.tree.add_command(self.plexinvite, guild=guild)
         self.bot.tree.add_command(self.plexremove, guild=guild)
         self.bot.tree.add_command(self.dbls, guild=guild)
         self.bot.tree.add_command(self.dbadd, guild=guild)
         self.bot.tree.add_command(self.dbrm, guild=guild)
+        self.bot.tree.add_command(self.plexbulk, guild=guild)
 
 
 async def setup(bot):
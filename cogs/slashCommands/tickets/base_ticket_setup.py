@@ -1,24 +1,27 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import sqlite3
 from cogs.helpers.logger import logger
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB
+from cogs.helpers.ticket_panels import ticket_panels
 
 
 class BaseTicketSetup(commands.Cog):
     """Base class for ticket setup systems"""
 
-    def __init__(self, bot, db_path, table_prefix):
+    def __init__(self, bot, table_prefix):
         self.bot = bot
-        self.db_path = db_path
+        self.db = get_db(TICKET_SYSTEM_DB)
         self.table_prefix = table_prefix  # "plex" or "tv"
-        self._init_db()
 
-    def _init_db(self):
-        """Initialize the SQLite database for ticket panels."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
+    async def cog_load(self):
+        """Create the panel table and load the panel cache off the event loop."""
+        await self.db.run(self._create_tables)
+        await ticket_panels.load()
+
+    def _create_tables(self, conn):
+        """Create the panel table for this ticket system (tickets live in the shared tickets table)."""
+        conn.execute(
             f"""
             CREATE TABLE IF NOT EXISTS {self.table_prefix}_ticket_panel (
                 guild_id INTEGER PRIMARY KEY,
@@ -34,30 +37,7 @@ class BaseTicketSetup(commands.Cog):
         """
         )
 
-        # Create table for individual tickets
-        cursor.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS {self.table_prefix}_ticket_data (
-                guild_id INTEGER,
-                member_id INTEGER,
-                ticket_id INTEGER,
-                channel_id INTEGER,
-                closed BOOLEAN,
-                locked BOOLEAN,
-                claimed BOOLEAN,
-                claimed_by INTEGER,
-                type TEXT,
-                created_by INTEGER,
-                opened TIMESTAMP,
-                PRIMARY KEY (guild_id, channel_id)
-            )
-        """
-        )
-
-        conn.commit()
-        conn.close()
-
-    def save_ticket_panel(
+    async def save_ticket_panel(
         self,
         guild_id,
         channel_id,
@@ -70,9 +50,7 @@ class BaseTicketSetup(commands.Cog):
         buttons,
     ):
         """Save or update ticket panel details in the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
+        await self.db.execute(
             f"""
             INSERT INTO {self.table_prefix}_ticket_panel (guild_id, channel_id, message_id, category_id, transcripts_id, helpers_role_id, everyone_role_id, description, buttons)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -98,24 +76,16 @@ class BaseTicketSetup(commands.Cog):
                 ",".join(buttons),
             ),
         )
-        conn.commit()
-        conn.close()
+        # Write-through: the buttons read the panel from the cache
+        await ticket_panels.refresh(self.table_prefix, guild_id)
 
-    def get_ticket_panel(self, guild_id):
+    async def get_ticket_panel(self, guild_id):
         """Retrieve ticket panel details for a guild."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            f"SELECT * FROM {self.table_prefix}_ticket_panel WHERE guild_id = ?",
-            (guild_id,),
-        )
-        result = cursor.fetchone()
-        conn.close()
-        return result
+        return await ticket_panels.get(self.table_prefix, guild_id)
 
     async def reinitialize_ticket_panel(self, guild):
         """Reinitialize the ticket panel on bot startup."""
-        data = self.get_ticket_panel(guild.id)
+        data = await self.get_ticket_panel(guild.id)
         if not data:
             logger.warning(
                 f"No {self.table_prefix} ticket panel found for guild '{guild.name}' (ID: {guild.id})."
@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import sqlite3
 from config.settings import GUILD_ID
 from cogs.helpers.logger import logger
 from cogs.slashCommands.tickets.base_ticket_setup import BaseTicketSetup
@@ -11,9 +10,7 @@ class PlexTicketSetup(BaseTicketSetup):
     """Cog for setting up the Plex ticket system"""
 
     def __init__(self, bot):
-        super().__init__(
-            bot=bot, db_path="databases/ticket_system.db", table_prefix="plex"
-        )
+        super().__init__(bot=bot, table_prefix="plex")
 
     @app_commands.command(
         name="plexticketsetup", description="Setup your Plex ticket panel"
@@ -86,7 +83,7 @@ class PlexTicketSetup(BaseTicketSetup):
             ticket_message = await channel.send(embed=embed, view=TicketButtons())
 
             # Save the panel to the database
-            self.save_ticket_panel(
+            await self.save_ticket_panel(
                 guild.id,
                 channel.id,
                 ticket_message.id,
@@ -117,7 +114,8 @@ class PlexTicketSetup(BaseTicketSetup):
             await self.reinitialize_ticket_panel(guild)
 
     async def cog_load(self):
-        """Associate commands with a specific guild."""
+        """Set up the panel table and associate commands with a specific guild."""
+        await super().cog_load()
         guild = discord.Object(GUILD_ID)
         self.bot.tree.add_command(self.plexticketsetup, guild=guild)
 
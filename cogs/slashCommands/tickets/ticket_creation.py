@@ -1,11 +1,14 @@
 import discord
 from discord.ext import commands
 from discord import ui
-import sqlite3
-import random
 import logging
 from config.settings import STAFF_ROLE, TICKET_CATEGORY_ID
 from cogs.helpers.logger import logger
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB
+from cogs.helpers.event_bus import event_bus
+from cogs.helpers.ticket_ids import allocate_ticket_id
+from cogs.helpers.ticket_panels import ticket_panels
+from cogs.helpers.ticket_state import CATEGORY_CHANNEL_LIMIT, ticket_state
 
 
 class TicketCreation(commands.Cog):
@@ -13,46 +16,47 @@ class TicketCreation(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = "databases/ticket_system.db"
+        self.db = get_db(TICKET_SYSTEM_DB)
 
     async def fetch_ticket_setup(self, guild_id, table_prefix):
         """Fetch ticket setup data for the guild."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            f"SELECT * FROM {table_prefix}_ticket_panel WHERE guild_id = ?", (guild_id,)
-        )
-        result = cursor.fetchone()
-        conn.close()
-        return result
+        return await ticket_panels.get(table_prefix, guild_id)
 
     async def save_ticket(
         self, guild_id, member_id, ticket_id, channel_id, ticket_type, table_prefix
     ):
         """Save ticket information to the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
+        state = {
+            "guild_id": guild_id,
+            "member_id": member_id,
+            "ticket_id": ticket_id,
+            "channel_id": channel_id,
+            "closed": False,
+            "locked": False,
+            "claimed": False,
+            "claimed_by": None,
+            "type": ticket_type,
+            "created_by": member_id,
+            "opened": int(discord.utils.utcnow().timestamp()),
+            "stale_warned_at": None,
+        }
+        state["last_activity"] = state["opened"]
+        await self.db.execute(
             f"""
-            INSERT INTO {table_prefix}_ticket_data (guild_id, member_id, ticket_id, channel_id, closed, locked, claimed, claimed_by, type, created_by, opened)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO tickets (service, {", ".join(state)})
+            VALUES (?, {", ".join("?" for _ in state)})
         """,
-            (
-                guild_id,
-                member_id,
-                ticket_id,
-                channel_id,
-                False,
-                False,
-                False,
-                None,
-                ticket_type,
-                member_id,
-                int(discord.utils.utcnow().timestamp()),
-            ),
+            (table_prefix, *state.values()),
+        )
+        ticket_state.add(table_prefix, **state)
+        event_bus.publish(
+            "ticket_opened",
+            service=table_prefix,
+            ticket_id=ticket_id,
+            channel_id=channel_id,
+            type=ticket_type,
+            created_by=member_id,
         )
-        conn.commit()
-        conn.close()
         logger.debug(f"Saved {table_prefix} ticket data for ID {ticket_id}")
 
     @commands.Cog.listener()
@@ -112,11 +116,6 @@ class TicketCreation(commands.Cog):
         """Create a ticket based on the specified system and type."""
         guild = interaction.guild
         member = interaction.user
-        ticket_id = random.randint(10000, 99999)  # Generate random ticket ID
-
-        logger.debug(
-            f"Creating {table_prefix} ticket: {ticket_type} with ID {ticket_id}"
-        )
 
         # Fetch ticket panel setup for getting helper roles and transcripts channel
         setup_data = await self.fetch_ticket_setup(guild.id, table_prefix)
@@ -155,6 +154,21 @@ class TicketCreation(commands.Cog):
             )
             return
 
+        # Discord rejects new channels in a full category; fail before trying
+        if len(category.channels) >= CATEGORY_CHANNEL_LIMIT:
+            # A sweep over the limit closes warned tickets early, if there are any
+            sweeper = self.bot.get_cog("TicketSweeper")
+            if sweeper:
+                self.bot.loop.create_task(sweeper.run_sweep(sweeper.dry_run))
+            await interaction.response.send_message(
+                "Die Ticket-Kategorie ist voll, es kann gerade kein neues Ticket erstellt werden. Bitte versuche es später erneut.",
+                ephemeral=True,
+            )
+            logger.error(
+                f"Ticket category {category.name} is full ({len(category.channels)} channels)"
+            )
+            return
+
         # Get roles from the database configuration
         helpers_role = guild.get_role(helpers_role_id)
         everyone_role = guild.get_role(everyone_role_id)
@@ -189,6 +203,12 @@ class TicketCreation(commands.Cog):
             ),
         }
 
+        # Reserve the next ticket number of this guild
+        ticket_id = await self.db.run(allocate_ticket_id, guild.id)
+        logger.debug(
+            f"Creating {table_prefix} ticket: {ticket_type} with ID {ticket_id}"
+        )
+
         # Format channel name
         if table_prefix == "plex":
             channel_name = f"plex-{ticket_type}-{ticket_id}"
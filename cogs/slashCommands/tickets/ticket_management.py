@@ -1,12 +1,33 @@
 import discord
-from discord.ext import commands
-import sqlite3
+from discord.ext import commands, tasks
 import logging
 import asyncio
-import io
 from discord.utils import get
-import chat_exporter
 from cogs.helpers.logger import logger
+from cogs.helpers.transcript import build_transcript
+from cogs.helpers.transcript_store import archive_transcript
+from cogs.helpers.ticket_search import (
+    index_transcript_messages,
+    backfill_ticket_messages,
+    backfill_from_channel,
+)
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB
+from cogs.helpers.ticket_panels import ticket_panels, TICKET_SERVICES
+from cogs.helpers.ticket_state import ticket_state, TICKET_STATE_COLUMNS
+from cogs.helpers.transcript_delivery import (
+    run_concurrently,
+    upload_transcript,
+    dm_transcript,
+    transcript_stored,
+)
+from cogs.helpers.ticket_analytics import (
+    record_event,
+    record_first_response,
+    rollup_ticket_sla,
+)
+
+# How often new SLA events are rolled up for the web UI
+SLA_ROLLUP_MINUTES = 10
 
 
 class TicketManagement(commands.Cog):
@@ -14,52 +35,98 @@ class TicketManagement(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = "databases/ticket_system.db"
+        self.db = get_db(TICKET_SYSTEM_DB)
 
     async def fetch_ticket_setup(self, guild_id, table_prefix):
         """Fetch ticket setup data for a guild."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            f"SELECT transcripts_id, helpers_role_id FROM {table_prefix}_ticket_panel WHERE guild_id = ?",
-            (guild_id,),
+        panel = await ticket_panels.get(table_prefix, guild_id)
+        if not panel:
+            return None
+        return panel["transcripts_id"], panel["helpers_role_id"]
+
+    async def cog_load(self):
+        """Load the open tickets before the first button press."""
+        count = await ticket_state.load()
+        logger.debug(f"Loaded state of {count} open tickets.")
+        self.sla_rollup.start()
+
+    async def cog_unload(self):
+        self.sla_rollup.cancel()
+        await ticket_state.flush()
+
+    @tasks.loop(minutes=SLA_ROLLUP_MINUTES)
+    async def sla_rollup(self):
+        """Roll up new ticket SLA events into the daily figures."""
+        try:
+            days = await self.db.run(rollup_ticket_sla)
+            if days:
+                logger.debug(f"Rolled up ticket SLA figures of {days} days.")
+        except Exception as e:
+            logger.error(f"Error rolling up ticket SLA figures: {e}")
+
+    @commands.Cog.listener("on_message")
+    async def track_ticket_message(self, message):
+        """Note activity and the first staff message in open ticket channels."""
+        if message.author.bot or not message.guild:
+            return
+
+        # Only open ticket channels are in memory; other channels stop here
+        state = await ticket_state.get(message.channel.id)
+        if not state:
+            return
+
+        sent_at = int(message.created_at.timestamp())
+        ticket_state.touch(message.channel.id, sent_at)
+        if message.author.id == state["created_by"]:
+            return
+
+        panel = await ticket_panels.get(state["service"], message.guild.id)
+        if not panel or not any(
+            role.id == panel["helpers_role_id"]
+            for role in getattr(message.author, "roles", ())
+        ):
+            return
+
+        await record_first_response(
+            state["service"],
+            message.channel.id,
+            message.author.id,
+            sent_at,
         )
-        setup_data = cursor.fetchone()
-        conn.close()
-        return setup_data
 
     async def fetch_ticket_data(self, channel_id, table_prefix):
         """Fetch ticket data for a specific channel."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            f"SELECT * FROM {table_prefix}_ticket_data WHERE channel_id = ?",
-            (channel_id,),
+        state = await ticket_state.get(channel_id, table_prefix)
+        if state:
+            return tuple(state[column] for column in TICKET_STATE_COLUMNS)
+
+        # Closed or unknown tickets are not kept in memory
+        return await self.db.fetchone(
+            f"""
+            SELECT {", ".join(TICKET_STATE_COLUMNS)}
+            FROM tickets
+            WHERE channel_id = ? AND service = ?
+        """,
+            (channel_id, table_prefix),
         )
-        ticket_data = cursor.fetchone()
-        conn.close()
-        return ticket_data
-
-    async def update_ticket_data(self, channel_id, table_prefix, **updates):
-        """Update ticket data in the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        for key, value in updates.items():
-            cursor.execute(
-                f"UPDATE {table_prefix}_ticket_data SET {key} = ? WHERE channel_id = ?",
-                (value, channel_id),
-            )
-        conn.commit()
-        conn.close()
+
+    def update_ticket_data(self, channel_id, table_prefix, **updates):
+        """Update ticket data in memory; the database write follows shortly."""
+        ticket_state.update(channel_id, table_prefix, **updates)
 
     async def create_transcript(
         self, channel, ticket_id, table_prefix, ticket_type, member, created_by, guild
     ):
-        """Create and return a transcript of the channel."""
+        """Create a transcript of the channel and the embed announcing it.
+
+        The caller owns the returned TranscriptBuffer and must close it.
+        """
+        transcript = None
         try:
-            transcript = await chat_exporter.export(
-                channel=channel,
-                limit=None,
+            # Messages and participants are counted while rendering
+            transcript = await build_transcript(
+                channel,
+                f"transcript-{table_prefix}-{ticket_id}.html",
                 tz_info="Europe/Berlin",
                 guild=guild,
                 bot=self.bot,
@@ -71,20 +138,6 @@ class TicketManagement(commands.Cog):
                 )
                 return None, "Failed to create transcript"
 
-            # Count messages and participants
-            message_count = 0
-            participants = set()
-            async for msg in channel.history(limit=None):
-                message_count += 1
-                if not msg.author.bot:
-                    participants.add(msg.author.id)
-
-            # Save transcript to file with better formatting
-            transcript_file = discord.File(
-                io.BytesIO(transcript.encode()),
-                filename=f"transcript-{table_prefix}-{ticket_id}.html",
-            )
-
             # Create a rich embed for transcript channel
             transcript_embed = discord.Embed(
                 title=f"📑 {table_prefix.upper()} Ticket Transcript: #{ticket_id}",
@@ -92,8 +145,8 @@ class TicketManagement(commands.Cog):
                 f"Type: `{table_prefix.upper()}-{ticket_type}`\n"
                 f"Created by: <@{created_by}>\n"
                 f"Closed by: {member.mention}\n"
-                f"Messages: `{message_count}`\n"
-                f"Participants: `{len(participants)}`\n\n"
+                f"Messages: `{transcript.message_count}`\n"
+                f"Participants: `{transcript.participant_count}`\n\n"
                 f"The complete transcript is attached as an HTML file which can be downloaded and opened in any browser.",
                 color=discord.Color.blue(),
                 timestamp=discord.utils.utcnow(),
@@ -115,15 +168,11 @@ class TicketManagement(commands.Cog):
                 icon_url=guild.icon.url if guild.icon else None,
             )
 
-            return (
-                transcript_file,
-                transcript_embed,
-                transcript,
-                message_count,
-                len(participants),
-            )
+            return transcript, transcript_embed
         except Exception as e:
             logger.error(f"Error creating transcript: {e}")
+            if transcript is not None:
+                transcript.close()
             return None, f"Error creating transcript: {e}"
 
     @commands.Cog.listener()
@@ -220,7 +269,7 @@ class TicketManagement(commands.Cog):
                     "Das Ticket ist bereits gesperrt", ephemeral=True
                 )
             else:
-                await self.update_ticket_data(channel.id, table_prefix, locked=True)
+                self.update_ticket_data(channel.id, table_prefix, locked=True)
                 embed.description = (
                     "🔐 | Dieses Ticket ist jetzt zur Überprüfung gesperrt."
                 )
@@ -239,7 +288,7 @@ class TicketManagement(commands.Cog):
                     "Das Ticket ist bereits freigeschaltet", ephemeral=True
                 )
             else:
-                await self.update_ticket_data(channel.id, table_prefix, locked=False)
+                self.update_ticket_data(channel.id, table_prefix, locked=False)
                 embed.description = "🔓 | Dieses Ticket ist jetzt freigeschaltet."
 
                 # Get the ticket creator
@@ -272,102 +321,105 @@ class TicketManagement(commands.Cog):
                     guild,
                 )
 
-                if len(result) != 5:
-                    # This means an error occurred
-                    transcript_file, error_message = result
+                transcript, transcript_embed = result
+                if transcript is None:
+                    # transcript_embed holds the error message
                     await interaction.followup.send(
-                        error_message,
+                        transcript_embed,
                         ephemeral=True,
                     )
                     return
 
-                (
-                    transcript_file,
-                    transcript_embed,
-                    transcript_content,
-                    message_count,
-                    participant_count,
-                ) = result
-
-                # Fetch the transcripts channel
                 transcripts_channel = guild.get_channel(transcripts_channel_id)
-                if transcripts_channel:
-                    try:
-                        await transcripts_channel.send(
-                            embed=transcript_embed,
-                            file=transcript_file,
-                        )
-                        logger.info(
-                            f"Enhanced transcript saved to channel {transcripts_channel.name}"
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to send transcript to channel: {e}")
-                        await interaction.followup.send(
-                            f"Failed to save transcript to channel: {e}", ephemeral=True
-                        )
-                else:
+                if not transcripts_channel:
                     logger.error(
                         f"Transcript channel {transcripts_channel_id} not found!"
                     )
 
-                # Send the transcript to the ticket creator
+                # Create a user-friendly embed for the DM
                 ticket_creator = guild.get_member(created_by)
+                user_embed = discord.Embed(
+                    title=f"📑 Dein {table_prefix.upper()} Ticket wurde geschlossen",
+                    description=f"**Ticket Details**\n"
+                    f"Ticket ID: `{ticket_id}`\n"
+                    f"Typ: `{table_prefix.upper()}-{ticket_type}`\n"
+                    f"Geschlossen von: {member.mention}\n"
+                    f"Nachrichten: `{transcript.message_count}`\n\n"
+                    f"Eine vollständige Kopie des Gesprächsverlaufs ist als HTML-Datei angehängt. "
+                    f"Du kannst die Datei herunterladen und in jedem Browser öffnen.",
+                    color=discord.Color.blue(),
+                    timestamp=discord.utils.utcnow(),
+                )
+
+                # Add thumbnail based on ticket type
+                if table_prefix == "plex":
+                    user_embed.set_thumbnail(
+                        url="https://github.com/cyb3rgh05t/brands-logos/blob/master/StreamNet/club/discord/splex.png?raw=true"
+                    )
+                else:
+                    user_embed.set_thumbnail(
+                        url="https://github.com/cyb3rgh05t/brands-logos/blob/master/StreamNet/club/discord/s_tv.png?raw=true"
+                    )
+
+                # Add footer
+                user_embed.set_footer(
+                    text=f"{guild.name} • Support System",
+                    icon_url=guild.icon.url if guild.icon else None,
+                )
+
+                # Archive, upload and index at the same time; the ticket is
+                # only closed once the transcript is stored somewhere
+                steps = {
+                    # Keep a local copy for the web UI
+                    "archive": archive_transcript(
+                        transcript,
+                        service=table_prefix,
+                        guild_id=guild_id,
+                        ticket_id=ticket_id,
+                        channel_id=channel_id,
+                        member_id=created_by,
+                        closed_by=member.id,
+                        type=ticket_type,
+                        opened=opened,
+                    ),
+                    "index": index_transcript_messages(
+                        transcript, table_prefix, channel_id
+                    ),
+                }
+                if transcripts_channel:
+                    steps["upload"] = upload_transcript(
+                        transcripts_channel, transcript, transcript_embed
+                    )
+                outcome = await run_concurrently(f"Ticket {ticket_id}", **steps)
+
+                if not transcript_stored(outcome):
+                    transcript.close()
+                    await interaction.followup.send(
+                        "Das Transkript konnte weder archiviert noch hochgeladen werden. "
+                        "Das Ticket bleibt offen, bitte versuche es erneut.",
+                        ephemeral=True,
+                    )
+                    return
+                if isinstance(outcome.get("upload"), Exception):
+                    await interaction.followup.send(
+                        f"Failed to save transcript to channel: {outcome['upload']}",
+                        ephemeral=True,
+                    )
+
+                steps = {
+                    "close": ticket_state.close(channel.id, table_prefix),
+                    "sla": record_event(table_prefix, channel.id, "closed", member.id),
+                }
                 if ticket_creator:
-                    try:
-                        # Create a new file object for DM since the first one is consumed
-                        dm_transcript_file = discord.File(
-                            io.BytesIO(transcript_content.encode()),
-                            filename=f"transcript-{table_prefix}-{ticket_id}.html",
-                        )
-
-                        # Create a user-friendly embed for the DM
-                        user_embed = discord.Embed(
-                            title=f"📑 Dein {table_prefix.upper()} Ticket wurde geschlossen",
-                            description=f"**Ticket Details**\n"
-                            f"Ticket ID: `{ticket_id}`\n"
-                            f"Typ: `{table_prefix.upper()}-{ticket_type}`\n"
-                            f"Geschlossen von: {member.mention}\n"
-                            f"Nachrichten: `{message_count}`\n\n"
-                            f"Eine vollständige Kopie des Gesprächsverlaufs ist als HTML-Datei angehängt. "
-                            f"Du kannst die Datei herunterladen und in jedem Browser öffnen.",
-                            color=discord.Color.blue(),
-                            timestamp=discord.utils.utcnow(),
-                        )
-
-                        # Add thumbnail based on ticket type
-                        if table_prefix == "plex":
-                            user_embed.set_thumbnail(
-                                url="https://github.com/cyb3rgh05t/brands-logos/blob/master/StreamNet/club/discord/splex.png?raw=true"
-                            )
-                        else:
-                            user_embed.set_thumbnail(
-                                url="https://github.com/cyb3rgh05t/brands-logos/blob/master/StreamNet/club/discord/s_tv.png?raw=true"
-                            )
-
-                        # Add footer
-                        user_embed.set_footer(
-                            text=f"{guild.name} • Support System",
-                            icon_url=guild.icon.url if guild.icon else None,
-                        )
-
-                        await ticket_creator.send(
-                            embed=user_embed,
-                            file=dm_transcript_file,
-                        )
-                        logger.info(
-                            f"Enhanced transcript sent to {ticket_creator.name} for {table_prefix} ticket {ticket_id}."
-                        )
-                    except discord.Forbidden:
-                        logger.warning(
-                            f"Could not send transcript to {ticket_creator.name} (DMs disabled)."
-                        )
-                        if transcripts_channel:
-                            await transcripts_channel.send(
-                                f"{ticket_creator.mention} konnte nicht über DMs erreicht werden. Das Transkript ist hier im Kanal verfügbar."
-                            )
-
-                # Mark ticket as closed in database
-                await self.update_ticket_data(channel.id, table_prefix, closed=True)
+                    steps["dm"] = dm_transcript(
+                        ticket_creator,
+                        transcript,
+                        user_embed,
+                        notice_channel=transcripts_channel,
+                        notice=f"{ticket_creator.mention} konnte nicht über DMs erreicht werden. Das Transkript ist hier im Kanal verfügbar.",
+                    )
+                await run_concurrently(f"Ticket {ticket_id}", **steps)
+                transcript.close()
 
                 # Send response and close the ticket
                 embed.description = "Das Ticket wurde erfolgreich geschlossen, wird gelöscht und archiviert."
@@ -396,7 +448,7 @@ class TicketManagement(commands.Cog):
                     ephemeral=True,
                 )
             else:
-                await self.update_ticket_data(
+                self.update_ticket_data(
                     channel.id, table_prefix, claimed=True, claimed_by=member.id
                 )
                 embed.description = (
@@ -404,6 +456,44 @@ class TicketManagement(commands.Cog):
                 )
                 await interaction.response.send_message(embed=embed)
                 logger.info(f"Ticket {ticket_id} claimed by {member.name}")
+                await record_event(table_prefix, channel.id, "claimed", member.id)
+
+    @commands.command(
+        name="reindex_tickets",
+        help=(
+            "Index closed-ticket transcripts for the web UI search: the local "
+            "archive first, then the attachments in the transcript channels."
+        ),
+    )
+    @commands.has_permissions(administrator=True)
+    async def reindex_tickets(self, ctx, limit: int = None):
+        """Backfill the message search index from archived and uploaded transcripts"""
+        await ctx.send("Indexiere archivierte Transkripte...")
+        try:
+            tickets, messages = await asyncio.to_thread(backfill_ticket_messages, limit)
+
+            # Older tickets only have the transcript uploaded to the channel
+            channels = []
+            for service in TICKET_SERVICES:
+                panel = await ticket_panels.get(service, ctx.guild.id)
+                channel = panel and ctx.guild.get_channel(panel["transcripts_id"])
+                if channel and channel not in channels:
+                    channels.append(channel)
+            for channel in channels:
+                remaining = None if limit is None else limit - tickets
+                if remaining is not None and remaining <= 0:
+                    break
+                await ctx.send(f"Lese Transkripte aus {channel.mention}...")
+                channel_tickets, channel_messages = await backfill_from_channel(
+                    channel, remaining
+                )
+                tickets += channel_tickets
+                messages += channel_messages
+        except Exception as e:
+            logger.error(f"Error backfilling ticket search index: {e}")
+            await ctx.send("Ein Fehler ist aufgetreten.")
+            return
+        await ctx.send(f"{messages} Nachrichten aus {tickets} Tickets indexiert.")
 
 
 async def setup(bot):
@@ -0,0 +1,217 @@
+import asyncio
+import time
+from discord.ext import commands, tasks
+from config import settings
+from config.settings import TICKET_CATEGORY_ID
+from cogs.helpers.logger import logger
+from cogs.helpers.db import get_db, TICKET_SYSTEM_DB
+from cogs.helpers.ticket_state import CATEGORY_CHANNEL_LIMIT, ticket_state
+from cogs.helpers.ticket_closer import close_ticket_with_transcript
+from cogs.helpers.transcript_delivery import send_to_channel
+
+# How often open tickets are checked for inactivity
+TICKET_SWEEP_MINUTES = 15
+
+# Totals since the bot started plus the outcome of the last sweep
+sweep_metrics = {
+    "runs": 0,
+    "warned": 0,
+    "closed": 0,
+    "failed": 0,
+    "missing": 0,
+    "last_run": None,
+    "last": None,
+}
+
+
+class TicketSweeper(commands.Cog):
+    """Warns about and auto-closes inactive tickets"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = get_db(TICKET_SYSTEM_DB)
+
+        # Overridable in config/settings.py
+        self.enabled = getattr(settings, "TICKET_SWEEP_ENABLED", True)
+        self.dry_run = getattr(settings, "TICKET_SWEEP_DRY_RUN", False)
+        self.warn_after = getattr(settings, "TICKET_STALE_WARN_HOURS", 72) * 3600
+        self.close_after = getattr(settings, "TICKET_STALE_CLOSE_HOURS", 24) * 3600
+        self.max_closes = getattr(settings, "TICKET_SWEEP_MAX_CLOSES", 2)
+        self.category_high_water = getattr(settings, "TICKET_CATEGORY_HIGH_WATER", 45)
+
+        self._sweep_lock = asyncio.Lock()
+        if self.enabled:
+            self.sweep.start()
+
+    def cog_unload(self):
+        self.sweep.cancel()
+
+    @tasks.loop(minutes=TICKET_SWEEP_MINUTES)
+    async def sweep(self):
+        """Scheduled sweep over the open tickets."""
+        try:
+            await self.run_sweep(self.dry_run)
+        except Exception as e:
+            logger.error(f"[TICKET SWEEP] Sweep failed: {e}")
+
+    @sweep.before_loop
+    async def before_sweep(self):
+        """Wait until the bot is ready before the first sweep."""
+        await self.bot.wait_until_ready()
+
+    async def find_stale_tickets(self, now):
+        """Open tickets without messages for the warning period, oldest first."""
+        # Pending activity changes are written first so the query sees them
+        await ticket_state.flush()
+        return await self.db.fetchall(
+            """
+            SELECT service, guild_id, ticket_id, channel_id, created_by,
+                   last_activity, stale_warned_at
+            FROM tickets
+            WHERE closed = 0 AND last_activity < ?
+            ORDER BY last_activity
+        """,
+            (now - self.warn_after,),
+        )
+
+    def category_overflow(self):
+        """Channels in the ticket category above the high-water mark (and the count)"""
+        category = self.bot.get_channel(TICKET_CATEGORY_ID)
+        if not category:
+            return 0, None
+        count = len(category.channels)
+        return max(count - self.category_high_water, 0), count
+
+    async def run_sweep(self, dry_run=False):
+        """Warn the creators of stale tickets and close tickets whose warning expired.
+
+        When the ticket category is above the high-water mark, warned tickets
+        are closed early (oldest first) to keep room for new tickets.
+        Returns a summary of the sweep.
+        """
+        async with self._sweep_lock:
+            started = time.perf_counter()
+            now = int(time.time())
+            stale = await self.find_stale_tickets(now)
+            overflow, category_channels = self.category_overflow()
+
+            to_warn, to_close, waiting, missing = [], [], [], []
+            for ticket in stale:
+                if not self.bot.get_channel(ticket["channel_id"]):
+                    missing.append(ticket)
+                elif not ticket["stale_warned_at"]:
+                    to_warn.append(ticket)
+                elif ticket["stale_warned_at"] <= now - self.close_after:
+                    to_close.append(ticket)
+                else:
+                    waiting.append(ticket)
+            early = max(overflow - len(to_close), 0)
+            to_close.extend(waiting[:early])
+
+            summary = {
+                "dry_run": dry_run,
+                "candidates": len(stale),
+                "warned": len(to_warn),
+                "closed": 0,
+                "failed": 0,
+                "missing": len(missing),
+                "closed_early": min(early, len(waiting)),
+                "category_channels": category_channels,
+            }
+
+            if dry_run:
+                summary["closed"] = len(to_close)
+                for ticket in to_warn + to_close:
+                    logger.info(
+                        f"[TICKET SWEEP] Dry run: would "
+                        f"{'warn' if ticket in to_warn else 'close'} "
+                        f"{ticket['service']} ticket {ticket['ticket_id']}"
+                    )
+            else:
+                # Channels deleted by hand: nothing to transcribe
+                for ticket in missing:
+                    await ticket_state.close(ticket["channel_id"], ticket["service"])
+
+                await asyncio.gather(*(self.warn(ticket, now) for ticket in to_warn))
+
+                semaphore = asyncio.Semaphore(self.max_closes)
+                results = await asyncio.gather(
+                    *(self.close(ticket, semaphore) for ticket in to_close)
+                )
+                summary["closed"] = sum(results)
+                summary["failed"] = len(results) - summary["closed"]
+
+                sweep_metrics["warned"] += summary["warned"]
+                sweep_metrics["closed"] += summary["closed"]
+                sweep_metrics["failed"] += summary["failed"]
+                sweep_metrics["missing"] += summary["missing"]
+
+            summary["duration"] = round(time.perf_counter() - started, 2)
+            sweep_metrics["runs"] += 1
+            sweep_metrics["last_run"] = now
+            sweep_metrics["last"] = summary
+            if stale:
+                logger.info(f"[TICKET SWEEP] {summary}")
+            return summary
+
+    async def warn(self, ticket, now):
+        """Tell the creator that the ticket will be closed unless someone writes."""
+        channel = self.bot.get_channel(ticket["channel_id"])
+        hours = (now - ticket["last_activity"]) // 3600
+        try:
+            await send_to_channel(
+                channel,
+                content=(
+                    f"⏰ <@{ticket['created_by']}> Dieses Ticket ist seit {hours} Stunden inaktiv "
+                    f"und wird in {self.close_after // 3600} Stunden automatisch geschlossen. "
+                    f"Schreibe eine Nachricht, um es offen zu halten."
+                ),
+            )
+        except Exception as e:
+            logger.error(
+                f"[TICKET SWEEP] Could not warn about ticket {ticket['ticket_id']}: {e}"
+            )
+            return
+        ticket_state.update(
+            ticket["channel_id"], ticket["service"], stale_warned_at=now
+        )
+
+    async def close(self, ticket, semaphore):
+        """Close a ticket through the transcript pipeline; returns True on success."""
+        async with semaphore:
+            result = await close_ticket_with_transcript(
+                ticket["ticket_id"],
+                self.bot,
+                "inactive",
+                channel_id=ticket["channel_id"],
+                closed_via="Auto-close",
+            )
+        if not result.get("success"):
+            logger.error(
+                f"[TICKET SWEEP] Could not close ticket {ticket['ticket_id']}: {result['message']}"
+            )
+        return bool(result.get("success"))
+
+    @commands.command(
+        name="sweep_tickets",
+        help="Warn about and close inactive tickets now. Use 'dry' to only report.",
+    )
+    @commands.has_permissions(administrator=True)
+    async def sweep_tickets(self, ctx, mode: str = None):
+        """Run the stale-ticket sweep on demand"""
+        summary = await self.run_sweep(dry_run=self.dry_run or mode == "dry")
+        prefix = "Testlauf: " if summary["dry_run"] else ""
+        await ctx.send(
+            f"{prefix}{summary['candidates']} inaktive Tickets, "
+            f"{summary['warned']} gewarnt, {summary['closed']} geschlossen "
+            f"({summary['closed_early']} vorzeitig wegen voller Kategorie), "
+            f"{summary['failed']} fehlgeschlagen, {summary['missing']} ohne Kanal. "
+            f"Kategorie: {summary['category_channels']}/{CATEGORY_CHANNEL_LIMIT} Kanäle. "
+            f"Gesamt seit Start: {sweep_metrics['warned']} gewarnt, "
+            f"{sweep_metrics['closed']} geschlossen in {sweep_metrics['runs']} Durchläufen."
+        )
+
+
+async def setup(bot):
+    await bot.add_cog(TicketSweeper(bot))
+    logger.debug("TicketSweeper cog loaded.")
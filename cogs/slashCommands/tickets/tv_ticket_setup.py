@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import sqlite3
 from config.settings import GUILD_ID
 from cogs.helpers.logger import logger
 from cogs.slashCommands.tickets.base_ticket_setup import BaseTicketSetup
@@ -11,9 +10,7 @@ class TVTicketSetup(BaseTicketSetup):
     """Cog for setting up the TV ticket system"""
 
     def __init__(self, bot):
-        super().__init__(
-            bot=bot, db_path="databases/ticket_system.db", table_prefix="tv"
-        )
+        super().__init__(bot=bot, table_prefix="tv")
 
     @app_commands.command(
         name="tvticketsetup", description="Setup your TV ticket panel"
@@ -85,7 +82,7 @@ class TVTicketSetup(BaseTicketSetup):
             ticket_message = await channel.send(embed=embed, view=TicketButtons())
 
             # Save the panel to the database
-            self.save_ticket_panel(
+            await self.save_ticket_panel(
                 guild.id,
                 channel.id,
                 ticket_message.id,
@@ -116,7 +113,8 @@ class TVTicketSetup(BaseTicketSetup):
             await self.reinitialize_ticket_panel(guild)
 
     async def cog_load(self):
-        """Associate commands with a specific guild."""
+        """Set up the panel table and associate commands with a specific guild."""
+        await super().cog_load()
         guild = discord.Object(GUILD_ID)
         self.bot.tree.add_command(self.tvticketsetup, guild=guild)
 
@@ -1,4 +1,9 @@
-import { useEffect, useState } from "react";
+import {
+  useEffect,
+  useState,
+  type Dispatch,
+  type SetStateAction,
+} from "react";
 import { useNavigate } from "react-router-dom";
 import api from "@/lib/api";
 import LoadingSpinner from "@/components/LoadingSpinner";
@@ -62,6 +67,14 @@ interface InviteStats {
   total: number;
 }
 
+interface PlexJobStats {
+  pending: number;
+  running: number;
+  done: number;
+  failed: number;
+  total: number;
+}
+
 interface DatabaseStats {
   databases: number;
   tables: number;
@@ -90,12 +103,85 @@ interface DashboardData {
   bot_stats: BotStats;
   ticket_stats: TicketStats;
   invite_stats: InviteStats;
+  plex_job_stats: PlexJobStats;
   db_stats: DatabaseStats;
   resources: SystemResources;
   services: ServiceItem[];
   services_running: number;
 }
 
+// Websocket topics and the dashboard section each one updates
+const TOPIC_SECTIONS: Record<string, keyof DashboardData> = {
+  bot_status: "bot_status",
+  tickets: "ticket_stats",
+  invites: "invite_stats",
+};
+
+interface PatchOp {
+  op: "add" | "remove" | "replace";
+  path: string;
+  value?: unknown;
+}
+
+// Apply JSON-Patch style ops from /ws/updates to a copy of a section
+function applyPatch<T>(section: T, ops: PatchOp[]): T {
+  const result = structuredClone(section) as Record<string, any>;
+  for (const { op, path, value } of ops) {
+    const keys = path.split("/").slice(1);
+    const last = keys.pop();
+    if (last === undefined || last === "") return value as T;
+    const parent = keys.reduce((node, key) => node[key], result);
+    if (op === "remove") delete parent[last];
+    else parent[last] = value;
+  }
+  return result as T;
+}
+
+// Keep the pushed sections current; returns a function that disconnects
+function subscribeToUpdates(
+  setData: Dispatch<SetStateAction<DashboardData | null>>
+) {
+  let socket: WebSocket | null = null;
+  let retry: ReturnType<typeof setTimeout> | undefined;
+  let closed = false;
+
+  const connect = () => {
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+    socket = new WebSocket(
+      `${protocol}://${window.location.host}/ws/updates?topics=${Object.keys(
+        TOPIC_SECTIONS
+      ).join(",")}`
+    );
+    socket.onmessage = (message) => {
+      const update = JSON.parse(message.data);
+      const section = TOPIC_SECTIONS[update.topic];
+      if (!section || (update.type !== "snapshot" && update.type !== "patch"))
+        return;
+      setData((current) =>
+        current
+          ? {
+              ...current,
+              [section]:
+                update.type === "snapshot"
+                  ? update.data
+                  : applyPatch(current[section], update.ops),
+            }
+          : current
+      );
+    };
+    socket.onclose = () => {
+      if (!closed) retry = setTimeout(connect, 5000);
+    };
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    socket?.close();
+  };
+}
+
 export default function Dashboard() {
   const navigate = useNavigate();
   const [data, setData] = useState<DashboardData | null>(null);
@@ -103,8 +189,13 @@ export default function Dashboard() {
 
   useEffect(() => {
     fetchDashboardData();
-    const interval = setInterval(fetchDashboardData, 5000);
-    return () => clearInterval(interval);
+    // Bot status, tickets and invites are pushed; the rest refreshes slowly
+    const interval = setInterval(fetchDashboardData, 30000);
+    const closeUpdates = subscribeToUpdates(setData);
+    return () => {
+      clearInterval(interval);
+      closeUpdates();
+    };
   }, []);
 
   const fetchDashboardData = async () => {
@@ -339,6 +430,52 @@ export default function Dashboard() {
           </div>
         </div>
 
+        {/* Plex Bulk Job Queue */}
+        <div className="card">
+          <div className="card-header">
+            <h3>
+              <FontAwesomeIcon icon={faTasks} /> Plex Job Queue
+            </h3>
+          </div>
+          <div className="card-body">
+            <div className="mini-stats">
+              <div className="mini-stat">
+                <div className="mini-stat-icon open-icon">
+                  <FontAwesomeIcon icon={faClock} />
+                </div>
+                <div className="mini-stat-content">
+                  <div className="mini-stat-value">
+                    {data.plex_job_stats.pending + data.plex_job_stats.running}
+                  </div>
+                  <div className="mini-stat-label">Queued</div>
+                </div>
+              </div>
+              <div className="mini-stat">
+                <div className="mini-stat-icon active-icon">
+                  <FontAwesomeIcon icon={faCheck} />
+                </div>
+                <div className="mini-stat-content">
+                  <div className="mini-stat-value">
+                    {data.plex_job_stats.done}/{data.plex_job_stats.total}
+                  </div>
+                  <div className="mini-stat-label">Done</div>
+                </div>
+              </div>
+              <div className="mini-stat">
+                <div className="mini-stat-icon expired-icon">
+                  <FontAwesomeIcon icon={faTimesCircle} />
+                </div>
+                <div className="mini-stat-content">
+                  <div className="mini-stat-value">
+                    {data.plex_job_stats.failed}
+                  </div>
+                  <div className="mini-stat-label">Failed</div>
+                </div>
+              </div>
+            </div>
+          </div>
+        </div>
+
         {/* Database Overview */}
         <div className="card">
           <div className="card-header">
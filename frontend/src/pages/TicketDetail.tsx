@@ -14,6 +14,7 @@ import {
   faUserCheck,
   faLock,
   faTimes,
+  faFileLines,
 } from "@fortawesome/free-solid-svg-icons";
 import api from "../lib/api";
 
@@ -30,6 +31,74 @@ interface TicketData {
   claimed?: boolean;
   claimed_by?: string;
   locked?: boolean;
+  transcript_id?: number;
+}
+
+interface CloseJob {
+  id: string;
+  status: string;
+  message: string;
+  progress: number;
+}
+
+// Follow a close job over /ws/updates until it finishes; polling is the
+// fallback while the socket is down and a slow safety net while it is up
+function followCloseJob(
+  initial: CloseJob,
+  onProgress: (job: CloseJob) => void
+): Promise<CloseJob> {
+  return new Promise((resolve) => {
+    let socket: WebSocket | null = null;
+    let timer: ReturnType<typeof setTimeout> | undefined;
+    let finished = false;
+
+    const update = (job: CloseJob) => {
+      if (finished) return;
+      onProgress(job);
+      if (job.status === "done" || job.status === "failed") {
+        finished = true;
+        clearTimeout(timer);
+        socket?.close();
+        resolve(job);
+      }
+    };
+
+    const poll = async () => {
+      try {
+        const response = await api.get(`/tickets/jobs/${initial.id}`);
+        update(
+          response.data.job ?? {
+            ...initial,
+            status: "failed",
+            message: response.data.message,
+          }
+        );
+      } catch {
+        // Try again on the next tick
+      }
+      if (!finished) {
+        const open = socket?.readyState === WebSocket.OPEN;
+        timer = setTimeout(poll, open ? 5000 : 1000);
+      }
+    };
+
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+    socket = new WebSocket(
+      `${protocol}://${window.location.host}/ws/updates?topics=tickets`
+    );
+    socket.onmessage = (message) => {
+      const event = JSON.parse(message.data);
+      if (event.type === "ticket_close" && event.data?.id === initial.id) {
+        update(event.data);
+      }
+    };
+    socket.onclose = () => {
+      socket = null;
+    };
+
+    update(initial);
+    if (!finished) timer = setTimeout(poll, 1000);
+  });
 }
 
 const TicketDetail = () => {
@@ -38,6 +107,9 @@ const TicketDetail = () => {
   const [ticket, setTicket] = useState<TicketData | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [transcript, setTranscript] = useState<string | null>(null);
+  const [transcriptLoading, setTranscriptLoading] = useState(false);
+  const [closeStatus, setCloseStatus] = useState<string | null>(null);
 
   useEffect(() => {
     fetchTicketDetails();
@@ -60,6 +132,23 @@ const TicketDetail = () => {
     }
   };
 
+  const loadTranscript = async (transcriptId: number) => {
+    try {
+      setTranscriptLoading(true);
+      const response = await api.get(`/transcripts/${transcriptId}`, {
+        responseType: "text",
+      });
+      setTranscript(response.data);
+    } catch (err: any) {
+      alert(
+        "Error loading transcript: " +
+          (err.response?.data?.detail || err.message)
+      );
+    } finally {
+      setTranscriptLoading(false);
+    }
+  };
+
   const handleCloseTicket = async () => {
     if (!confirm("Are you sure you want to close this ticket?")) {
       return;
@@ -68,6 +157,14 @@ const TicketDetail = () => {
     try {
       const response = await api.post(`/tickets/${ticketId}/close`);
       if (response.data.success) {
+        // Closing runs in the background, follow the job until it finishes
+        const job = await followCloseJob(response.data.job, (progress) =>
+          setCloseStatus(`${progress.message} (${progress.progress}%)`)
+        );
+        setCloseStatus(null);
+        if (job?.status === "failed") {
+          alert("Error: " + job.message);
+        }
         // Refresh ticket details
         fetchTicketDetails();
       } else {
@@ -133,9 +230,13 @@ const TicketDetail = () => {
             Back to Tickets
           </button>
           {ticket.status === "open" && (
-            <button onClick={handleCloseTicket} className="btn btn-danger">
+            <button
+              onClick={handleCloseTicket}
+              className="btn btn-danger"
+              disabled={closeStatus !== null}
+            >
               <FontAwesomeIcon icon={faTimes} />
-              Close Ticket
+              {closeStatus ?? "Close Ticket"}
             </button>
           )}
         </div>
@@ -273,6 +374,37 @@ const TicketDetail = () => {
         </div>
       </div>
 
+      {/* Archived Transcript */}
+      {ticket.transcript_id && (
+        <div className="card">
+          <div className="card-header">
+            <h3>
+              <FontAwesomeIcon icon={faFileLines} />
+              Transcript
+            </h3>
+          </div>
+          <div className="card-body">
+            {transcript ? (
+              <iframe
+                title={`Transcript #${ticket.id}`}
+                srcDoc={transcript}
+                sandbox="allow-scripts"
+                style={{ width: "100%", height: "70vh", border: "none" }}
+              />
+            ) : (
+              <button
+                onClick={() => loadTranscript(ticket.transcript_id!)}
+                className="btn btn-primary"
+                disabled={transcriptLoading}
+              >
+                <FontAwesomeIcon icon={faFileLines} />
+                {transcriptLoading ? "Loading..." : "View Transcript"}
+              </button>
+            )}
+          </div>
+        </div>
+      )}
+
       {/* Actions */}
       {ticket.status === "open" && (
         <div className="card">
@@ -281,9 +413,13 @@ const TicketDetail = () => {
           </div>
           <div className="card-body">
             <div className="action-buttons">
-              <button onClick={handleCloseTicket} className="btn btn-danger">
+              <button
+                onClick={handleCloseTicket}
+                className="btn btn-danger"
+                disabled={closeStatus !== null}
+              >
                 <FontAwesomeIcon icon={faTimes} />
-                Close Ticket
+                {closeStatus ?? "Close Ticket"}
               </button>
             </div>
           </div>